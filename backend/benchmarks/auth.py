@@ -0,0 +1,58 @@
+"""Per-request cost of ``get_current_user``.
+
+Verifies the same Supabase-style HS256 token repeatedly, the way a client
+polling ``GET /api/video/rooms/{room_id}`` would, through:
+
+* ``jose``: ``jwt.decode`` on every request (cache disabled)
+* ``hs256``: the direct ``hmac`` path (``JWT_FAST_HS256=true``, cache disabled)
+* ``cached``: the token-claims LRU in front of ``jwt.decode``
+
+Run from ``backend/``::
+
+    python -m benchmarks.auth [N]
+"""
+import asyncio
+import sys
+import time
+
+import benchmarks.fakes  # noqa: F401  (placeholder credentials)
+from jose import jwt
+
+import utils.auth as auth
+
+
+def make_token() -> str:
+    now = int(time.time())
+    return jwt.encode(
+        {"sub": "bench-user", "aud": "authenticated", "role": "authenticated", "iat": now, "exp": now + 3600},
+        auth.settings.supabase_jwt_secret,
+        algorithm="HS256"
+    )
+
+
+async def run(label: str, header: str, n: int, cache_size: int, fast: bool):
+    auth.settings.jwt_fast_hs256 = fast
+    auth._token_cache = auth.TokenCache(cache_size)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await auth.get_current_user(header)
+    elapsed = time.perf_counter() - start
+
+    line = f"{label:>7} n={n}  {elapsed / n * 1e6:8.2f} us/request"
+    if cache_size:
+        line += f"  hit_rate={auth.get_token_cache().metrics()['hit_rate']:.4f}"
+    print(line)
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    header = f"Bearer {make_token()}"
+
+    await run("jose", header, n, cache_size=0, fast=False)
+    await run("hs256", header, n, cache_size=0, fast=True)
+    await run("cached", header, n, cache_size=10000, fast=False)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""Prompt size and reply latency on long conversations, raw history vs rolling summary.
+
+Plays a synthetic ``TURNS``-turn conversation between one user and one
+companion through ``AIService.generate_response`` twice:
+
+* ``raw``: retrieved memories plus the last 10 session messages in every
+  prompt (no summarizer)
+* ``summary``: ``ConversationSummarizer`` folds every ``EVERY`` interactions
+  into a rolling summary in the background, and prompts carry that summary
+  on top of the same memories and session messages
+
+The summary keeps what scrolled out of the session window in the prompt,
+at a fixed cost of its own length; this shows that cost.
+
+The fake Gemini model charges prefill time per prompt token, so prompt
+size shows up in latency. Summaries come from a second fake that returns
+a ~150-word summary; its calls are reported as background cost.
+
+Run from ``backend/``::
+
+    python -m benchmarks.conversation_summary [TURNS] [EVERY]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.fakes import FakeGeminiModel
+from services.ai_service import AIService
+from services.conversation_summarizer import ConversationSummarizer
+from services.memory_service import MemoryService
+from services.memory_store import InProcessMemoryStore
+
+COMPANION = {"id": "bench", "name": "Ava", "personality": "warm", "description": "benchmark companion", "specialties": ["chatting"]}
+USER_ID = "bench-user"
+SESSION_MESSAGES = 10
+THINK_TIME = 0.1
+PROMPT_TOKEN_DELAY = 0.0002
+REPLY = (
+    "That sounds like a lot to juggle, but you are handling it well. "
+    "I remember you mentioned something similar before, so tell me more about how it went this time?"
+)
+SUMMARY = " ".join(
+    ["The user is preparing for a busy month with family visits, a work deadline and a half marathon."] * 9
+)
+TOPICS = ["my sister Maya", "the half marathon", "the product launch at work", "my dog Biscuit", "the new apartment", "learning Spanish"]
+
+
+def user_messages(turns: int) -> list:
+    rng = random.Random(11)
+    return [
+        f"Turn {i}: I keep thinking about {rng.choice(TOPICS)} and {rng.choice(TOPICS)}, "
+        f"and honestly I am not sure whether I am doing enough or whether I should slow down a little this week."
+        for i in range(turns)
+    ]
+
+
+async def converse(label: str, service: AIService, messages: list):
+    history, latencies, prompt_tokens = [], [], []
+    for message in messages:
+        built = service.prompt_builder.prompts_built
+        start = time.perf_counter()
+        reply = await service.generate_response(message, COMPANION, "bench-room", USER_ID, history[-SESSION_MESSAGES:])
+        latencies.append(time.perf_counter() - start)
+        if service.prompt_builder.prompts_built > built:
+            prompt_tokens.append(service.prompt_builder.last_prompt_tokens)
+
+        history.append({"sender_type": "user", "content": message})
+        history.append({"sender_type": "companion", "content": reply})
+        await asyncio.sleep(THINK_TIME)
+
+    # Steady state: the second half of the conversation.
+    half = len(messages) // 2
+    line = (f"{label:>8}: prompt tokens mean={statistics.mean(prompt_tokens[half:]):6.0f} max={max(prompt_tokens):5d}  "
+            f"reply latency mean={statistics.mean(latencies[half:]) * 1000:6.1f} ms  p50={statistics.median(latencies[half:]) * 1000:6.1f} ms")
+    summarizer = service.memory_service.summarizer
+    if summarizer:
+        await summarizer.close()
+        line += f"  summary updates={summarizer.updates}"
+    print(line)
+
+
+def memory_service(summarizer: ConversationSummarizer = None) -> MemoryService:
+    return MemoryService(store=InProcessMemoryStore(max_items=50, ttl_seconds=3600, max_keys=10), summarizer=summarizer)
+
+
+async def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    every = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    messages = user_messages(turns)
+
+    def model():
+        return FakeGeminiModel(REPLY, first_token_delay=0.05, token_delay=0.001, prompt_token_delay=PROMPT_TOKEN_DELAY)
+
+    summary_model = FakeGeminiModel(SUMMARY, first_token_delay=0.05, token_delay=0.001, prompt_token_delay=PROMPT_TOKEN_DELAY)
+
+    async def summarize(prompt: str) -> str:
+        return (await summary_model.generate_content_async(prompt)).text
+
+    print(f"{turns} turns, summary every {every} interactions, {PROMPT_TOKEN_DELAY * 1000:.1f} ms prefill per prompt token")
+    # One simulated user sends every turn back to back; leave the per-user
+    # rate limit out of the measurement.
+    raw = AIService(model=model(), memory_service=memory_service())
+    raw.response_cache = None
+    raw.admission = None
+    await converse("raw", raw, messages)
+
+    summarized = AIService(model=model(), memory_service=memory_service(ConversationSummarizer(summarize, every=every)))
+    summarized.response_cache = None
+    summarized.admission = None
+    await converse("summary", summarized, messages)
+    print(f"  background summary calls={summary_model.calls}  "
+          f"summary prompt tokens mean={statistics.mean(summary_model.prompt_tokens or [0]):.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
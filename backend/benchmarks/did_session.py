@@ -0,0 +1,76 @@
+"""Per-call D-ID latency: a new ClientSession per call vs the shared pool.
+
+Starts a local aiohttp stand-in for the D-ID streams API and replays the
+ICE trickle of a WebRTC negotiation against it both ways. Plain HTTP on
+loopback, so the numbers exclude the TLS handshake the real API adds on
+every fresh connection.
+
+Run from ``backend/``::
+
+    python -m benchmarks.did_session [CANDIDATES]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+import benchmarks.fakes  # noqa: F401  (placeholder credentials)
+from services.did_service import DIDService
+
+PORT = 8765
+
+
+async def ice(request: web.Request) -> web.Response:
+    await request.json()
+    return web.json_response({"status": "ok"})
+
+
+async def start_server() -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post("/talks/streams/{stream_id}/ice", ice)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", PORT).start()
+    return runner
+
+
+async def fresh_session_call(service: DIDService, index: int) -> bool:
+    url = f"{service.base_url}/talks/streams/bench/ice"
+    payload = {"candidate": {"candidate": f"c{index}"}, "sdpMid": "0", "sdpMLineIndex": 0, "session_id": "bench"}
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json=payload, headers=service.headers) as response:
+            return response.status == 200
+
+
+async def pooled_call(service: DIDService, index: int) -> bool:
+    return await service.send_ice_candidate("bench", {"candidate": f"c{index}"}, "0", 0)
+
+
+async def measure(label: str, call, service: DIDService, count: int):
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        assert await call(service, i)
+        timings.append(time.perf_counter() - start)
+    print(f"{label:>14}: p50={statistics.median(timings) * 1000:6.2f} ms  "
+          f"mean={statistics.mean(timings) * 1000:6.2f} ms  total={sum(timings) * 1000:7.1f} ms")
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    runner = await start_server()
+    service = DIDService(base_url=f"http://127.0.0.1:{PORT}")
+    await service.start()
+    try:
+        await measure("fresh session", fresh_session_call, service, count)
+        await measure("shared session", pooled_call, service, count)
+    finally:
+        await service.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
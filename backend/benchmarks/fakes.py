@@ -0,0 +1,192 @@
+"""Local stand-ins for external services used by the benchmarks.
+
+Importing this module also fills in placeholder credentials so the service
+modules can be imported without a real ``.env``. Nothing here talks to the
+network.
+"""
+import asyncio
+import os
+import time
+
+from utils.tokens import estimate_tokens
+
+for key, value in {
+    "SUPABASE_URL": "http://localhost:54321",
+    "SUPABASE_SERVICE_KEY": "bench.bench.bench",
+    "SUPABASE_JWT_SECRET": "bench-secret",
+    "GEMINI_API_KEY": "bench",
+    "ELEVENLABS_API_KEY": "bench",
+    "DID_API_KEY": "bench",
+}.items():
+    os.environ.setdefault(key, value)
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStream:
+    def __init__(self, model: "FakeGeminiModel", prefill_delay: float = 0.0):
+        self.model = model
+        self.prefill_delay = prefill_delay
+
+    async def __aiter__(self):
+        await asyncio.sleep(self.model.first_token_delay + self.prefill_delay)
+        for i, token in enumerate(self.model.tokens):
+            if i:
+                await asyncio.sleep(self.model.token_delay)
+            yield FakeChunk(token)
+
+
+class FakeGeminiModel:
+    """Mimics ``genai.GenerativeModel`` with a fixed latency profile.
+
+    With ``prompt_token_delay``, the first token also waits that long per
+    (estimated) prompt token, like prefill on a real model.
+    """
+
+    def __init__(self, reply: str = None, first_token_delay: float = 0.3, token_delay: float = 0.02, prompt_token_delay: float = 0.0):
+        reply = reply or "Hello there! It is lovely to hear from you again. What would you like to talk about today?"
+        self.tokens = [word + " " for word in reply.split()]
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.prompt_token_delay = prompt_token_delay
+        self.calls = 0
+        self.prompt_tokens = []
+
+    @property
+    def total_delay(self) -> float:
+        return self.first_token_delay + self.token_delay * (len(self.tokens) - 1)
+
+    def generate_content(self, prompt: str):
+        self.calls += 1
+        time.sleep(self.total_delay)
+        return FakeChunk("".join(self.tokens))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        self.calls += 1
+        self.prompt_tokens.append(estimate_tokens(prompt))
+        prefill_delay = self.prompt_token_delay * self.prompt_tokens[-1]
+        if stream:
+            return FakeStream(self, prefill_delay)
+        await asyncio.sleep(self.total_delay + prefill_delay)
+        return FakeChunk("".join(self.tokens))
+
+
+class FakeResponse:
+    data = None
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabaseClient", rows=None):
+        self.client = client
+        self.rows = rows
+
+    def _chain(self, *args, **kwargs) -> "FakeQuery":
+        return self
+
+    eq = order = limit = maybeSingle = _chain
+
+    def execute(self):
+        time.sleep(self.client.latency)
+        self.client.calls += 1
+        if self.rows is not None:
+            self.client.rows_written += len(self.rows) if isinstance(self.rows, list) else 1
+        return FakeResponse()
+
+
+class FakeTable:
+    def __init__(self, client: "FakeSupabaseClient"):
+        self.client = client
+
+    def insert(self, rows):
+        return FakeQuery(self.client, rows)
+
+    def update(self, row):
+        return FakeQuery(self.client, row)
+
+    def select(self, columns: str = "*"):
+        return FakeQuery(self.client)
+
+
+class FakeBucket:
+    def __init__(self, client: "FakeSupabaseClient"):
+        self.client = client
+
+    def upload(self, path: str, file, file_options=None):
+        """Reads the source in 1 MiB chunks, the way httpx streams a file body."""
+        with open(file, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                self.client.bytes_stored += len(chunk)
+        return FakeChunk("")
+
+    def get_public_url(self, path: str) -> str:
+        return f"http://localhost/storage/{path}"
+
+
+class FakeStorage:
+    def __init__(self, client: "FakeSupabaseClient"):
+        self.client = client
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self.client)
+
+
+class FakeSupabaseClient:
+    """Blocking client where every ``execute()`` costs one fixed round trip.
+
+    Writes are counted; reads always come back empty. Storage uploads
+    count the bytes read from the source file.
+    """
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+        self.calls = 0
+        self.rows_written = 0
+        self.bytes_stored = 0
+
+    def table(self, name: str) -> FakeTable:
+        return FakeTable(self)
+
+    @property
+    def storage(self) -> FakeStorage:
+        return FakeStorage(self)
+
+
+class FakeTextToSpeech:
+    def __init__(self, client: "FakeElevenLabs"):
+        self.client = client
+
+    async def convert_as_stream(self, voice_id: str, *, text: str, **kwargs):
+        self.client.requests += 1
+        await asyncio.sleep(self.client.first_chunk_delay)
+        for i in range(self.client.chunks):
+            if i:
+                await asyncio.sleep(self.client.chunk_delay)
+            yield os.urandom(self.client.chunk_size)
+
+
+class FakeElevenLabs:
+    """Mimics ``AsyncElevenLabs`` streaming speech: a first-chunk delay, then one chunk per ``chunk_delay``."""
+
+    def __init__(self, first_chunk_delay: float = 0.3, chunk_delay: float = 0.05, chunks: int = 20, chunk_size: int = 4096):
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.text_to_speech = FakeTextToSpeech(self)
+
+
+class FakeDIDService:
+    """Mimics ``DIDService.stream_text``: each call takes ``request_delay`` and is recorded with its finish time."""
+
+    def __init__(self, request_delay: float = 0.15):
+        self.request_delay = request_delay
+        self.spoken = []
+
+    async def stream_text(self, stream_id: str, text: str, voice_id: str = None) -> bool:
+        await asyncio.sleep(self.request_delay)
+        self.spoken.append((time.perf_counter(), text))
+        return True
@@ -0,0 +1,122 @@
+"""LLM calls and reply order under bursty chat input, per-message vs scheduled.
+
+Simulates ``ROOMS`` rooms where the user sends bursts of 1-4 messages a
+few hundred milliseconds apart and then waits for an answer, against a
+fake LLM call with 0.4-1.2 s of jittered latency. Compares:
+
+* ``per-message``: one concurrent generation per message, delivered as
+  each finishes (the old ``chat_message`` behaviour)
+* ``scheduled``: ``GenerationScheduler`` (debounce, merge, cancel stale,
+  one reply at a time per room)
+
+Reports LLM calls started and completed per conversation, replies, replies
+delivered out of order, and the time from a burst's last message to the
+reply that answers it.
+
+Run from ``backend/``::
+
+    python -m benchmarks.generation_burst [ROOMS] [BURSTS]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from services.generation_scheduler import GenerationScheduler, merge_messages
+
+DEBOUNCE_SECONDS = 0.3
+
+
+class Room:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.latency = random.Random(seed + 1000)
+        self.started = 0
+        self.completed = 0
+        self.delivered = []
+        self.answered_up_to = -1
+        self.sent_at = {}
+        self.answered = asyncio.Event()
+
+    async def llm(self, prompt: str) -> str:
+        self.started += 1
+        await asyncio.sleep(self.latency.uniform(0.4, 1.2))
+        self.completed += 1
+        return f"reply to [{prompt}]"
+
+    def deliver(self, covered: list):
+        self.delivered.append((time.perf_counter(), max(covered)))
+        self.answered_up_to = max(self.answered_up_to, max(covered))
+        self.answered.set()
+
+
+async def per_message(room: Room, index: int, text: str):
+    async def run():
+        await room.llm(text)
+        room.deliver([index])
+
+    asyncio.create_task(run())
+
+
+def scheduled(scheduler: GenerationScheduler):
+    async def send(room: Room, index: int, text: str):
+        async def generate(batch):
+            return await room.llm(merge_messages([message for _, message in batch]))
+
+        async def deliver(batch, reply):
+            room.deliver([i for i, _ in batch])
+
+        await scheduler.submit(f"room-{id(room)}", (index, text), generate, deliver)
+
+    return send
+
+
+async def converse(room: Room, send, bursts: int):
+    index = 0
+    for _ in range(bursts):
+        room.answered.clear()
+        for _ in range(room.rng.choice([1, 1, 2, 3, 4])):
+            room.sent_at[index] = time.perf_counter()
+            await send(room, index, f"message {index}")
+            index += 1
+            await asyncio.sleep(room.rng.uniform(0.1, 0.25))
+        last = index - 1
+        while room.answered_up_to < last:
+            await room.answered.wait()
+            room.answered.clear()
+        await asyncio.sleep(room.rng.uniform(0.5, 1.0))
+    await asyncio.sleep(1.5)
+    return index
+
+
+async def run(label: str, send, rooms: int, bursts: int):
+    conversations = [Room(seed) for seed in range(rooms)]
+    messages = await asyncio.gather(*(converse(room, send, bursts) for room in conversations))
+
+    out_of_order = 0
+    latencies = []
+    for room in conversations:
+        highest = -1
+        for delivered_at, covered in room.delivered:
+            if covered < highest:
+                out_of_order += 1
+            highest = max(highest, covered)
+            latencies.append(delivered_at - room.sent_at[covered])
+
+    print(f"{label:>11}: messages={sum(messages)}  llm started={sum(r.started for r in conversations)} "
+          f"completed={sum(r.completed for r in conversations)}  replies={sum(len(r.delivered) for r in conversations)}  "
+          f"out of order={out_of_order}  "
+          f"last message -> reply p50={statistics.median(latencies) * 1000:.0f} ms")
+
+
+async def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    bursts = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{rooms} rooms x {bursts} bursts, debounce {DEBOUNCE_SECONDS * 1000:.0f} ms")
+    await run("per-message", per_message, rooms, bursts)
+    await run("scheduled", scheduled(GenerationScheduler(DEBOUNCE_SECONDS)), rooms, bursts)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
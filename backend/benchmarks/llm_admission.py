@@ -0,0 +1,117 @@
+"""Reply outcomes during a traffic spike, unguarded vs admission control.
+
+Sends a burst of ``USERS`` first messages (a quarter of them from voice
+calls) plus one user who fires ``SPAM`` messages at once, all within half
+a second, through ``AIService.generate_response``. The fake Gemini model
+serves ``CAPACITY`` calls at a time; a call beyond that is rate limited
+and fails after ``THROTTLE_DELAY`` seconds of SDK retries, like a 429.
+
+* ``unguarded``: every message goes straight to the model
+* ``admission``: ``LLMAdmission`` caps concurrency at ``CAPACITY``, queues
+  voice ahead of text and rate limits each user
+
+For each it reports replies, busy (rejected) and failed replies, and reply
+latency for voice and text users.
+
+Run from ``backend/``::
+
+    python -m benchmarks.llm_admission [USERS] [SPAM]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.fakes import FakeGeminiModel
+from services.ai_service import AIService, BUSY_RESPONSE, FALLBACK_RESPONSE
+from services.llm_admission import LLMAdmission, TokenBuckets
+from services.memory_service import MemoryService
+from services.memory_store import InProcessMemoryStore
+
+COMPANION = {"id": "bench", "name": "Ava", "personality": "warm", "description": "benchmark companion", "specialties": []}
+CAPACITY = 16
+THROTTLE_DELAY = 3.0
+QUEUE_TIMEOUT = 8.0
+
+
+class ThrottledGeminiModel(FakeGeminiModel):
+    def __init__(self, capacity: int, **kwargs):
+        super().__init__(**kwargs)
+        self.capacity = capacity
+        self.in_flight = 0
+        self.throttled = 0
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        self.in_flight += 1
+        try:
+            if self.in_flight > self.capacity:
+                self.throttled += 1
+                await asyncio.sleep(THROTTLE_DELAY)
+                raise RuntimeError("429 Resource has been exhausted")
+            return await super().generate_content_async(prompt, stream)
+        finally:
+            self.in_flight -= 1
+
+
+def percentile(values: list, q: float) -> float:
+    return sorted(values)[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+async def run(label: str, admission: LLMAdmission, users: int, spam: int):
+    model = ThrottledGeminiModel(CAPACITY, first_token_delay=0.3, token_delay=0.01)
+    service = AIService(
+        model=model,
+        memory_service=MemoryService(store=InProcessMemoryStore(max_items=50, ttl_seconds=3600, max_keys=users + 1))
+    )
+    service.response_cache = None
+    service.admission = admission
+
+    rng = random.Random(5)
+    requests = [(f"user-{i}", "voice" if i % 4 == 0 else "text") for i in range(users)]
+    requests += [("spammer", "text")] * spam
+    rng.shuffle(requests)
+
+    outcomes = {"ok": 0, "busy": 0, "failed": 0}
+    latencies = {"voice": [], "text": []}
+
+    async def send(user_id: str, priority: str):
+        await asyncio.sleep(rng.uniform(0, 0.5))
+        start = time.perf_counter()
+        reply = await service.generate_response("How was your day?", COMPANION, "bench-room", user_id, [], priority)
+        elapsed = time.perf_counter() - start
+        if reply == BUSY_RESPONSE:
+            outcomes["busy"] += 1
+        elif reply == FALLBACK_RESPONSE:
+            outcomes["failed"] += 1
+        else:
+            outcomes["ok"] += 1
+            latencies[priority].append(elapsed)
+
+    await asyncio.gather(*(send(user_id, priority) for user_id, priority in requests))
+    print(f"{label:>10}: replies={outcomes['ok']} busy={outcomes['busy']} failed={outcomes['failed']} "
+          f"throttled calls={model.throttled}")
+    for priority, values in latencies.items():
+        if values:
+            print(f"{'':>12}{priority:>5} reply p50={statistics.median(values) * 1000:6.0f} ms  "
+                  f"p95={percentile(values, 0.95) * 1000:6.0f} ms")
+    if admission:
+        print(f"{'':>12}{admission.metrics()}")
+        await admission.close()
+
+
+async def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    spam = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    print(f"{users} users + 1 user sending {spam}, model capacity {CAPACITY} concurrent calls")
+    await run("unguarded", None, users, spam)
+    await run("admission", LLMAdmission(
+        max_concurrent=CAPACITY,
+        max_queue=256,
+        queue_timeout=QUEUE_TIMEOUT,
+        buckets=TokenBuckets(rate=20 / 60, burst=5)
+    ), users, spam)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
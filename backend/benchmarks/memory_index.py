@@ -0,0 +1,55 @@
+"""Semantic memory retrieval latency at 1k/10k/100k memories per user.
+
+Run from ``backend/``::
+
+    python -m benchmarks.memory_index
+"""
+import random
+import statistics
+import time
+
+import benchmarks.fakes  # noqa: F401  (placeholder credentials)
+from config.settings import get_settings
+from services.memory_index import MemoryIndex
+
+settings = get_settings()
+
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = 200
+TOPICS = ["hiking", "cooking pasta", "job interview", "my sister", "guitar practice", "moving to berlin",
+          "sleep schedule", "marathon training", "learning spanish", "the new puppy", "exam stress", "birthday party"]
+
+
+def synthetic_memory(rng: random.Random, i: int) -> dict:
+    topic = rng.choice(TOPICS)
+    return {
+        "user_message": f"I was thinking about {topic} again today, entry {i}",
+        "ai_response": f"That sounds important. Tell me more about {topic}.",
+        "timestamp": f"{i:08d}",
+    }
+
+
+def main():
+    rng = random.Random(7)
+    for size in SIZES:
+        index = MemoryIndex(settings.memory_index_dim, max_items=size, max_keys=1)
+
+        start = time.perf_counter()
+        for i in range(size):
+            index.add("bench", synthetic_memory(rng, i))
+        insert_us = (time.perf_counter() - start) / size * 1e6
+
+        timings = []
+        for _ in range(QUERIES):
+            query = f"how is the {rng.choice(TOPICS)} going?"
+            start = time.perf_counter()
+            index.search("bench", query, k=5)
+            timings.append(time.perf_counter() - start)
+
+        timings.sort()
+        print(f"memories={size:<7} insert={insert_us:6.1f} us/item  "
+              f"query p50={statistics.median(timings) * 1000:6.3f} ms  p99={timings[int(QUERIES * 0.99)] * 1000:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
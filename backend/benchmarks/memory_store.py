@@ -0,0 +1,68 @@
+"""``get_context`` latency and footprint as the number of users grows.
+
+Run from ``backend/``::
+
+    python -m benchmarks.memory_store memory [MAX_USERS]
+    python -m benchmarks.memory_store redis       # uses REDIS_URL
+    python -m benchmarks.memory_store fakeredis   # needs ``pip install fakeredis``
+"""
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+
+import benchmarks.fakes  # noqa: F401  (placeholder credentials)
+from config.settings import get_settings
+from services.memory_service import MemoryService
+from services.memory_store import InProcessMemoryStore, RedisMemoryStore
+
+settings = get_settings()
+
+USER_COUNTS = [100, 1000, 10000]
+TURNS_PER_USER = 60
+SAMPLES = 500
+
+
+def make_store(backend: str):
+    if backend == "memory":
+        return InProcessMemoryStore(settings.memory_max_items, settings.memory_ttl_seconds, max_keys=max(USER_COUNTS))
+    store = RedisMemoryStore(settings.redis_url, settings.memory_max_items, settings.memory_ttl_seconds, prefix="bench-memory:")
+    if backend == "fakeredis":
+        from fakeredis import FakeAsyncRedis
+        store.redis = FakeAsyncRedis(decode_responses=True)
+    return store
+
+
+async def main():
+    backend = sys.argv[1] if len(sys.argv) > 1 else "memory"
+    max_users = int(sys.argv[2]) if len(sys.argv) > 2 else max(USER_COUNTS)
+    tracemalloc.start()
+    store = make_store(backend)
+    service = MemoryService(store=store)
+
+    populated = 0
+    for users in [count for count in USER_COUNTS if count <= max_users]:
+        for user in range(populated, users):
+            for turn in range(TURNS_PER_USER):
+                await service.store_interaction(f"user{user}", "ava", "room", f"message {turn}", f"reply {turn}")
+        populated = users
+
+        timings = []
+        for i in range(SAMPLES):
+            start = time.perf_counter()
+            await service.get_context(f"user{i * 7919 % users}", "ava", limit=5)
+            timings.append(time.perf_counter() - start)
+
+        current, _ = tracemalloc.get_traced_memory()
+        print(f"{backend:>9} users={users:<6} get_context p50={statistics.median(timings) * 1e6:7.1f} us  "
+              f"p99={sorted(timings)[int(SAMPLES * 0.99)] * 1e6:7.1f} us  python heap={current / 1e6:6.1f} MB")
+
+    if backend != "memory":
+        for user in range(populated):
+            await store.clear(f"user{user}_ava")
+    await service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
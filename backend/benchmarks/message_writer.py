@@ -0,0 +1,72 @@
+"""Message persistence throughput: inline inserts vs the write-behind queue.
+
+Simulates ``ROOMS`` rooms each persisting ``TURNS`` chat turns (a user and a
+companion row per turn) against a stub Supabase client with a fixed 10 ms
+round trip.
+
+Run from ``backend/``::
+
+    python -m benchmarks.message_writer
+"""
+import asyncio
+import time
+
+from benchmarks.fakes import FakeSupabaseClient
+from services.executor import run_blocking, shutdown_executor
+from services.message_writer import MessageWriter
+
+ROOMS = 50
+TURNS = 20
+
+
+def rows_for(room: int, turn: int):
+    return [
+        {"room_id": f"room{room}", "sender_type": sender, "content": f"turn {turn}", "created_at": f"2026-01-01T00:00:{turn % 60:02d}"}
+        for sender in ("user", "companion")
+    ]
+
+
+async def inline(client: FakeSupabaseClient):
+    async def room(i):
+        for turn in range(TURNS):
+            for row in rows_for(i, turn):
+                await run_blocking(client.table("messages").insert(row).execute)
+
+    await asyncio.gather(*(room(i) for i in range(ROOMS)))
+
+
+async def write_behind(client: FakeSupabaseClient):
+    writer = MessageWriter(max_batch=100, flush_interval=0.05, max_queue=10000, client_factory=lambda: client)
+    await writer.start()
+
+    async def room(i):
+        for turn in range(TURNS):
+            for row in rows_for(i, turn):
+                await writer.enqueue(row)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(room(i) for i in range(ROOMS)))
+    await writer.stop()
+    return writer
+
+
+async def main():
+    total = ROOMS * TURNS * 2
+
+    client = FakeSupabaseClient()
+    start = time.perf_counter()
+    await inline(client)
+    elapsed = time.perf_counter() - start
+    print(f"inline       : {total / elapsed:8.0f} rows/s  ({client.calls} inserts)")
+
+    client = FakeSupabaseClient()
+    start = time.perf_counter()
+    writer = await write_behind(client)
+    elapsed = time.perf_counter() - start
+    print(f"write-behind : {total / elapsed:8.0f} rows/s  ({client.calls} inserts)  {writer.metrics()}")
+
+    shutdown_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""Worker RSS during parallel resumable recording uploads.
+
+Drives the ``/api/video/recordings/uploads`` API in-process (httpx ASGI
+transport) with ``PARALLEL`` uploads of ``SIZE_MB`` each, streamed as
+8 MiB parts, against a stand-in storage bucket. Needs roughly
+2 x PARALLEL x SIZE_MB of free space in the spool directory.
+
+Run from ``backend/``::
+
+    python -m benchmarks.recording_upload [SIZE_MB] [PARALLEL]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.fakes import FakeSupabaseClient
+import services.recording_uploads as recording_uploads
+from routes import recordings
+
+PART_MB = 8
+MB = 1024 * 1024
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def part_body(size: int):
+    block = os.urandom(MB)
+    for _ in range(size // MB):
+        yield block
+
+
+async def upload(client: httpx.AsyncClient, size_mb: int, index: int):
+    parts = size_mb // PART_MB
+    created = (await client.post("/api/video/recordings/uploads", json={
+        "room_id": f"bench-{index}", "filename": "call.webm", "total_parts": parts
+    })).json()
+
+    for part in range(parts):
+        response = await client.put(
+            f"/api/video/recordings/uploads/{created['upload_id']}/parts/{part}",
+            content=part_body(PART_MB * MB)
+        )
+        response.raise_for_status()
+
+    response = await client.post(f"/api/video/recordings/uploads/{created['upload_id']}/complete", json={"total_parts": parts})
+    response.raise_for_status()
+
+    status_url = response.json()["status_url"]
+    while (await client.get(status_url)).json()["status"] in ("queued", "processing"):
+        await asyncio.sleep(0.1)
+
+
+async def sample(peaks: list, stop: asyncio.Event):
+    while not stop.is_set():
+        peaks.append(rss_mb())
+        await asyncio.sleep(0.1)
+
+
+async def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    parallel = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    storage = FakeSupabaseClient(latency=0)
+    recording_uploads.get_supabase_client = lambda: storage
+
+    app = FastAPI()
+    app.include_router(recordings.router)
+
+    baseline = rss_mb()
+    samples = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample(samples, stop))
+
+    start = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await asyncio.gather(*(upload(client, size_mb, i) for i in range(parallel)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await sampler
+
+    print(f"{parallel} x {size_mb} MB in {elapsed:.1f}s, stored {storage.bytes_stored / MB:.0f} MB")
+    print(f"rss baseline={baseline:.0f} MB  peak={max(samples):.0f} MB  end={rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
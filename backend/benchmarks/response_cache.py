@@ -0,0 +1,63 @@
+"""Reply latency and hit rate of the opener response cache.
+
+Sends ``N`` first-turn messages to one companion, drawn from a handful of
+common openers (with varied casing/punctuation) plus a share of unique
+messages, through ``AIService.generate_response`` with and without the
+cache, against the fake Gemini model.
+
+Run from ``backend/``::
+
+    python -m benchmarks.response_cache [N] [VARIANTS]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.fakes import FakeGeminiModel
+from services.ai_service import AIService
+from services.response_cache import ResponseCache
+
+COMPANION = {"id": "bench", "name": "Ava", "personality": "warm", "description": "benchmark companion", "specialties": []}
+OPENERS = ["hi", "Hi!", "hello", "hey there", "how are you?", "How are you", "good morning", "what's up?"]
+UNIQUE_SHARE = 0.3
+
+
+def messages(n: int) -> list:
+    rng = random.Random(7)
+    return [
+        f"tell me about topic number {i}" if rng.random() < UNIQUE_SHARE else rng.choice(OPENERS)
+        for i in range(n)
+    ]
+
+
+async def run(label: str, service: AIService, batch: list):
+    latencies = []
+    for message in batch:
+        start = time.perf_counter()
+        await service.generate_response(message, COMPANION, "bench-room", None, [])
+        latencies.append(time.perf_counter() - start)
+
+    line = f"{label:>8} n={len(batch)}  mean={statistics.mean(latencies) * 1000:7.2f} ms  p50={statistics.median(latencies) * 1000:7.2f} ms"
+    if service.response_cache:
+        line += f"  {service.response_cache.metrics()}"
+    print(line)
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    variants = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    batch = messages(n)
+    model = FakeGeminiModel(first_token_delay=0.05, token_delay=0.002)
+
+    uncached = AIService(model=model)
+    uncached.response_cache = None
+    await run("uncached", uncached, batch)
+
+    cache = ResponseCache(ttl_seconds=3600, max_entries=10000, max_words=6, variants=variants)
+    await run("cached", AIService(model=model, response_cache=cache), batch)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,184 @@
+"""Cross-worker signaling through the Redis Socket.IO manager.
+
+Starts ``WORKERS`` signaling processes with ``SOCKETIO_MANAGER=redis`` plus
+one process on the default in-memory manager, then relays
+``offer``/``answer``/``candidate`` between two peers in the same room:
+
+* ``memory``: both peers on the in-memory worker (single-process baseline)
+* ``same-worker``: both peers on one Redis-backed worker
+* ``cross-worker``: the peers on different Redis-backed workers
+
+Every relay must arrive or the run fails, so a clean run shows that peers
+on different workers can signal each other; the latency columns show what
+the Redis hop adds to fan-out. Needs a Redis server at ``REDIS_URL``
+(default ``redis://localhost:6379``). Supabase is replaced by the local
+fake and every room is owned by the bench user the peers authenticate
+as, so nothing else is contacted.
+
+Run from ``backend/``::
+
+    python -m benchmarks.signaling_cluster [WORKERS] [ROUNDS]
+"""
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import benchmarks.fakes  # noqa: F401  (placeholder credentials)
+from benchmarks.fakes import FakeSupabaseClient
+
+BASE_PORT = 8700
+RELAY_TIMEOUT = 5.0
+BENCH_USER = "bench-user"
+
+
+def make_token() -> str:
+    from jose import jwt
+
+    now = int(time.time())
+    return jwt.encode(
+        {"sub": BENCH_USER, "aud": "authenticated", "exp": now + 3600},
+        os.environ["SUPABASE_JWT_SECRET"],
+        algorithm="HS256"
+    )
+
+
+def serve(port: int):
+    import uvicorn
+    import socketio
+
+    import services.room_sessions as room_sessions
+    import websocket.signaling as signaling
+
+    async def load_room_state(room_id: str, max_messages: int):
+        return {"room": {"room_id": room_id, "user_id": BENCH_USER}, "companion": {"id": "bench"}, "messages": []}
+
+    client = FakeSupabaseClient(latency=0)
+    signaling.get_supabase_client = lambda: client
+    room_sessions.load_room_state = load_room_state
+    for name in ("socketio", "engineio"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    signaling.sio.logger.setLevel(logging.WARNING)
+    signaling.sio.eio.logger.setLevel(logging.WARNING)
+
+    uvicorn.run(socketio.ASGIApp(signaling.sio), host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_worker(port: int, manager: str) -> subprocess.Popen:
+    env = {**os.environ, "SOCKETIO_MANAGER": manager, "ROOM_SESSION_BACKEND": "memory"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.signaling_cluster", "--serve", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL
+    )
+
+
+async def wait_for_port(port: int, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"worker on port {port} did not start")
+
+
+class Peer:
+    def __init__(self, port: int):
+        import socketio
+
+        self.port = port
+        self.client = socketio.AsyncClient()
+        self.received = {}
+        for event in ("offer", "answer", "candidate", "user_joined"):
+            self.client.on(event, self._handler(event))
+
+    def _handler(self, event: str):
+        async def handle(data):
+            waiter = self.received.get(event)
+            if waiter and not waiter.done():
+                waiter.set_result((time.perf_counter(), data))
+        return handle
+
+    def expect(self, event: str) -> asyncio.Future:
+        self.received[event] = asyncio.get_running_loop().create_future()
+        return self.received[event]
+
+    async def connect(self):
+        await self.client.connect(f"http://127.0.0.1:{self.port}", auth={"token": make_token()}, transports=["polling"])
+
+    async def join(self, room_id: str, role: str):
+        result = await self.client.call("join", {"roomId": room_id, "role": role})
+        if not result.get("success"):
+            raise RuntimeError(f"join failed: {result}")
+
+
+async def relay(sender: Peer, receiver: Peer, event: str, payload: dict) -> float:
+    arrived = receiver.expect(event)
+    sent = time.perf_counter()
+    await sender.client.emit(event, payload)
+    received, _ = await asyncio.wait_for(arrived, RELAY_TIMEOUT)
+    return received - sent
+
+
+async def measure(label: str, caller_port: int, callee_port: int, rounds: int):
+    room_id = f"bench-{uuid.uuid4().hex[:8]}"
+    caller, callee = Peer(caller_port), Peer(callee_port)
+    await caller.connect()
+    await callee.connect()
+
+    await callee.join(room_id, "callee")
+    joined = callee.expect("user_joined")
+    await caller.join(room_id, "caller")
+    await asyncio.wait_for(joined, RELAY_TIMEOUT)
+
+    latencies = []
+    for i in range(rounds):
+        latencies.append(await relay(caller, callee, "offer", {"roomId": room_id, "sdp": f"offer-{i}"}))
+        latencies.append(await relay(callee, caller, "answer", {"roomId": room_id, "sdp": f"answer-{i}"}))
+        latencies.append(await relay(caller, callee, "candidate", {"roomId": room_id, "candidate": {"candidate": f"c{i}"}}))
+
+    await caller.client.disconnect()
+    await callee.client.disconnect()
+
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    print(
+        f"{label:>12} ports={caller_port}->{callee_port}  relays={len(latencies):<5} "
+        f"p50={statistics.median(latencies) * 1000:6.2f} ms  p99={p99 * 1000:6.2f} ms"
+    )
+
+
+async def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    memory_port = BASE_PORT
+    redis_ports = [BASE_PORT + 1 + i for i in range(max(workers, 2))]
+    processes = [start_worker(memory_port, "memory")] + [start_worker(port, "redis") for port in redis_ports]
+
+    try:
+        for port in [memory_port] + redis_ports:
+            await wait_for_port(port)
+
+        await measure("memory", memory_port, memory_port, rounds)
+        await measure("same-worker", redis_ports[0], redis_ports[0], rounds)
+        await measure("cross-worker", redis_ports[0], redis_ports[1], rounds)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--serve":
+        serve(int(sys.argv[2]))
+    else:
+        asyncio.run(main())
@@ -0,0 +1,83 @@
+"""Event-loop latency while N blocking chat generations are in flight.
+
+A probe task stands in for a cheap signaling handler (``offer``/``candidate``
+relay) and records how late it gets scheduled. The "inline" run calls the
+blocking SDK directly from the coroutine, as the handlers used to; the
+"executor" run goes through a ``BlockingExecutor`` of the configured
+``BLOCKING_POOL_SIZE``; with more clients than threads, calls queue for a
+worker, which shows up as ``queue_depth`` and as longer chats rather than as
+event-loop stalls.
+
+Run from ``backend/``::
+
+    python -m benchmarks.signaling_load [N]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import benchmarks.fakes  # noqa: F401  (placeholder credentials)
+from config.settings import get_settings
+from services.executor import BlockingExecutor
+
+PROBE_INTERVAL = 0.005
+BLOCKING_CALL = 0.2
+ROUNDS = 5
+
+
+def blocking_generation():
+    time.sleep(BLOCKING_CALL)
+
+
+async def probe(latencies: list, stop: asyncio.Event, executor: BlockingExecutor = None, depths: list = None):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        latencies.append(time.perf_counter() - start - PROBE_INTERVAL)
+        if executor:
+            depths.append(executor.queue_depth)
+
+
+async def inline_chat():
+    for _ in range(ROUNDS):
+        blocking_generation()
+        await asyncio.sleep(0)
+
+
+async def executor_chat(executor: BlockingExecutor):
+    for _ in range(ROUNDS):
+        await executor.run(blocking_generation)
+
+
+async def run(label: str, make_chat, n: int, executor: BlockingExecutor = None):
+    latencies, depths = [], []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(latencies, stop, executor, depths))
+    started = time.perf_counter()
+    await asyncio.gather(*(make_chat() for _ in range(n)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    line = (f"{label:>9} n={n:<3} probes={len(latencies):<5} p50={statistics.median(latencies) * 1000:7.2f} ms  "
+            f"p99={p99 * 1000:7.2f} ms  chats done in {elapsed:5.2f} s")
+    if executor:
+        line += (f"\n{'':>10}pool={executor.max_workers} mean_queue_depth={statistics.mean(depths or [0]):.1f} "
+                 f"peak_queue_depth={executor.peak_queue_depth} queue_depth_after={executor.queue_depth}")
+    print(line)
+
+
+async def main():
+    pool_size = get_settings().blocking_pool_size
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else pool_size * 4
+    await run("inline", inline_chat, n)
+    executor = BlockingExecutor(max_workers=pool_size)
+    await run("executor", lambda: executor_chat(executor), n, executor)
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Time until the avatar starts speaking: whole reply vs sentence pipeline.
+
+Streams a multi-sentence reply from the fake Gemini model and hands it to
+the fake D-ID ``stream_text`` two ways:
+
+* ``whole``: wait for the full reply, then send it in one call (what the
+  signaling handler could do before)
+* ``pipelined``: ``SpeechPipeline`` sends each sentence as soon as it is
+  complete
+
+For each it reports when D-ID accepted the first text (the avatar starts
+speaking) and the last, and finally interrupts a pipelined reply after its
+first sentence to show how much is dropped.
+
+Run from ``backend/``::
+
+    python -m benchmarks.speech_pipeline [RUNS]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmarks.fakes import FakeDIDService, FakeGeminiModel
+from services.ai_service import AIService
+from services.speech_pipeline import SpeechPipeline
+
+COMPANION = {"id": "bench", "name": "Ava", "personality": "warm", "description": "benchmark companion", "specialties": []}
+REPLY = (
+    "Oh, that sounds like a wonderful trip! Kyoto in the autumn is beautiful, with the maple leaves turning red. "
+    "You should definitely visit Fushimi Inari early in the morning, before the crowds arrive. "
+    "If you have time, take the train out to Nara as well. The deer there are famously polite. "
+    "What are you most looking forward to?"
+)
+
+
+def ai_service() -> AIService:
+    service = AIService(model=FakeGeminiModel(REPLY, first_token_delay=0.3, token_delay=0.03))
+    service.response_cache = None
+    return service
+
+
+async def whole(service: AIService, did: FakeDIDService):
+    reply = "".join([delta async for delta in service.stream_response("Tell me about Kyoto", COMPANION, "bench-room", None, [])])
+    await did.stream_text("bench", reply.strip())
+
+
+async def pipelined(service: AIService, did: FakeDIDService, interrupt_after: int = None):
+    speech = SpeechPipeline(did, "bench")
+    async for delta in service.stream_response("Tell me about Kyoto", COMPANION, "bench-room", None, []):
+        await speech.feed(delta)
+        if interrupt_after is not None and len(did.spoken) >= interrupt_after:
+            await speech.cancel()
+            return speech
+    await speech.finish()
+    return speech
+
+
+async def measure(label: str, scenario, runs: int):
+    first, last, calls = [], [], 0
+    for _ in range(runs):
+        did = FakeDIDService()
+        start = time.perf_counter()
+        await scenario(ai_service(), did)
+        first.append(did.spoken[0][0] - start)
+        last.append(did.spoken[-1][0] - start)
+        calls = len(did.spoken)
+    print(f"{label:>9}: first speech p50={statistics.median(first) * 1000:6.1f} ms  "
+          f"last text accepted p50={statistics.median(last) * 1000:6.1f} ms  stream_text calls={calls}")
+
+
+async def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{len(REPLY.split())} words, {runs} runs, 0.3 s to first token, 30 ms/token, 150 ms per stream_text")
+    await measure("whole", whole, runs)
+    await measure("pipelined", pipelined, runs)
+
+    did = FakeDIDService()
+    speech = await pipelined(ai_service(), did, interrupt_after=1)
+    print(f"interrupt: sent={speech.sent} dropped={speech.dropped} (sentences after the interrupt are never sent)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""Cold import time of the application, ``python -X importtime`` style.
+
+Imports ``main`` in fresh interpreters without any credentials in the
+environment, reports the median wall time and the modules with the largest
+cumulative import time, and with ``--record PATH`` appends the result as a
+JSON line (timestamp, git commit, totals, top modules) so cold start can be
+tracked over time.
+
+Run from ``backend/``::
+
+    python -m benchmarks.startup [--runs N] [--top N] [--record PATH]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+TARGET = "main"
+
+
+def clean_env() -> dict:
+    keep = ("PATH", "HOME", "LANG", "PYTHONPATH", "VIRTUAL_ENV")
+    return {key: os.environ[key] for key in keep if key in os.environ}
+
+
+def import_wall_time() -> float:
+    code = f"import time; t = time.perf_counter(); import {TARGET}; print(time.perf_counter() - t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=clean_env(), capture_output=True, text=True, check=True
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def import_profile() -> list:
+    """``[(cumulative_us, self_us, depth, module)]`` from one ``-X importtime`` run."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        env=clean_env(), capture_output=True, text=True, check=True
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--record")
+    args = parser.parse_args()
+
+    walls = [import_wall_time() for _ in range(args.runs)]
+    profile = import_profile()
+    top_level = sorted((row for row in profile if row[2] <= 1), reverse=True)[:args.top]
+
+    print(f"import {TARGET}: median={statistics.median(walls) * 1000:.0f} ms  "
+          f"min={min(walls) * 1000:.0f} ms  runs={args.runs}")
+    print(f"{'cumulative':>12} {'self':>9}  module")
+    for cumulative_us, self_us, depth, name in top_level:
+        print(f"{cumulative_us / 1000:10.1f}ms {self_us / 1000:7.1f}ms  {'  ' * depth}{name}")
+
+    if args.record:
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "median_ms": round(statistics.median(walls) * 1000, 1),
+            "min_ms": round(min(walls) * 1000, 1),
+            "top": [{"module": name, "cumulative_ms": round(cumulative_us / 1000, 1)} for cumulative_us, _, _, name in top_level],
+        }
+        with open(args.record, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"recorded to {args.record}")
+
+
+if __name__ == "__main__":
+    main()
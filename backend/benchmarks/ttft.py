@@ -0,0 +1,58 @@
+"""Time-to-first-token: blocking ``generate_response`` vs ``stream_response``.
+
+Run from ``backend/``::
+
+    python -m benchmarks.ttft
+"""
+import asyncio
+import statistics
+import time
+
+from benchmarks.fakes import FakeGeminiModel
+from services.ai_service import AIService
+
+COMPANION = {
+    "id": "bench",
+    "name": "Ava",
+    "personality": "warm",
+    "description": "benchmark companion",
+    "specialties": ["chatting"],
+}
+RUNS = 10
+
+
+async def fixed_prompt(*args, **kwargs):
+    return "User: hi\nAva:", False
+
+
+async def measure_blocking(service: AIService) -> float:
+    start = time.perf_counter()
+    await service.generate_response("hi", COMPANION, "bench-room")
+    return time.perf_counter() - start
+
+
+async def measure_streaming(service: AIService) -> float:
+    start = time.perf_counter()
+    first = None
+    async for _ in service.stream_response("hi", COMPANION, "bench-room"):
+        if first is None:
+            first = time.perf_counter() - start
+    return first
+
+
+async def main():
+    service = AIService()
+    service.model = FakeGeminiModel()
+    service._build_prompt = fixed_prompt
+
+    blocking = [await measure_blocking(service) for _ in range(RUNS)]
+    streaming = [await measure_streaming(service) for _ in range(RUNS)]
+
+    print(f"fake gemini: first token {service.model.first_token_delay * 1000:.0f} ms, "
+          f"full reply {service.model.total_delay * 1000:.0f} ms")
+    print(f"blocking  ttft p50: {statistics.median(blocking) * 1000:.1f} ms")
+    print(f"streaming ttft p50: {statistics.median(streaming) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Time to first audio of companion speech, buffered vs streamed vs cached.
+
+Synthesizes ``N`` lines, a share of which repeat (greetings, cached
+openers), against the fake ElevenLabs client and reports time to first
+audio for:
+
+* ``buffered``: the whole clip is synthesized before any of it is returned,
+  the way ``generate_voice`` used to work
+* ``streamed``: ``TTSService.stream`` without a usable cache
+* ``cached``: ``TTSService.stream`` with the disk cache, including the
+  cache's hit rate and how many synthesis requests it saved
+
+Run from ``backend/``::
+
+    python -m benchmarks.tts [N] [CACHE_MB]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.fakes import FakeElevenLabs
+from services.tts_service import AudioCache, TTSService
+
+VOICE_ID = "bench-voice"
+REPEATED = ["Hi, it's so good to see you!", "Hello there!", "How are you today?", "Good morning!"]
+UNIQUE_SHARE = 0.4
+
+
+def lines(n: int) -> list:
+    rng = random.Random(7)
+    return [
+        f"Let me tell you about topic number {i}." if rng.random() < UNIQUE_SHARE else rng.choice(REPEATED)
+        for i in range(n)
+    ]
+
+
+async def first_audio(service: TTSService, text: str, buffered: bool) -> float:
+    start = time.perf_counter()
+    if buffered:
+        await service.synthesize(text, VOICE_ID)
+        return time.perf_counter() - start
+
+    first = None
+    async for _ in service.stream(text, VOICE_ID):
+        if first is None:
+            first = time.perf_counter() - start
+    return first
+
+
+async def run(label: str, batch: list, max_bytes: int, buffered: bool = False):
+    client = FakeElevenLabs()
+    with tempfile.TemporaryDirectory() as root:
+        cache = AudioCache(root, max_bytes)
+        service = TTSService(cache, client_factory=lambda: client)
+        latencies = [await first_audio(service, text, buffered) for text in batch]
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    stats = cache.metrics()
+    print(f"{label:>9}: first audio mean={statistics.mean(latencies) * 1000:6.1f} ms  "
+          f"p50={statistics.median(latencies) * 1000:6.1f} ms  p95={p95 * 1000:6.1f} ms  "
+          f"synth requests={client.requests}/{len(batch)}  hit_rate={stats['hit_rate']}")
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    cache_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 64
+    batch = lines(n)
+
+    print(f"{n} lines, {UNIQUE_SHARE:.0%} unique, cache {cache_mb} MB")
+    await run("buffered", batch, max_bytes=0, buffered=True)
+    await run("streamed", batch, max_bytes=0)
+    await run("cached", batch, max_bytes=int(cache_mb * 1024 * 1024))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,19 +1,114 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List
+
+# Empty by default so modules import without a .env; the app refuses to
+# start until every one of them is set (see ``Settings.missing_credentials``).
+REQUIRED_CREDENTIALS = (
+    "supabase_url",
+    "supabase_service_key",
+    "supabase_jwt_secret",
+    "gemini_api_key",
+    "elevenlabs_api_key",
+    "did_api_key",
+)
 
 class Settings(BaseSettings):
-    supabase_url: str
-    supabase_service_key: str
-    supabase_jwt_secret: str
-    gemini_api_key: str
-    elevenlabs_api_key: str
-    did_api_key: str
+    supabase_url: str = ""
+    supabase_service_key: str = ""
+    supabase_jwt_secret: str = ""
+    gemini_api_key: str = ""
+    elevenlabs_api_key: str = ""
+    did_api_key: str = ""
     redis_url: str = "redis://localhost:6379"
     twilio_account_sid: str = ""
     twilio_auth_token: str = ""
     frontend_url: str = "http://localhost:5173"
     backend_url: str = "http://localhost:8000"
     port: int = 8000
+    chat_streaming: bool = True
+    chat_debounce_ms: int = 300
+    blocking_pool_size: int = 16
+    did_api_url: str = "https://api.d-id.com"
+    did_pool_size: int = 100
+    did_pool_size_per_host: int = 20
+    did_dns_cache_seconds: int = 300
+    did_keepalive_seconds: float = 30.0
+    did_timeout_seconds: float = 15.0
+    did_connect_timeout_seconds: float = 5.0
+    did_max_retries: int = 2
+    did_retry_backoff_seconds: float = 0.2
+    ice_batch_window_ms: int = 20
+    ice_forward_concurrency: int = 4
+    ice_stream_ttl_seconds: int = 10 * 60
+    ice_max_streams: int = 10000
+    memory_backend: str = "auto"
+    memory_max_items: int = 50
+    memory_ttl_seconds: int = 60 * 60 * 24 * 30
+    memory_max_keys: int = 10000
+    memory_index_dim: int = 256
+    memory_context_token_budget: int = 400
+    prompt_token_budget: int = 1500
+    llm_admission_enabled: bool = True
+    llm_admission_backend: str = "memory"
+    llm_max_concurrent: int = 32
+    llm_max_queue: int = 256
+    llm_queue_timeout_seconds: float = 8.0
+    llm_user_rate_per_minute: float = 20.0
+    llm_user_burst: int = 5
+    llm_lease_seconds: float = 120.0
+    conversation_summary_enabled: bool = True
+    conversation_summary_every: int = 5
+    conversation_summary_max_words: int = 150
+    companion_cache_ttl_seconds: float = 300.0
+    companion_cache_backend: str = "memory"
+    room_session_backend: str = "memory"
+    room_session_max_messages: int = 10
+    room_session_ttl_seconds: int = 60 * 60 * 3
+    message_batch_size: int = 100
+    message_flush_interval_ms: int = 250
+    message_queue_size: int = 10000
+    recording_spool_dir: str = ""
+    recording_upload_ttl_seconds: int = 24 * 60 * 60
+    recording_upload_sweep_interval_seconds: int = 60 * 60
+    recording_job_workers: int = 2
+    recording_job_processes: int = 2
+    recording_job_drain_seconds: float = 30.0
+    recording_job_backend: str = "memory"
+    recording_job_ttl_seconds: int = 24 * 60 * 60
+    socketio_manager: str = "memory"
+    socketio_channel: str = "socketio"
+    room_presence_ttl_seconds: int = 60 * 60 * 3
+    room_sweep_enabled: bool = True
+    room_sweep_interval_seconds: int = 60
+    room_sweep_batch_size: int = 100
+    room_sweep_max_batches: int = 10
+    room_idle_seconds: int = 15 * 60
+    did_stream_unattached_seconds: int = 10 * 60
+    did_stream_max_age_seconds: int = 60 * 60 * 3
+    jwt_cache_size: int = 10000
+    jwt_fast_hs256: bool = False
+    socketio_log_mode: str = "async"
+    log_sample_rate: float = 0.01
+    log_queue_size: int = 10000
+    response_cache_enabled: bool = False
+    response_cache_backend: str = "memory"
+    response_cache_ttl_seconds: int = 60 * 60
+    response_cache_max_entries: int = 10000
+    response_cache_max_words: int = 6
+    response_cache_variants: int = 3
+    speech_max_pending_sentences: int = 2
+    speech_min_sentence_chars: int = 12
+    speech_max_sentence_chars: int = 240
+    tts_model_id: str = "eleven_turbo_v2_5"
+    tts_output_format: str = "mp3_44100_128"
+    tts_cache_dir: str = ""
+    tts_cache_max_mb: int = 512
+    tts_user_rate_per_minute: float = 30.0
+    tts_user_burst: int = 10
+
+    def missing_credentials(self) -> List[str]:
+        return [name.upper() for name in REQUIRED_CREDENTIALS if not getattr(self, name)]
 
     class Config:
         env_file = ".env"
@@ -1,13 +1,74 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
 import socketio
 from config.settings import get_settings
 from routes import companions, rooms, webrtc, did, recordings
-from websocket.signaling import sio
+from services.executor import get_executor, run_blocking, shutdown_executor
+from services.supabase_client import get_supabase_client
+from services.ai_service import get_ai_service
+from services.did_service import get_did_service
+from services.companion_cache import get_companion_cache
+from services.room_sessions import get_room_sessions
+from services.room_presence import get_room_presence
+from services.message_writer import get_message_writer
+from services.recording_jobs import get_recording_jobs
+from services.recording_uploads import get_upload_store
+from services.response_cache import get_response_cache
+from services.tts_service import get_tts_service
+from services.speech_pipeline import get_speech_pipelines
+from services.room_sweeper import get_room_sweeper
+from services.ice_forwarder import get_ice_forwarder
+from services.generation_scheduler import get_generation_scheduler
+from services.llm_admission import get_llm_admission
+from services.metrics import get_metrics
+from utils.auth import get_token_cache
+from utils.log import log_metrics, stop_logging
+from websocket.signaling import sio, close_room
 
 settings = get_settings()
 
-app = FastAPI(title="AI Companion API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    missing = settings.missing_credentials()
+    if missing:
+        raise RuntimeError(f"Missing required settings: {', '.join(missing)}")
+
+    get_executor()
+    # Clients are built here rather than at import time, so importing any
+    # module is cheap and needs no credentials while a misconfigured
+    # deployment still fails at startup.
+    get_supabase_client()
+    warm_up = asyncio.create_task(run_blocking(get_ai_service().warm_up))
+    await get_did_service().start()
+    await get_message_writer().start()
+    await get_recording_jobs().start()
+    await get_upload_store().start()
+    if settings.room_sweep_enabled:
+        get_room_sweeper().on_room_ended = close_room
+        await get_room_sweeper().start()
+    yield
+    warm_up.cancel()
+    await get_room_sweeper().stop()
+    await get_generation_scheduler().close()
+    await get_upload_store().stop()
+    await get_recording_jobs().stop()
+    await get_message_writer().stop()
+    await get_ice_forwarder().close()
+    await get_did_service().close()
+    await get_ai_service().memory_service.close()
+    await get_room_sessions().aclose()
+    await get_room_presence().aclose()
+    if get_response_cache():
+        await get_response_cache().close()
+    if get_llm_admission():
+        await get_llm_admission().close()
+    shutdown_executor()
+    stop_logging()
+
+app = FastAPI(title="AI Companion API", version="1.0.0", lifespan=lifespan)
 
 allowed_origins = [
     settings.frontend_url,
@@ -36,9 +97,36 @@ app.include_router(recordings.router)
 
 socket_app = socketio.ASGIApp(sio, app)
 
+metrics = get_metrics()
+metrics.add_collector("executor", lambda: get_executor().metrics())
+metrics.add_collector("prompts", lambda: get_ai_service().prompt_builder.metrics())
+metrics.add_collector("companion_cache", lambda: get_companion_cache().metrics())
+metrics.add_collector("message_writer", lambda: get_message_writer().metrics())
+metrics.add_collector("recording_jobs", lambda: get_recording_jobs().metrics())
+metrics.add_collector("auth_cache", lambda: get_token_cache().metrics())
+metrics.add_collector("response_cache", lambda: get_response_cache().metrics() if get_response_cache() else {})
+metrics.add_collector("tts_cache", lambda: get_tts_service().cache.metrics())
+metrics.add_collector("speech", lambda: get_speech_pipelines().metrics())
+metrics.add_collector("generations", lambda: get_generation_scheduler().metrics())
+metrics.add_collector("llm_admission", lambda: get_llm_admission().metrics() if get_llm_admission() else {})
+metrics.add_collector("room_sweeper", lambda: get_room_sweeper().metrics())
+metrics.add_collector("log", log_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "executor": get_executor().metrics(),
+        "prompts": get_ai_service().prompt_builder.metrics(),
+        "companion_cache": get_companion_cache().metrics(),
+        "message_writer": get_message_writer().metrics(),
+        "recording_jobs": get_recording_jobs().metrics(),
+        "auth_cache": get_token_cache().metrics()
+    }
 
 @app.get("/")
 async def root():
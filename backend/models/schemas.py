@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -42,6 +42,13 @@ class CompanionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Long enough for any companion reply; longer text is rejected before it
+# costs ElevenLabs credits or a cache file.
+MAX_VOICE_TEXT_CHARS = 1000
+
+class VoiceRequest(BaseModel):
+    text: str = Field(..., max_length=MAX_VOICE_TEXT_CHARS)
+
 class MessageRequest(BaseModel):
     room_id: str
     content: str
@@ -1,31 +1,40 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Header, Response, Depends
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import datetime
 import requests
 from services.supabase_client import get_supabase_client
-from models.schemas import CompanionResponse
+from services.executor import run_blocking
+from services.companion_cache import get_companion_cache
+from services.tts_service import get_tts_rate_limiter, get_tts_service
+from models.schemas import CompanionResponse, VoiceRequest
+from utils.auth import get_current_user
 
 router = APIRouter()
 
 PERSONAS_API_URL = "https://persona-fetcher-api.up.railway.app/personas"
 
 @router.get("", response_model=List[CompanionResponse])
-async def get_companions():
+async def get_companions(response: Response, if_none_match: Optional[str] = Header(None)):
     try:
-        supabase = get_supabase_client()
-        response = supabase.table("companions").select("*").eq("is_active", True).execute()
+        cache = get_companion_cache()
+        companions = await cache.list_active()
 
-        if not response.data or len(response.data) == 0:
+        if not companions:
             print("No companions found in database, attempting to sync...")
             try:
                 await sync_companions()
-                response = supabase.table("companions").select("*").eq("is_active", True).execute()
+                companions = await cache.list_active()
             except Exception as sync_error:
                 print(f"Error syncing companions: {sync_error}")
 
-        if not response.data:
-            return []
+        etag = await cache.etag()
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers={"ETag": etag})
 
-        return response.data
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return companions or []
     except Exception as e:
         print(f"Error fetching companions: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch companions: {str(e)}")
@@ -33,23 +42,68 @@ async def get_companions():
 @router.get("/{companion_id}", response_model=CompanionResponse)
 async def get_companion(companion_id: str):
     try:
-        supabase = get_supabase_client()
-        response = supabase.table("companions").select("*").eq("id", companion_id).maybeSingle().execute()
+        companion = await get_companion_cache().get(companion_id)
 
-        if not response.data:
+        if not companion:
             raise HTTPException(status_code=404, detail="Companion not found")
 
-        return response.data
+        return companion
     except HTTPException:
         raise
     except Exception as e:
         print(f"Error fetching companion: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch companion: {str(e)}")
 
+@router.post("/{companion_id}/voice")
+async def stream_companion_voice(companion_id: str, request: VoiceRequest, user_id: str = Depends(get_current_user)):
+    companion = await get_companion_cache().get(companion_id)
+    if not companion:
+        raise HTTPException(status_code=404, detail="Companion not found")
+    if not companion.get("voice_id"):
+        raise HTTPException(status_code=409, detail="Companion has no voice")
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+
+    tts = get_tts_service()
+    cached = tts.is_cached(request.text, companion["voice_id"])
+    # Only new audio costs ElevenLabs credits and a slot in the shared cache.
+    if not cached:
+        retry_after = await get_tts_rate_limiter().take(user_id)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many voice requests",
+                headers={"Retry-After": str(max(int(retry_after + 0.999), 1))}
+            )
+
+    chunks = tts.stream(request.text, companion["voice_id"])
+
+    # Pull the first chunk before answering so a synthesis failure is a 502
+    # rather than a 200 with an empty body.
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    except Exception as e:
+        print(f"Error streaming voice: {e}")
+        raise HTTPException(status_code=502, detail="Voice synthesis failed")
+
+    async def body():
+        if first:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=tts.media_type,
+        headers={"X-Audio-Cache": "hit" if cached else "miss", "Cache-Control": "private, max-age=86400"}
+    )
+
 @router.post("/sync")
 async def sync_companions():
     try:
-        response = requests.get(PERSONAS_API_URL, timeout=10)
+        response = await run_blocking(requests.get, PERSONAS_API_URL, timeout=10)
         response.raise_for_status()
         personas = response.json()
 
@@ -65,10 +119,13 @@ async def sync_companions():
                 "voice_id": persona.get("voice_id", ""),
                 "specialties": persona.get("specialties", []),
                 "metadata": persona.get("metadata", {}),
-                "is_active": True
+                "is_active": True,
+                "updated_at": datetime.utcnow().isoformat()
             }
 
-            supabase.table("companions").upsert(companion_data).execute()
+            await run_blocking(supabase.table("companions").upsert(companion_data).execute)
+
+        await get_companion_cache().invalidate()
 
         return {"message": f"Synced {len(personas)} companions"}
     except Exception as e:
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from services.did_service import DIDService
-from typing import Dict, Optional
+from services.did_service import get_did_service
+from services.ice_forwarder import get_ice_forwarder
+from typing import Dict, List, Optional
 
 router = APIRouter(prefix="/api/did", tags=["D-ID"])
 
-did_service = DIDService()
+did_service = get_did_service()
 
 class CreateStreamRequest(BaseModel):
     presenter_id: str
     session_id: str
+    room_id: Optional[str] = None
 
 class SDPAnswerRequest(BaseModel):
     stream_id: str
@@ -21,6 +23,16 @@ class ICECandidateRequest(BaseModel):
     sdp_mid: str
     sdp_m_line_index: int
 
+class ICECandidate(BaseModel):
+    candidate: Dict
+    sdp_mid: str
+    sdp_m_line_index: int
+
+class ICECandidateBatchRequest(BaseModel):
+    stream_id: str
+    candidates: List[ICECandidate] = []
+    end_of_candidates: bool = False
+
 class StreamTextRequest(BaseModel):
     stream_id: str
     text: str
@@ -28,7 +40,7 @@ class StreamTextRequest(BaseModel):
 
 @router.post("/streams")
 async def create_stream(request: CreateStreamRequest):
-    result = await did_service.create_stream(request.presenter_id, request.session_id)
+    result = await did_service.create_stream(request.presenter_id, request.session_id, request.room_id)
 
     if not result:
         raise HTTPException(status_code=500, detail="Failed to create D-ID stream")
@@ -46,18 +58,30 @@ async def send_answer(request: SDPAnswerRequest):
 
 @router.post("/streams/ice")
 async def send_ice_candidate(request: ICECandidateRequest):
-    success = await did_service.send_ice_candidate(
-        request.stream_id,
-        request.candidate,
-        request.sdp_mid,
-        request.sdp_m_line_index
-    )
+    results = await get_ice_forwarder().submit(request.stream_id, [{
+        "candidate": request.candidate,
+        "sdp_mid": request.sdp_mid,
+        "sdp_m_line_index": request.sdp_m_line_index
+    }])
 
-    if not success:
+    if not results[0]:
         raise HTTPException(status_code=500, detail="Failed to send ICE candidate to D-ID")
 
     return {"success": True}
 
+@router.post("/streams/ice/batch")
+async def send_ice_candidates(request: ICECandidateBatchRequest):
+    results = await get_ice_forwarder().submit(
+        request.stream_id,
+        [candidate.model_dump() for candidate in request.candidates],
+        end_of_candidates=request.end_of_candidates
+    )
+
+    return {
+        "success": all(results),
+        "results": [{"index": i, "success": success} for i, success in enumerate(results)]
+    }
+
 @router.post("/streams/speak")
 async def stream_text(request: StreamTextRequest):
     success = await did_service.stream_text(request.stream_id, request.text, request.voice_id)
@@ -69,6 +93,7 @@ async def stream_text(request: StreamTextRequest):
 
 @router.delete("/streams/{stream_id}")
 async def delete_stream(stream_id: str):
+    get_ice_forwarder().forget(stream_id)
     success = await did_service.delete_stream(stream_id)
 
     if not success:
@@ -1,74 +1,140 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Query
+from pydantic import BaseModel
+from typing import Optional
 from services.supabase_client import get_supabase_client
-from datetime import datetime
-import uuid
+from services.executor import run_blocking
+from services.recording_jobs import get_recording_jobs
+from services.recording_uploads import (
+    CHUNK_SIZE,
+    get_upload_store,
+    iter_upload_file,
+    spool_stream,
+)
+from utils.pagination import keyset_page, page_response
+import os
+import tempfile
 
 router = APIRouter(prefix="/api/video/recordings", tags=["Recordings"])
 
-@router.post("")
+class CreateUploadRequest(BaseModel):
+    room_id: str
+    filename: str = "recording.webm"
+    content_type: Optional[str] = None
+    total_parts: Optional[int] = None
+
+class CompleteUploadRequest(BaseModel):
+    total_parts: int
+    sha256: Optional[str] = None
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+def _job_response(job: dict) -> dict:
+    return {
+        "success": True,
+        "job_id": job["job_id"],
+        "recording_id": job["recording_id"],
+        "status": job["status"],
+        "status_url": f"{router.prefix}/jobs/{job['job_id']}"
+    }
+
+@router.post("", status_code=202)
 async def upload_recording(
     room_id: str,
     file: UploadFile = File(...)
 ):
+    spool_path = None
     try:
-        supabase = get_supabase_client()
-
-        file_content = await file.read()
-        file_size_mb = len(file_content) / (1024 * 1024)
+        fd, spool_path = tempfile.mkstemp(prefix="recording-", dir=get_upload_store().root)
+        os.close(fd)
 
-        recording_id = str(uuid.uuid4())
-        file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'webm'
-        storage_path = f"recordings/{room_id}/{recording_id}.{file_extension}"
-
-        upload_response = supabase.storage.from_('recordings').upload(
-            storage_path,
-            file_content,
-            {
-                'content-type': file.content_type or 'video/webm',
-                'cache-control': '3600'
-            }
+        size, sha256 = await spool_stream(iter_upload_file(file), spool_path)
+        job = await get_recording_jobs().submit(
+            room_id, spool_path, file.filename, file.content_type, size, sha256,
+            cleanup=lambda path=spool_path: _remove_file(path)
         )
 
-        if hasattr(upload_response, 'error') and upload_response.error:
-            raise HTTPException(status_code=500, detail=f"Storage upload failed: {upload_response.error}")
+        return _job_response(job)
+
+    except Exception as e:
+        print(f"Error uploading recording: {e}")
+        if spool_path:
+            _remove_file(spool_path)
+        raise HTTPException(status_code=500, detail=str(e))
 
-        public_url = supabase.storage.from_('recordings').get_public_url(storage_path)
+@router.post("/uploads")
+async def create_upload(request: CreateUploadRequest):
+    manifest = get_upload_store().create(request.room_id, request.filename, request.content_type, request.total_parts)
+    return {**manifest, "chunk_size": CHUNK_SIZE}
 
-        recording_data = {
-            "id": recording_id,
-            "room_id": room_id,
-            "storage_path": storage_path,
-            "url": public_url,
-            "duration_seconds": 0,
-            "file_size_mb": round(file_size_mb, 2),
-            "created_at": datetime.utcnow().isoformat()
-        }
+@router.put("/uploads/{upload_id}/parts/{index}")
+async def upload_part(upload_id: str, index: int, request: Request):
+    if index < 0:
+        raise HTTPException(status_code=400, detail="Part index must be non-negative")
 
-        insert_response = supabase.table("call_recordings").insert(recording_data).execute()
+    try:
+        part = await get_upload_store().write_part(upload_id, index, request.stream())
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
 
-        if hasattr(insert_response, 'error') and insert_response.error:
-            raise HTTPException(status_code=500, detail=f"Database insert failed: {insert_response.error}")
+    return part
 
-        return {
-            "success": True,
-            "recording": recording_data
-        }
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    try:
+        return get_upload_store().status(upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
 
-    except Exception as e:
-        print(f"Error uploading recording: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+@router.post("/uploads/{upload_id}/complete", status_code=202)
+async def complete_upload(upload_id: str, request: CompleteUploadRequest):
+    store = get_upload_store()
+    try:
+        manifest, path, size, sha256 = await store.assemble(upload_id, request.total_parts)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if request.sha256 and request.sha256 != sha256:
+        raise HTTPException(status_code=422, detail="Checksum mismatch")
+
+    job = await get_recording_jobs().submit(
+        manifest["room_id"], path, manifest["filename"], manifest["content_type"], size, sha256,
+        cleanup=lambda: store.discard(upload_id)
+    )
+
+    return _job_response(job)
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    get_upload_store().discard(upload_id)
+    return {"success": True}
+
+@router.get("/jobs/{job_id}")
+async def get_recording_job(job_id: str):
+    job = await get_recording_jobs().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @router.get("/{room_id}")
-async def get_recordings(room_id: str):
+async def get_recordings(room_id: str, limit: int = Query(50, ge=1, le=200), cursor: Optional[str] = None):
     try:
         supabase = get_supabase_client()
 
-        response = supabase.table("call_recordings").select("*").eq("room_id", room_id).order("created_at", desc=True).execute()
+        query = keyset_page(supabase.table("call_recordings").select("*").eq("room_id", room_id), cursor, limit)
+        response = await run_blocking(query.execute)
+        recordings, next_cursor = page_response(response.data or [], limit)
 
         return {
-            "recordings": response.data or []
+            "recordings": recordings,
+            "next_cursor": next_cursor
         }
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error fetching recordings: {e}")
         raise HTTPException(status_code=500, detail=str(e))
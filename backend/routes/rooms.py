@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
 from datetime import datetime, timedelta
 import uuid
 from services.supabase_client import get_supabase_client
+from services.executor import run_blocking
 from models.schemas import CreateRoomRequest, RoomResponse
 from utils.auth import get_current_user
+from utils.pagination import keyset_page, page_response
+from services.room_presence import get_room_presence
 
 router = APIRouter()
 
@@ -24,7 +28,7 @@ async def create_room(request: CreateRoomRequest, user_id: str = Depends(get_cur
             "expires_at": expires_at.isoformat()
         }
 
-        response = supabase.table("video_rooms").insert(room_data).execute()
+        response = await run_blocking(supabase.table("video_rooms").insert(room_data).execute)
 
         if not response.data or len(response.data) == 0:
             raise HTTPException(status_code=500, detail="Failed to create room")
@@ -40,7 +44,7 @@ async def create_room(request: CreateRoomRequest, user_id: str = Depends(get_cur
 async def get_room(room_id: str, user_id: str = Depends(get_current_user)):
     try:
         supabase = get_supabase_client()
-        response = supabase.table("video_rooms").select("*").eq("room_id", room_id).maybeSingle().execute()
+        response = await run_blocking(supabase.table("video_rooms").select("*").eq("room_id", room_id).maybeSingle().execute)
 
         if not response.data:
             raise HTTPException(status_code=404, detail="Room not found")
@@ -55,6 +59,47 @@ async def get_room(room_id: str, user_id: str = Depends(get_current_user)):
         print(f"Error fetching room: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch room: {str(e)}")
 
+async def _require_owner(room_id: str, user_id: str):
+    supabase = get_supabase_client()
+    response = await run_blocking(supabase.table("video_rooms").select("user_id").eq("room_id", room_id).maybeSingle().execute)
+
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    if response.data["user_id"] != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+@router.get("/{room_id}/presence")
+async def get_room_presence_members(room_id: str, user_id: str = Depends(get_current_user)):
+    await _require_owner(room_id, user_id)
+
+    members = await get_room_presence().members(room_id)
+    return {"room_id": room_id, "count": len(members), "members": members}
+
+@router.get("/{room_id}/messages")
+async def get_room_messages(
+    room_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    user_id: str = Depends(get_current_user)
+):
+    """Chat history, newest first; pass ``next_cursor`` back as ``cursor`` for older messages."""
+    await _require_owner(room_id, user_id)
+
+    supabase = get_supabase_client()
+    try:
+        query = keyset_page(
+            supabase.table("messages").select("id, sender_type, content, created_at").eq("room_id", room_id),
+            cursor,
+            limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response = await run_blocking(query.execute)
+    messages, next_cursor = page_response(response.data or [], limit)
+    return {"messages": messages, "next_cursor": next_cursor}
+
 @router.post("/{room_id}/end")
 async def end_room(room_id: str, user_id: str = Depends(get_current_user)):
     try:
@@ -65,7 +110,7 @@ async def end_room(room_id: str, user_id: str = Depends(get_current_user)):
             "ended_at": datetime.utcnow().isoformat()
         }
 
-        response = supabase.table("video_rooms").update(update_data).eq("room_id", room_id).eq("user_id", user_id).execute()
+        response = await run_blocking(supabase.table("video_rooms").update(update_data).eq("room_id", room_id).eq("user_id", user_id).execute)
 
         if not response.data:
             raise HTTPException(status_code=404, detail="Room not found")
@@ -1,80 +1,336 @@
-import google.generativeai as genai
+import asyncio
+import time
+from contextlib import nullcontext
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from config.settings import get_settings
 from services.supabase_client import get_supabase_client
 from services.memory_service import MemoryService
+from services.executor import run_blocking
+from services.prompt_builder import PromptBuilder
+from services.metrics import get_metrics
+from services.response_cache import ResponseCache, get_response_cache
+from services.conversation_summarizer import ConversationSummarizer
+from services.llm_admission import AdmissionRejected, LLMAdmission, get_llm_admission
 
 settings = get_settings()
-genai.configure(api_key=settings.gemini_api_key)
+
+GENERATION_SECONDS = get_metrics().histogram(
+    "ai_generation_seconds",
+    "Companion reply latency by stage (memory, db, llm, first_token, persist, total)",
+    labels=("mode", "stage")
+)
+
+FALLBACK_RESPONSE = "I apologize, but I'm having trouble processing that right now. Could you try rephrasing?"
+BUSY_RESPONSE = "I'm getting a lot of messages right now. Give me a moment and try again?"
+
+def is_service_reply(text: str) -> bool:
+    """Whether ``text`` is a stand-in reply (busy or failed) rather than the companion's own words."""
+    return text in (BUSY_RESPONSE, FALLBACK_RESPONSE)
+
+def create_gemini_model():
+    import google.generativeai as genai
+
+    genai.configure(api_key=settings.gemini_api_key)
+    return genai.GenerativeModel('gemini-pro')
 
 class AIService:
-    def __init__(self):
-        self.model = genai.GenerativeModel('gemini-pro')
-        self.memory_service = MemoryService()
+    def __init__(
+        self,
+        model=None,
+        memory_service: MemoryService = None,
+        prompt_builder: PromptBuilder = None,
+        response_cache: ResponseCache = None,
+        admission: LLMAdmission = None
+    ):
+        self._model = model
+        self.admission = admission or get_llm_admission()
+        self.memory_service = memory_service or MemoryService(summarizer=self.create_summarizer())
+        self.prompt_builder = prompt_builder or PromptBuilder(token_budget=settings.prompt_token_budget)
+        self.response_cache = response_cache or get_response_cache()
+
+    @property
+    def model(self):
+        # The Gemini SDK is slow to import; load it on first generation.
+        if self._model is None:
+            self._model = create_gemini_model()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
 
-    async def generate_response(self, user_message: str, companion: dict, room_id: str, user_id: str = None) -> str:
+    def create_summarizer(self) -> Optional[ConversationSummarizer]:
+        if not settings.conversation_summary_enabled:
+            return None
+        return ConversationSummarizer(
+            self._complete,
+            every=settings.conversation_summary_every,
+            max_words=settings.conversation_summary_max_words,
+            max_keys=settings.memory_max_keys
+        )
+
+    def _admit(self, user_id: Optional[str], priority: str):
+        """Hold an admission slot for one model call (see ``LLMAdmission``)."""
+        if self.admission is None:
+            return nullcontext()
+        return self.admission.slot(user_id, priority)
+
+    async def _complete(self, prompt: str) -> str:
+        async with self._admit(None, "background"):
+            response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    def warm_up(self):
+        """Import the Gemini SDK (and LangMem, when used) ahead of the first chat message."""
+        self.model
+        if self.memory_service.langmem_available:
+            self.memory_service.langmem
+
+    def _cache_key(self, companion: dict, user_message: str, session_messages: Optional[List[Dict]]) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        return self.response_cache.key_for(companion, user_message, session_messages)
+
+    async def _cached_reply(self, cache_key: Optional[str]) -> Optional[str]:
+        if not cache_key:
+            return None
         try:
-            supabase = get_supabase_client()
+            return await self.response_cache.get(cache_key)
+        except Exception as e:
+            print(f"Error reading response cache: {e}")
+            return None
+
+    async def _cache_reply(self, cache_key: Optional[str], ai_response: str):
+        if not cache_key or not ai_response:
+            return
+        try:
+            await self.response_cache.put(cache_key, ai_response)
+        except Exception as e:
+            print(f"Error writing response cache: {e}")
+
+    async def _remember(self, mode: str, user_id: str, companion: dict, room_id: str, user_message: str, ai_response: str):
+        if not user_id or not ai_response:
+            return
+        with GENERATION_SECONDS.time(mode=mode, stage="persist"):
+            await self.memory_service.store_interaction(
+                user_id=user_id,
+                companion_id=companion["id"],
+                room_id=room_id,
+                user_message=user_message,
+                ai_response=ai_response
+            )
 
-            conversation_history = ""
-
-            if user_id:
-                context_memories = await self.memory_service.get_context(user_id, companion["id"], limit=5)
-                if context_memories:
-                    conversation_history += "Previous conversations:\n"
-                    for memory in context_memories:
-                        conversation_history += f"User: {memory.get('user_message', '')}\n"
-                        conversation_history += f"{companion['name']}: {memory.get('ai_response', '')}\n"
-                    conversation_history += "\n"
-
-            messages_response = supabase.table("messages").select("*").eq("room_id", room_id).order("created_at").limit(10).execute()
-
-            if messages_response.data:
-                conversation_history += "Current session:\n"
-                for msg in messages_response.data:
-                    sender = "User" if msg["sender_type"] == "user" else companion["name"]
-                    conversation_history += f"{sender}: {msg['content']}\n"
-
-            system_prompt = f"""You are {companion['name']}, an AI companion with the following traits:
-Personality: {companion['personality']}
-Description: {companion['description']}
-Specialties: {', '.join(companion['specialties'])}
-
-Previous conversation:
-{conversation_history}
-
-Respond to the user in a natural, engaging way that matches your personality.
-Keep responses concise and conversational (2-3 sentences).
-Be helpful, friendly, and stay in character."""
-
-            prompt = f"{system_prompt}\n\nUser: {user_message}\n{companion['name']}:"
-
-            response = self.model.generate_content(prompt)
-            ai_response = response.text.strip()
-
-            if user_id:
-                await self.memory_service.store_interaction(
-                    user_id=user_id,
-                    companion_id=companion["id"],
-                    room_id=room_id,
-                    user_message=user_message,
-                    ai_response=ai_response
+    async def _build_prompt(
+        self,
+        user_message: str,
+        companion: dict,
+        room_id: str,
+        user_id: str = None,
+        session_messages: List[Dict] = None,
+        mode: str = "generate"
+    ) -> Tuple[str, bool]:
+        """The prompt, and whether it carries anything specific to ``user_id`` (memories or a summary)."""
+        summary, recent = None, []
+        context_memories = []
+        if user_id:
+            with GENERATION_SECONDS.time(mode=mode, stage="memory"):
+                summary, recent = await self.memory_service.get_rolling_summary(user_id, companion["id"])
+                context_memories = await self.memory_service.get_context(
+                    user_id,
+                    companion["id"],
+                    limit=5,
+                    query=user_message,
+                    token_budget=settings.memory_context_token_budget
                 )
 
+        if session_messages is None:
+            supabase = get_supabase_client()
+            with GENERATION_SECONDS.time(mode=mode, stage="db"):
+                messages_response = await run_blocking(
+                    supabase.table("messages").select("sender_type, content, created_at").eq("room_id", room_id)
+                    .order("created_at", desc=True).order("id", desc=True).limit(10).execute
+                )
+            session_messages = list(reversed(messages_response.data or []))
+
+        memories = context_memories
+        if summary:
+            # The summary covers older interactions. Of the ones since, this
+            # room's are already in the session history; add the others
+            # alongside the retrieved memories, once each.
+            seen = {(memory.get("timestamp"), memory.get("user_message")) for memory in context_memories}
+            memories = context_memories + [
+                memory for memory in recent
+                if memory.get("room_id") != room_id and (memory.get("timestamp"), memory.get("user_message")) not in seen
+            ]
+            memories.sort(key=lambda memory: memory.get("timestamp", ""))
+
+        prompt = self.prompt_builder.build(
+            companion,
+            user_message,
+            memories=memories,
+            session_messages=session_messages,
+            summary=summary
+        )
+        return prompt, bool(summary or memories)
+
+    async def _uncached_prompt(self, cache_key, user_message, companion, room_id, user_id, session_messages, mode):
+        """Build the prompt up front when the turn is cacheable, and drop the key if it is personal.
+
+        The cache key only covers the companion and the message, so a reply
+        written from one user's memories or summary must never be cached or
+        answered from the cache. Returns ``(cache_key, prompt)``; ``prompt``
+        is None when it was not needed to decide.
+        """
+        if not cache_key or not user_id:
+            return cache_key, None
+        prompt, personal = await self._build_prompt(user_message, companion, room_id, user_id, session_messages, mode)
+        return (None if personal else cache_key), prompt
+
+    async def generate_response(
+        self,
+        user_message: str,
+        companion: dict,
+        room_id: str,
+        user_id: str = None,
+        session_messages: List[Dict] = None,
+        priority: str = "text"
+    ) -> str:
+        started = time.perf_counter()
+        try:
+            cache_key = self._cache_key(companion, user_message, session_messages)
+            cache_key, prompt = await self._uncached_prompt(
+                cache_key, user_message, companion, room_id, user_id, session_messages, "generate"
+            )
+            ai_response = await self._cached_reply(cache_key)
+
+            if ai_response is None:
+                if prompt is None:
+                    prompt, _ = await self._build_prompt(user_message, companion, room_id, user_id, session_messages)
+
+                async with self._admit(user_id, priority):
+                    with GENERATION_SECONDS.time(mode="generate", stage="llm"):
+                        response = await self.model.generate_content_async(prompt)
+                ai_response = response.text.strip()
+                await self._cache_reply(cache_key, ai_response)
+
+            await self._remember("generate", user_id, companion, room_id, user_message, ai_response)
+
+            GENERATION_SECONDS.observe(time.perf_counter() - started, mode="generate", stage="total")
             return ai_response
 
+        except AdmissionRejected as e:
+            print(f"AI response not generated: {e}")
+            return BUSY_RESPONSE
         except Exception as e:
             print(f"Error generating AI response: {e}")
-            return "I apologize, but I'm having trouble processing that right now. Could you try rephrasing?"
+            return FALLBACK_RESPONSE
 
-    async def generate_voice(self, text: str, voice_id: str) -> bytes:
+    async def stream_response(
+        self,
+        user_message: str,
+        companion: dict,
+        room_id: str,
+        user_id: str = None,
+        session_messages: List[Dict] = None,
+        priority: str = "text"
+    ) -> AsyncIterator[str]:
+        """Yield the companion reply chunk by chunk as Gemini streams it."""
+        chunks = []
+        started = time.perf_counter()
         try:
-            from elevenlabs import generate
-            audio = generate(
-                text=text,
-                voice=voice_id,
-                api_key=settings.elevenlabs_api_key
+            cache_key = self._cache_key(companion, user_message, session_messages)
+            cache_key, prompt = await self._uncached_prompt(
+                cache_key, user_message, companion, room_id, user_id, session_messages, "stream"
             )
-            return audio
+            cached = await self._cached_reply(cache_key)
+            if cached is not None:
+                chunks.append(cached)
+                yield cached
+                await self._remember("stream", user_id, companion, room_id, user_message, cached)
+                GENERATION_SECONDS.observe(time.perf_counter() - started, mode="stream", stage="total")
+                return
+
+            if prompt is None:
+                prompt, _ = await self._build_prompt(user_message, companion, room_id, user_id, session_messages, mode="stream")
+
+            async for text in self._buffered_stream(prompt, user_id, priority):
+                if not chunks:
+                    text = text.lstrip()
+                chunks.append(text)
+                yield text
+
+            ai_response = "".join(chunks).strip()
+            await self._cache_reply(cache_key, ai_response)
+            await self._remember("stream", user_id, companion, room_id, user_message, ai_response)
+
+            GENERATION_SECONDS.observe(time.perf_counter() - started, mode="stream", stage="total")
+
+        except AdmissionRejected as e:
+            print(f"AI response not streamed: {e}")
+            yield BUSY_RESPONSE
+        except Exception as e:
+            print(f"Error streaming AI response: {e}")
+            if not chunks:
+                yield FALLBACK_RESPONSE
+
+    async def _buffered_stream(self, prompt: str, user_id: Optional[str], priority: str) -> AsyncIterator[str]:
+        """Stream the model's reply to ``prompt``, holding the admission slot only while the model produces it.
+
+        A producer task reads the model stream into a queue inside the
+        slot, so the time the caller spends on each chunk (emits, speech
+        backpressure) does not count against the slot. Stopping early
+        cancels the producer and frees the slot.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def produce():
+            try:
+                async with self._admit(user_id, priority):
+                    llm_started = time.perf_counter()
+                    response = await self.model.generate_content_async(prompt, stream=True)
+                    first = True
+                    async for chunk in response:
+                        text = chunk.text
+                        if not text:
+                            continue
+                        if first:
+                            GENERATION_SECONDS.observe(time.perf_counter() - llm_started, mode="stream", stage="first_token")
+                            first = False
+                        queue.put_nowait(text)
+                    GENERATION_SECONDS.observe(time.perf_counter() - llm_started, mode="stream", stage="llm")
+            except Exception as e:
+                queue.put_nowait(e)
+            else:
+                queue.put_nowait(done)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    async def generate_voice(self, text: str, voice_id: str) -> bytes:
+        try:
+            from services.tts_service import get_tts_service
+
+            return await get_tts_service().synthesize(text, voice_id)
         except Exception as e:
             print(f"Error generating voice: {e}")
             return b""
+
+_ai_service: Optional[AIService] = None
+
+def get_ai_service() -> AIService:
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = AIService()
+    return _ai_service
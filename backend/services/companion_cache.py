@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+from config.settings import get_settings
+from services.supabase_client import get_supabase_client
+from services.executor import run_blocking
+
+settings = get_settings()
+
+class CompanionCache:
+    """Read-through cache of the companion catalog.
+
+    The active catalog is loaded in one query and kept for ``ttl_seconds``;
+    single lookups are served from it, falling back to a per-id query for
+    companions outside the active set. ``invalidate()`` is called after
+    ``/sync`` so changes show up immediately on this worker; other workers
+    catch up within ``ttl_seconds`` unless ``RedisCompanionCache`` is used.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._active: Optional[List[Dict]] = None
+        self._by_id: Dict[str, Dict] = {}
+        self._etag: Optional[str] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self) -> bool:
+        return self._active is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    async def _load(self):
+        supabase = get_supabase_client()
+        response = await run_blocking(supabase.table("companions").select("*").eq("is_active", True).execute)
+        companions = response.data or []
+
+        self._active = companions
+        self._by_id = {companion["id"]: companion for companion in companions}
+        self._etag = '"' + hashlib.sha1(json.dumps(companions, sort_keys=True, default=str).encode()).hexdigest() + '"'
+        self._loaded_at = time.monotonic()
+
+    async def _ensure_loaded(self) -> bool:
+        """Load the catalog if stale; returns whether the cache could answer as-is."""
+        await self._check_version()
+        if self._fresh():
+            return True
+        async with self._lock:
+            if self._fresh():
+                return True
+            await self._load()
+            return False
+
+    def _count(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    async def list_active(self) -> List[Dict]:
+        self._count(await self._ensure_loaded())
+        return self._active
+
+    async def etag(self) -> str:
+        await self._ensure_loaded()
+        return self._etag
+
+    async def get(self, companion_id: str) -> Optional[Dict]:
+        hit = await self._ensure_loaded()
+        companion = self._by_id.get(companion_id)
+        if companion is not None:
+            self._count(hit)
+            return companion
+
+        self._count(False)
+
+        supabase = get_supabase_client()
+        response = await run_blocking(supabase.table("companions").select("*").eq("id", companion_id).maybeSingle().execute)
+        if response.data:
+            self._by_id[companion_id] = response.data
+        return response.data
+
+    async def _check_version(self):
+        pass
+
+    def _drop(self):
+        self._active = None
+        self._by_id = {}
+        self._etag = None
+
+    async def invalidate(self):
+        self._drop()
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "companions": len(self._by_id),
+        }
+
+class RedisCompanionCache(CompanionCache):
+    """Companion cache invalidated across workers through a shared version key.
+
+    ``invalidate()`` bumps the version in Redis; every read compares it with
+    the version the local catalog was loaded under and drops the catalog when
+    they differ. If Redis is unreachable the cache falls back to the TTL.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: float, key: str = "companion-cache:version"):
+        import redis.asyncio as redis
+
+        super().__init__(ttl_seconds)
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.key = key
+        self._version: Optional[str] = None
+
+    async def _check_version(self):
+        try:
+            version = await self.redis.get(self.key)
+        except Exception as e:
+            print(f"Error reading companion cache version: {e}")
+            return
+        if version != self._version:
+            self._drop()
+            self._version = version
+
+    async def invalidate(self):
+        self._drop()
+        try:
+            await self.redis.incr(self.key)
+        except Exception as e:
+            print(f"Error publishing companion cache invalidation: {e}")
+
+_companion_cache: Optional[CompanionCache] = None
+
+def get_companion_cache() -> CompanionCache:
+    global _companion_cache
+    if _companion_cache is None:
+        if settings.companion_cache_backend == "redis":
+            _companion_cache = RedisCompanionCache(settings.redis_url, settings.companion_cache_ttl_seconds)
+        else:
+            _companion_cache = CompanionCache(settings.companion_cache_ttl_seconds)
+    return _companion_cache
@@ -0,0 +1,145 @@
+import asyncio
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from config.settings import get_settings
+from services.metrics import get_metrics
+from services.memory_store import InProcessMemoryStore, MemoryStore
+
+settings = get_settings()
+
+SUMMARY_SECONDS = get_metrics().histogram("summary_update_seconds", "Rolling conversation summary update latency")
+
+SUMMARY_PROMPT = """You keep a running summary of a conversation between a user and their AI companion.
+Update the summary with the new exchanges below. Keep what the user has shared about themselves (name, preferences, plans, feelings), open threads and anything the companion promised; drop greetings and small talk.
+Write plain prose in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New exchanges:
+{exchanges}
+
+Updated summary:"""
+
+@dataclass
+class RollingSummary:
+    text: str = ""
+    pending: List[Dict] = field(default_factory=list)
+    summarized: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "RollingSummary":
+        if not data:
+            return cls()
+        return cls(text=data.get("text", ""), pending=list(data.get("pending", [])), summarized=data.get("summarized", 0))
+
+def _identity(interaction: Dict) -> Tuple:
+    return interaction.get("timestamp"), interaction.get("user_message")
+
+class ConversationSummarizer:
+    """Compact rolling summary per user/companion pair, updated off the request path.
+
+    ``record`` adds an interaction to the pair's pending list; once
+    ``every`` interactions are pending, a background task folds them into
+    the summary with one LLM call (``generate(prompt) -> text``). At most
+    one update runs per pair in a worker; interactions recorded meanwhile
+    wait for the next one. ``get`` returns the summary together with the
+    interactions it does not cover yet.
+
+    Every change to a pair's document goes through
+    ``MemoryStore.update_summary``, which is atomic, so interactions
+    recorded by several workers at once are all kept.
+
+    Summaries are kept in ``store`` (the memory store, attached by
+    ``MemoryService``), so they survive restarts and are shared across
+    workers when the store is Redis. Without one, an in-process store
+    keeps at most ``max_keys`` pairs.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], Awaitable[str]],
+        store: MemoryStore = None,
+        every: int = 5,
+        max_words: int = 150,
+        max_keys: int = 10000
+    ):
+        self.generate = generate
+        self.store = store or InProcessMemoryStore(
+            max_items=1,
+            ttl_seconds=settings.memory_ttl_seconds,
+            max_keys=max_keys
+        )
+        self.every = max(every, 1)
+        self.max_words = max_words
+        self._updating: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.updates = 0
+        self.failures = 0
+
+    async def _load(self, key: str) -> RollingSummary:
+        return RollingSummary.from_dict(await self.store.get_summary(key))
+
+    async def record(self, key: str, interaction: Dict):
+        def add(data: Optional[Dict]) -> Dict:
+            entry = RollingSummary.from_dict(data)
+            entry.pending.append(interaction)
+            # If updates keep failing, keep only the newest interactions.
+            del entry.pending[:-self.every * 4]
+            return asdict(entry)
+
+        entry = RollingSummary.from_dict(await self.store.update_summary(key, add))
+        if len(entry.pending) >= self.every and key not in self._updating:
+            self._updating.add(key)
+            task = asyncio.create_task(self._update(key, entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def get(self, key: str) -> Tuple[Optional[str], List[Dict]]:
+        """``(summary, interactions since)``; the summary is None until the first update."""
+        entry = await self._load(key)
+        return entry.text or None, entry.pending
+
+    async def _update(self, key: str, entry: RollingSummary):
+        try:
+            batch = list(entry.pending)
+            exchanges = "\n".join(
+                f"User: {item.get('user_message', '')}\nCompanion: {item.get('ai_response', '')}" for item in batch
+            )
+            prompt = SUMMARY_PROMPT.format(max_words=self.max_words, summary=entry.text or "(none yet)", exchanges=exchanges)
+
+            with SUMMARY_SECONDS.time():
+                text = (await self.generate(prompt)).strip()
+            if not text:
+                raise ValueError("empty summary")
+
+            # Fold against the current document: more interactions may have
+            # been recorded meanwhile, here or on another worker.
+            folded = {_identity(item) for item in batch}
+
+            def fold(data: Optional[Dict]) -> Dict:
+                current = RollingSummary.from_dict(data)
+                current.text = text
+                current.summarized += len(batch)
+                current.pending = [item for item in current.pending if _identity(item) not in folded]
+                return asdict(current)
+
+            await self.store.update_summary(key, fold)
+            self.updates += 1
+        except Exception as e:
+            self.failures += 1
+            print(f"Error updating conversation summary: {e}")
+        finally:
+            self._updating.discard(key)
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "updates": self.updates,
+            "failures": self.failures,
+            "updating": len(self._updating),
+        }
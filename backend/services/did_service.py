@@ -1,35 +1,162 @@
+import asyncio
+import time
 import aiohttp
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from config.settings import get_settings
+from services.metrics import get_metrics
 
 settings = get_settings()
 
+RETRY_STATUSES = {429, 502, 503, 504}
+# A request that failed with one of these never reached D-ID, so it is
+# safe to send again even when repeating it would not be.
+NOT_SENT_STATUSES = {429}
+NOT_SENT_ERRORS = (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+
+REQUEST_SECONDS = get_metrics().histogram(
+    "did_request_seconds",
+    "D-ID API call latency including retries",
+    labels=("operation", "outcome")
+)
+REQUEST_RETRIES = get_metrics().counter("did_request_retries", "D-ID API retries", labels=("operation",))
+
 class DIDService:
-    def __init__(self):
+    def __init__(self, base_url: str = None):
         self.api_key = settings.did_api_key
-        self.base_url = "https://api.d-id.com"
+        self.base_url = base_url or settings.did_api_url
         self.headers = {
             "Authorization": f"Basic {self.api_key}",
             "Content-Type": "application/json"
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+        # stream_id -> {"room_id", "created_at"} for streams this worker
+        # created, so the room sweeper can delete the ones left behind.
+        self.streams: Dict[str, Dict] = {}
+
+    def track_stream(self, stream_id: str, room_id: str = None):
+        entry = self.streams.setdefault(stream_id, {"room_id": None, "created_at": time.monotonic()})
+        if room_id:
+            entry["room_id"] = room_id
+
+    def streams_for_room(self, room_id: str) -> List[str]:
+        return [stream_id for stream_id, entry in self.streams.items() if entry["room_id"] == room_id]
+
+    def stale_streams(self, max_age_seconds: float) -> List[str]:
+        """Streams attached to a room on this worker more than ``max_age_seconds`` ago."""
+        now = time.monotonic()
+        return [
+            stream_id for stream_id, entry in self.streams.items()
+            if entry["room_id"] and now - entry["created_at"] > max_age_seconds
+        ]
+
+    def forget_unattached(self, unattached_seconds: float) -> int:
+        """Stop tracking streams not attached to a room here within ``unattached_seconds``.
+
+        They are not deleted: tracking is per worker, and the stream may
+        have been attached through another worker's ``avatar_stream``, which
+        then owns its cleanup.
+        """
+        now = time.monotonic()
+        forgotten = [
+            stream_id for stream_id, entry in self.streams.items()
+            if not entry["room_id"] and now - entry["created_at"] > unattached_seconds
+        ]
+        for stream_id in forgotten:
+            del self.streams[stream_id]
+        return len(forgotten)
+
+    async def start(self):
+        if self._session and not self._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=settings.did_pool_size,
+            limit_per_host=settings.did_pool_size_per_host,
+            ttl_dns_cache=settings.did_dns_cache_seconds,
+            keepalive_timeout=settings.did_keepalive_seconds
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(
+                total=settings.did_timeout_seconds,
+                connect=settings.did_connect_timeout_seconds
+            )
+        )
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if not self._session or self._session.closed:
+            await self.start()
+        return self._session
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        payload: Dict = None,
+        operation: str = "request",
+        idempotent: bool = True
+    ) -> Tuple[int, Any]:
+        """Send a request, retrying transient failures with exponential backoff.
+
+        Returns the final status code and the decoded body (JSON when the
+        response is JSON, text otherwise). Connection errors and timeouts on
+        the last attempt are raised to the caller. Latency is recorded per
+        ``operation`` in ``did_request_seconds``.
+
+        Requests that must not run twice (``idempotent=False``: creating a
+        stream, speaking text) are only retried when D-ID cannot have
+        processed them: a failed connect or a 429. A timeout or a 5xx may
+        come after D-ID acted on the request, so those are returned/raised.
+        """
+        retry_statuses = RETRY_STATUSES if idempotent else NOT_SENT_STATUSES
+        session = await self._get_session()
+        url = f"{self.base_url}{path}"
+        started = time.perf_counter()
+        outcome = "error"
 
-    async def create_stream(self, presenter_id: str, session_id: str) -> Optional[Dict]:
         try:
-            url = f"{self.base_url}/talks/streams"
+            for attempt in range(settings.did_max_retries + 1):
+                last_attempt = attempt == settings.did_max_retries
+                try:
+                    async with session.request(method, url, json=payload) as response:
+                        if response.content_type == "application/json":
+                            body = await response.json()
+                        else:
+                            body = await response.text()
+
+                        if response.status not in retry_statuses or last_attempt:
+                            outcome = str(response.status)
+                            return response.status, body
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if last_attempt or not (idempotent or isinstance(e, NOT_SENT_ERRORS)):
+                        raise
+
+                REQUEST_RETRIES.inc(operation=operation)
+                await asyncio.sleep(settings.did_retry_backoff_seconds * (2 ** attempt))
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, operation=operation, outcome=outcome)
+
+    async def create_stream(self, presenter_id: str, session_id: str, room_id: str = None) -> Optional[Dict]:
+        try:
             payload = {
                 "source_url": f"https://create-images-results.d-id.com/api-docs/assets/{presenter_id}.jpg",
                 "session_id": session_id
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=self.headers) as response:
-                    if response.status == 201:
-                        data = await response.json()
-                        return data
-                    else:
-                        error_text = await response.text()
-                        print(f"D-ID create stream error: {response.status} - {error_text}")
-                        return None
+            status, body = await self._request("POST", "/talks/streams", payload, operation="create_stream", idempotent=False)
+            if status == 201:
+                if isinstance(body, dict) and body.get("id"):
+                    self.track_stream(body["id"], room_id)
+                return body
+            else:
+                print(f"D-ID create stream error: {status} - {body}")
+                return None
 
         except Exception as e:
             print(f"Error creating D-ID stream: {e}")
@@ -37,20 +164,17 @@ class DIDService:
 
     async def send_answer(self, stream_id: str, answer: Dict) -> bool:
         try:
-            url = f"{self.base_url}/talks/streams/{stream_id}/sdp"
             payload = {
                 "answer": answer,
                 "session_id": stream_id
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=self.headers) as response:
-                    if response.status == 200:
-                        return True
-                    else:
-                        error_text = await response.text()
-                        print(f"D-ID send answer error: {response.status} - {error_text}")
-                        return False
+            status, body = await self._request("POST", f"/talks/streams/{stream_id}/sdp", payload, operation="send_answer")
+            if status == 200:
+                return True
+            else:
+                print(f"D-ID send answer error: {status} - {body}")
+                return False
 
         except Exception as e:
             print(f"Error sending answer to D-ID: {e}")
@@ -58,7 +182,6 @@ class DIDService:
 
     async def send_ice_candidate(self, stream_id: str, candidate: Dict, sdp_mid: str, sdp_m_line_index: int) -> bool:
         try:
-            url = f"{self.base_url}/talks/streams/{stream_id}/ice"
             payload = {
                 "candidate": candidate,
                 "sdpMid": sdp_mid,
@@ -66,22 +189,32 @@ class DIDService:
                 "session_id": stream_id
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=self.headers) as response:
-                    if response.status == 200:
-                        return True
-                    else:
-                        error_text = await response.text()
-                        print(f"D-ID send ICE error: {response.status} - {error_text}")
-                        return False
+            status, body = await self._request("POST", f"/talks/streams/{stream_id}/ice", payload, operation="send_ice_candidate")
+            if status == 200:
+                return True
+            else:
+                print(f"D-ID send ICE error: {status} - {body}")
+                return False
 
         except Exception as e:
             print(f"Error sending ICE candidate to D-ID: {e}")
             return False
 
+    async def send_end_of_candidates(self, stream_id: str) -> bool:
+        try:
+            status, body = await self._request("POST", f"/talks/streams/{stream_id}/ice", {"session_id": stream_id}, operation="send_end_of_candidates")
+            if status == 200:
+                return True
+            else:
+                print(f"D-ID end of candidates error: {status} - {body}")
+                return False
+
+        except Exception as e:
+            print(f"Error sending end of candidates to D-ID: {e}")
+            return False
+
     async def stream_text(self, stream_id: str, text: str, voice_id: str = None) -> bool:
         try:
-            url = f"{self.base_url}/talks/streams/{stream_id}"
             payload = {
                 "script": {
                     "type": "text",
@@ -99,14 +232,12 @@ class DIDService:
                     }
                 }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=self.headers) as response:
-                    if response.status == 200:
-                        return True
-                    else:
-                        error_text = await response.text()
-                        print(f"D-ID stream text error: {response.status} - {error_text}")
-                        return False
+            status, body = await self._request("POST", f"/talks/streams/{stream_id}", payload, operation="stream_text", idempotent=False)
+            if status == 200:
+                return True
+            else:
+                print(f"D-ID stream text error: {status} - {body}")
+                return False
 
         except Exception as e:
             print(f"Error streaming text to D-ID: {e}")
@@ -114,17 +245,23 @@ class DIDService:
 
     async def delete_stream(self, stream_id: str) -> bool:
         try:
-            url = f"{self.base_url}/talks/streams/{stream_id}"
-
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(url, headers=self.headers) as response:
-                    if response.status in [200, 204]:
-                        return True
-                    else:
-                        error_text = await response.text()
-                        print(f"D-ID delete stream error: {response.status} - {error_text}")
-                        return False
+            status, body = await self._request("DELETE", f"/talks/streams/{stream_id}", operation="delete_stream")
+            if status in [200, 204, 404]:
+                self.streams.pop(stream_id, None)
+            if status in [200, 204]:
+                return True
+            else:
+                print(f"D-ID delete stream error: {status} - {body}")
+                return False
 
         except Exception as e:
             print(f"Error deleting D-ID stream: {e}")
             return False
+
+_did_service: Optional[DIDService] = None
+
+def get_did_service() -> DIDService:
+    global _did_service
+    if _did_service is None:
+        _did_service = DIDService()
+    return _did_service
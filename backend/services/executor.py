@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+from config.settings import get_settings
+
+settings = get_settings()
+
+class BlockingExecutor:
+    """Bounded thread pool for SDK calls that have no native async client.
+
+    Supabase ``execute()``, ElevenLabs and ``requests`` all block the calling
+    thread, so running them inline in an ``async def`` handler stalls every
+    socket and request on the worker.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self.submitted - self.started
+
+    @property
+    def active(self) -> int:
+        return self.started - self.completed - self.failed
+
+    def _track(self, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.started += 1
+        try:
+            result = fn()
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        call = partial(fn, *args, **kwargs)
+
+        with self._lock:
+            self.submitted += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+
+        future = self._executor.submit(self._track, call)
+        future.add_done_callback(self._discard_cancelled)
+        # Cancelling the awaiting coroutine cancels the job if it has not started yet.
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _discard_cancelled(self, future):
+        # A job cancelled before a worker picked it up never reaches ``_track``.
+        if future.cancelled():
+            with self._lock:
+                self.submitted -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "active": self.active,
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "saturation": round(self.active / self.max_workers, 3),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+_executor: Optional[BlockingExecutor] = None
+
+def get_executor() -> BlockingExecutor:
+    global _executor
+    if _executor is None:
+        _executor = BlockingExecutor(settings.blocking_pool_size)
+    return _executor
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    return await get_executor().run(fn, *args, **kwargs)
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
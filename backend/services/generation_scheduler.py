@@ -0,0 +1,141 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from config.settings import get_settings
+from services.metrics import get_metrics
+
+settings = get_settings()
+
+GENERATIONS = get_metrics().counter("room_generations", "Companion reply generations by outcome", labels=("outcome",))
+
+Generate = Callable[[List[Any]], Awaitable[Any]]
+Deliver = Callable[[List[Any], Any], Awaitable[None]]
+
+def merge_messages(messages: List[str]) -> str:
+    return "\n".join(message.strip() for message in messages if message.strip())
+
+@dataclass
+class RoomGeneration:
+    pending: List[Any] = field(default_factory=list)
+    generate: Optional[Generate] = None
+    deliver: Optional[Deliver] = None
+    runner: Optional[asyncio.Task] = None
+    generation: Optional[asyncio.Task] = None
+    stale: bool = False
+
+class GenerationScheduler:
+    """One companion reply at a time per room, for bursts of user messages.
+
+    ``submit`` queues a user message. The room's runner waits until no new
+    message has arrived for ``debounce_seconds``, then generates a single
+    reply to all queued messages merged into one prompt. A message that
+    arrives while that generation is still running makes it stale: it is
+    cancelled and its messages are merged with the new ones. Once a reply
+    is complete, ``deliver`` runs without being cancelled, so replies go
+    out one at a time and in order.
+
+    ``generate(messages)`` returns the reply to the whole batch (see
+    ``merge_messages``); ``deliver(messages, reply)`` publishes and stores
+    it. When generation fails, ``deliver(messages, None)`` still runs so
+    the messages are recorded. Both come from the latest ``submit``.
+    """
+
+    def __init__(self, debounce_seconds: float):
+        self.debounce_seconds = debounce_seconds
+        self._rooms: Dict[str, RoomGeneration] = {}
+        self.submitted = 0
+        self.generations = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    async def submit(self, room_id: str, message: Any, generate: Generate, deliver: Deliver):
+        self.submitted += 1
+        state = self._rooms.setdefault(room_id, RoomGeneration())
+        state.pending.append(message)
+        state.generate = generate
+        state.deliver = deliver
+
+        if state.generation is not None and not state.generation.done():
+            state.stale = True
+            state.generation.cancel()
+
+        if state.runner is None or state.runner.done():
+            state.runner = asyncio.create_task(self._run(room_id, state))
+
+    async def _debounce(self, state: RoomGeneration):
+        while True:
+            count = len(state.pending)
+            await asyncio.sleep(self.debounce_seconds)
+            if len(state.pending) == count:
+                return
+
+    async def _run(self, room_id: str, state: RoomGeneration):
+        try:
+            while state.pending:
+                await self._debounce(state)
+                batch = state.pending[:]
+                del state.pending[:len(batch)]
+
+                state.stale = False
+                state.generation = asyncio.create_task(state.generate(batch))
+                try:
+                    reply = await state.generation
+                except asyncio.CancelledError:
+                    if not state.stale:
+                        raise
+                    # A newer message made this reply stale; answer everything together.
+                    self.cancelled += 1
+                    GENERATIONS.inc(outcome="cancelled")
+                    state.pending[:0] = batch
+                    continue
+                except Exception as e:
+                    self.failed += 1
+                    GENERATIONS.inc(outcome="failed")
+                    print(f"Error generating reply for room {room_id}: {e}")
+                    reply = None
+                finally:
+                    state.generation = None
+
+                if reply is not None:
+                    self.generations += 1
+                    GENERATIONS.inc(outcome="delivered")
+                try:
+                    await state.deliver(batch, reply)
+                except Exception as e:
+                    print(f"Error delivering reply for room {room_id}: {e}")
+        finally:
+            if self._rooms.get(room_id) is state and not state.pending:
+                del self._rooms[room_id]
+
+    async def cancel(self, room_id: str):
+        """Drop a room's queued messages and any reply still being generated."""
+        state = self._rooms.pop(room_id, None)
+        if state is None:
+            return
+        state.pending.clear()
+        if state.runner is not None:
+            state.runner.cancel()
+        if state.generation is not None:
+            state.generation.cancel()
+        await asyncio.gather(*(task for task in (state.runner, state.generation) if task), return_exceptions=True)
+
+    async def close(self):
+        for room_id in list(self._rooms):
+            await self.cancel(room_id)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "rooms": len(self._rooms),
+            "submitted": self.submitted,
+            "generations": self.generations,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+        }
+
+_generation_scheduler: Optional[GenerationScheduler] = None
+
+def get_generation_scheduler() -> GenerationScheduler:
+    global _generation_scheduler
+    if _generation_scheduler is None:
+        _generation_scheduler = GenerationScheduler(debounce_seconds=settings.chat_debounce_ms / 1000)
+    return _generation_scheduler
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from config.settings import get_settings
+from services.did_service import DIDService, get_did_service
+
+settings = get_settings()
+
+@dataclass
+class PendingCandidate:
+    candidate: Dict
+    sdp_mid: str
+    sdp_m_line_index: int
+    future: asyncio.Future
+
+@dataclass
+class StreamBuffer:
+    pending: List[PendingCandidate] = field(default_factory=list)
+    sent: Set[str] = field(default_factory=set)
+    end_of_candidates: bool = False
+    flush_handle: Optional[asyncio.TimerHandle] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_seen: float = field(default_factory=time.monotonic)
+
+    @property
+    def idle(self) -> bool:
+        return not self.pending and self.flush_handle is None and not self.lock.locked()
+
+class IceCandidateForwarder:
+    """Forwards trickled ICE candidates to D-ID, deduplicated and with bounded concurrency.
+
+    D-ID's ``/ice`` endpoint takes one candidate per request, so nothing is
+    batched towards D-ID. What this saves is duplicates and bursts: the
+    candidates a client sends for a stream (one by one or through the batch
+    route) are gathered for ``window_seconds`` (or until end-of-candidates),
+    then forwarded in arrival order with at most ``max_concurrency``
+    requests in flight. Candidates already sent on a stream are
+    acknowledged without another D-ID call.
+
+    A stream's state is dropped on end-of-candidates or ``forget``, and
+    otherwise once it has been idle for ``ttl_seconds`` or is the least
+    recently used beyond ``max_streams``, so clients that never finish
+    trickling do not leak it.
+    """
+
+    def __init__(
+        self,
+        did_service: DIDService,
+        window_seconds: float,
+        max_concurrency: int,
+        ttl_seconds: float = 600.0,
+        max_streams: int = 10000
+    ):
+        self.did_service = did_service
+        self.window_seconds = window_seconds
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.ttl_seconds = ttl_seconds
+        self.max_streams = max_streams
+        self.streams: "OrderedDict[str, StreamBuffer]" = OrderedDict()
+        self._flushes: Set[asyncio.Task] = set()
+        self.received = 0
+        self.forwarded = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self.expired = 0
+
+    def _buffer(self, stream_id: str) -> StreamBuffer:
+        buffer = self.streams.get(stream_id)
+        if buffer is None:
+            buffer = self.streams[stream_id] = StreamBuffer()
+            self._expire()
+        self.streams.move_to_end(stream_id)
+        buffer.last_seen = time.monotonic()
+        return buffer
+
+    def _expire(self):
+        # Oldest activity first; stop at the first stream still in use.
+        now = time.monotonic()
+        while self.streams:
+            stream_id, buffer = next(iter(self.streams.items()))
+            if not buffer.idle:
+                break
+            if now - buffer.last_seen <= self.ttl_seconds and len(self.streams) <= self.max_streams:
+                break
+            del self.streams[stream_id]
+            self.expired += 1
+
+    async def submit(
+        self,
+        stream_id: str,
+        candidates: List[Dict],
+        end_of_candidates: bool = False
+    ) -> List[bool]:
+        """Queue candidates for ``stream_id`` and wait for their per-candidate results."""
+        loop = asyncio.get_running_loop()
+        buffer = self._buffer(stream_id)
+
+        futures = []
+        for item in candidates:
+            future = loop.create_future()
+            buffer.pending.append(PendingCandidate(
+                candidate=item["candidate"],
+                sdp_mid=item["sdp_mid"],
+                sdp_m_line_index=item["sdp_m_line_index"],
+                future=future
+            ))
+            futures.append(future)
+        self.received += len(candidates)
+
+        if end_of_candidates:
+            buffer.end_of_candidates = True
+            self._schedule_flush(stream_id, buffer, 0)
+        elif buffer.flush_handle is None:
+            self._schedule_flush(stream_id, buffer, self.window_seconds)
+
+        return list(await asyncio.gather(*futures))
+
+    def _schedule_flush(self, stream_id: str, buffer: StreamBuffer, delay: float):
+        if buffer.flush_handle is not None:
+            buffer.flush_handle.cancel()
+        loop = asyncio.get_running_loop()
+        buffer.flush_handle = loop.call_later(delay, self._start_flush, stream_id, buffer)
+
+    def _start_flush(self, stream_id: str, buffer: StreamBuffer):
+        # Keep a reference so the task is not garbage collected mid-flush and close() can cancel it.
+        task = asyncio.create_task(self._flush(stream_id, buffer))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, stream_id: str, buffer: StreamBuffer):
+        buffer.flush_handle = None
+        batch, buffer.pending = buffer.pending, []
+        end_of_candidates = buffer.end_of_candidates
+
+        try:
+            await self._send(stream_id, buffer, batch, end_of_candidates)
+        except asyncio.CancelledError:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_result(False)
+            raise
+
+    async def _send(self, stream_id: str, buffer: StreamBuffer, batch: List[PendingCandidate], end_of_candidates: bool):
+        # Batches for one stream go out strictly one after another.
+        async with buffer.lock:
+            if batch:
+                self.batches += 1
+                unique: Dict[str, PendingCandidate] = {}
+                for item in batch:
+                    key = self._candidate_key(item)
+                    if key in buffer.sent or key in unique:
+                        self.deduplicated += 1
+                    else:
+                        unique[key] = item
+
+                results = await asyncio.gather(*(self._forward(stream_id, item) for item in unique.values()))
+                outcome = dict(zip(unique.keys(), results))
+                buffer.sent.update(key for key, success in outcome.items() if success)
+
+                for item in batch:
+                    key = self._candidate_key(item)
+                    if not item.future.done():
+                        item.future.set_result(outcome.get(key, key in buffer.sent))
+
+            if end_of_candidates and not buffer.pending:
+                await self.did_service.send_end_of_candidates(stream_id)
+                if self.streams.get(stream_id) is buffer:
+                    del self.streams[stream_id]
+
+    @staticmethod
+    def _candidate_key(item: PendingCandidate) -> str:
+        return f"{item.sdp_mid}:{item.sdp_m_line_index}:{item.candidate.get('candidate', item.candidate)}"
+
+    async def _forward(self, stream_id: str, item: PendingCandidate) -> bool:
+        async with self.semaphore:
+            success = await self.did_service.send_ice_candidate(
+                stream_id, item.candidate, item.sdp_mid, item.sdp_m_line_index
+            )
+
+        if success:
+            self.forwarded += 1
+        return success
+
+    def forget(self, stream_id: str):
+        buffer = self.streams.pop(stream_id, None)
+        if buffer and buffer.flush_handle is not None:
+            buffer.flush_handle.cancel()
+        if buffer:
+            for item in buffer.pending:
+                if not item.future.done():
+                    item.future.set_result(False)
+
+    async def close(self):
+        """Cancel scheduled and in-flight flushes; their candidates resolve as not sent."""
+        for stream_id in list(self.streams):
+            self.forget(stream_id)
+        for task in list(self._flushes):
+            task.cancel()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "streams": len(self.streams),
+            "received": self.received,
+            "forwarded": self.forwarded,
+            "deduplicated": self.deduplicated,
+            "batches": self.batches,
+            "expired": self.expired,
+        }
+
+_forwarder: Optional[IceCandidateForwarder] = None
+
+def get_ice_forwarder() -> IceCandidateForwarder:
+    global _forwarder
+    if _forwarder is None:
+        _forwarder = IceCandidateForwarder(
+            get_did_service(),
+            window_seconds=settings.ice_batch_window_ms / 1000,
+            max_concurrency=settings.ice_forward_concurrency,
+            ttl_seconds=settings.ice_stream_ttl_seconds,
+            max_streams=settings.ice_max_streams
+        )
+    return _forwarder
@@ -0,0 +1,371 @@
+import asyncio
+import heapq
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+from config.settings import get_settings
+from services.metrics import get_metrics
+
+settings = get_settings()
+
+# Lower runs first: an active voice call is waiting on the avatar to speak,
+# a text chat can wait a little, summaries can wait the longest.
+PRIORITIES = {"voice": 0, "text": 1, "background": 2}
+
+QUEUE_WAIT_SECONDS = get_metrics().histogram(
+    "llm_queue_wait_seconds",
+    "Time LLM calls waited for admission",
+    labels=("priority",)
+)
+ADMISSIONS = get_metrics().counter("llm_admissions", "LLM admission decisions", labels=("priority", "outcome"))
+
+class AdmissionRejected(Exception):
+    """An LLM call was turned away; ``reason`` is rate_limited, queue_full or deadline."""
+
+    def __init__(self, reason: str, retry_after: float = 0.0):
+        super().__init__(f"LLM call rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class TokenBuckets:
+    """Per-user token buckets of LLM calls, for a single worker.
+
+    Each user may make ``burst`` calls at once and ``rate`` calls per
+    second after that. Least recently seen users are dropped beyond
+    ``max_keys``; a dropped user simply starts again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def take(self, user_id: str) -> float:
+        """Take one token; returns 0 on success, otherwise seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = [float(self.burst), now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(user_id)
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / self.rate
+
+    async def close(self):
+        self._buckets.clear()
+
+@dataclass(order=True)
+class Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+
+class LLMAdmission:
+    """Admission control for LLM calls: a global concurrency cap, per-user rate limits and a priority queue.
+
+    ``slot(user_id, priority)`` wraps one call. A user over their token
+    bucket is rejected straight away. Otherwise the call runs if fewer than
+    ``max_concurrent`` calls are in flight, or waits in a queue ordered by
+    priority (see ``PRIORITIES``) and then arrival. A waiter still queued
+    after ``queue_timeout`` seconds is rejected, and so is a new call when
+    ``max_queue`` calls are already waiting or the expected wait (queue
+    position times the recent average call duration) would exceed the
+    deadline anyway, so callers fail fast instead of timing out together.
+
+    Calls without a ``user_id`` (summaries) skip the rate limit.
+    """
+
+    # Re-check for a free slot this often even without a local release
+    # (None: only on release); the Redis variant sets this.
+    poll_seconds: Optional[float] = None
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        buckets: TokenBuckets = None
+    ):
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.buckets = buckets
+        self.active = 0
+        self._queue: List[Waiter] = []
+        self._waiting = 0
+        self._seq = itertools.count()
+        self._released = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._hold_seconds = 0.0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"rate_limited": 0, "queue_full": 0, "deadline": 0}
+
+    async def _take_slot(self) -> Optional[Any]:
+        if self.active >= self.max_concurrent:
+            return None
+        self.active += 1
+        return True
+
+    async def _give_slot(self, lease: Any):
+        self.active -= 1
+
+    def _reject(self, priority: str, reason: str, retry_after: float = 0.0):
+        self.rejected[reason] += 1
+        ADMISSIONS.inc(priority=priority, outcome=reason)
+        raise AdmissionRejected(reason, retry_after)
+
+    def _expected_wait(self, rank: int) -> float:
+        ahead = sum(1 for waiter in self._queue if waiter.priority <= rank and not waiter.future.done())
+        return (ahead + 1) / self.max_concurrent * self._hold_seconds
+
+    async def acquire(self, user_id: Optional[str], priority: str = "text") -> Any:
+        """Wait for a slot; returns a lease for ``release`` or raises ``AdmissionRejected``."""
+        rank = PRIORITIES[priority]
+        started = time.monotonic()
+
+        if user_id and self.buckets is not None:
+            retry_after = await self.buckets.take(user_id)
+            if retry_after > 0:
+                self._reject(priority, "rate_limited", retry_after)
+
+        if not self._waiting:
+            lease = await self._take_slot()
+            if lease is not None:
+                return self._admit(priority, started, lease)
+
+        if self._waiting >= self.max_queue:
+            self._reject(priority, "queue_full", self.queue_timeout)
+        if self._expected_wait(rank) > self.queue_timeout:
+            self._reject(priority, "deadline", self._expected_wait(rank))
+
+        waiter = Waiter(rank, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, waiter)
+        self._waiting += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        try:
+            await asyncio.wait({waiter.future}, timeout=max(self.queue_timeout - (time.monotonic() - started), 0))
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                await self.release(waiter.future.result())
+            else:
+                self._abandon(waiter)
+            raise
+
+        if not waiter.future.done():
+            self._abandon(waiter)
+            self._reject(priority, "deadline", self._hold_seconds)
+        return self._admit(priority, started, waiter.future.result())
+
+    def _admit(self, priority: str, started: float, lease: Any) -> Any:
+        self.admitted += 1
+        QUEUE_WAIT_SECONDS.observe(time.monotonic() - started, priority=priority)
+        ADMISSIONS.inc(priority=priority, outcome="admitted")
+        return lease
+
+    def _abandon(self, waiter: Waiter):
+        # Left in the heap and skipped by the dispatcher.
+        waiter.future.cancel()
+        self._waiting -= 1
+
+    def _next_waiter(self) -> Optional[Waiter]:
+        while self._queue and self._queue[0].future.done():
+            heapq.heappop(self._queue)
+        return self._queue[0] if self._queue else None
+
+    async def _dispatch(self):
+        while self._next_waiter() is not None:
+            self._released.clear()
+            lease = await self._take_slot()
+            if lease is None:
+                try:
+                    await asyncio.wait_for(self._released.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # The head may have given up while the slot was being taken.
+            waiter = self._next_waiter()
+            if waiter is None:
+                await self._give_slot(lease)
+                return
+            heapq.heappop(self._queue)
+            self._waiting -= 1
+            waiter.future.set_result(lease)
+
+    async def release(self, lease: Any, held_seconds: float = None):
+        if held_seconds is not None:
+            self._hold_seconds = held_seconds if not self._hold_seconds else 0.8 * self._hold_seconds + 0.2 * held_seconds
+        await self._give_slot(lease)
+        self._released.set()
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str], priority: str = "text") -> AsyncIterator[None]:
+        lease = await self.acquire(user_id, priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            await self.release(lease, time.monotonic() - started)
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        for waiter in self._queue:
+            waiter.future.cancel()
+        self._queue.clear()
+        self._waiting = 0
+        if self.buckets is not None:
+            await self.buckets.close()
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "waiting": self._waiting,
+            "admitted": self.admitted,
+            **{f"rejected_{reason}": count for reason, count in self.rejected.items()},
+            "avg_call_ms": round(self._hold_seconds * 1000, 2),
+        }
+
+TAKE_TOKEN = """
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens, updated = tonumber(bucket[1]), tonumber(bucket[2])
+if tokens == nil then
+  tokens, updated = burst, now
+end
+tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry_after)
+"""
+
+TAKE_LEASE = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+  redis.call('ZADD', KEYS[1], ARGV[3], ARGV[4])
+  return 1
+end
+return 0
+"""
+
+class RedisTokenBuckets(TokenBuckets):
+    """Per-user token buckets shared by every worker through Redis.
+
+    Each bucket is a hash updated by a Lua script, so concurrent calls from
+    several workers never overdraw it; it expires once it would be full
+    again.
+    """
+
+    def __init__(self, redis, rate: float, burst: int, prefix: str = "llm:bucket:"):
+        super().__init__(rate, burst)
+        self.redis = redis
+        self.prefix = prefix
+        self._take = redis.register_script(TAKE_TOKEN)
+
+    async def take(self, user_id: str) -> float:
+        return float(await self._take(keys=[self.prefix + user_id], args=[self.rate, self.burst, time.time()]))
+
+    async def close(self):
+        pass
+
+class RedisLLMAdmission(LLMAdmission):
+    """Admission control whose concurrency cap and rate limits hold across every worker.
+
+    In-flight calls are leases in a Redis sorted set scored by expiry;
+    a Lua script drops expired leases and adds a new one only while fewer
+    than ``max_concurrent`` remain. A worker that dies mid-call frees its
+    leases after ``lease_seconds``. Each worker keeps its own priority
+    queue and polls for a free lease every ``poll_seconds`` (and whenever
+    one of its own calls finishes), so priority is strict within a worker
+    and approximate across workers.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        user_rate: float,
+        user_burst: int,
+        lease_seconds: float = 120.0,
+        poll_seconds: float = 0.05,
+        prefix: str = "llm:"
+    ):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        super().__init__(
+            max_concurrent,
+            max_queue,
+            queue_timeout,
+            buckets=RedisTokenBuckets(self.redis, user_rate, user_burst, prefix=f"{prefix}bucket:")
+        )
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.leases_key = f"{prefix}leases"
+        self._take_lease = self.redis.register_script(TAKE_LEASE)
+
+    async def _take_slot(self) -> Optional[str]:
+        lease = uuid.uuid4().hex
+        now = time.time()
+        if await self._take_lease(keys=[self.leases_key], args=[now, self.max_concurrent, now + self.lease_seconds, lease]):
+            self.active += 1
+            return lease
+        return None
+
+    async def _give_slot(self, lease: str):
+        self.active -= 1
+        await self.redis.zrem(self.leases_key, lease)
+
+    async def close(self):
+        await super().close()
+        await self.redis.aclose()
+
+_llm_admission: Optional[LLMAdmission] = None
+
+def get_llm_admission() -> Optional[LLMAdmission]:
+    """The configured admission controller, or None when ``LLM_ADMISSION_ENABLED`` is off."""
+    global _llm_admission
+    if _llm_admission is None and settings.llm_admission_enabled:
+        user_rate = settings.llm_user_rate_per_minute / 60
+        if settings.llm_admission_backend == "redis":
+            _llm_admission = RedisLLMAdmission(
+                settings.redis_url,
+                max_concurrent=settings.llm_max_concurrent,
+                max_queue=settings.llm_max_queue,
+                queue_timeout=settings.llm_queue_timeout_seconds,
+                user_rate=user_rate,
+                user_burst=settings.llm_user_burst,
+                lease_seconds=settings.llm_lease_seconds
+            )
+        else:
+            _llm_admission = LLMAdmission(
+                max_concurrent=settings.llm_max_concurrent,
+                max_queue=settings.llm_max_queue,
+                queue_timeout=settings.llm_queue_timeout_seconds,
+                buckets=TokenBuckets(user_rate, settings.llm_user_burst, max_keys=settings.memory_max_keys)
+            )
+    return _llm_admission
@@ -0,0 +1,202 @@
+import os
+import struct
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+EBML = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+CLUSTER = 0x1F43B675
+CLUSTER_TIMECODE = 0xE7
+SIMPLE_BLOCK = 0xA3
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+
+CLUSTER_ID_BYTES = CLUSTER.to_bytes(4, "big")
+TAIL_SCAN_BYTES = 4 * 1024 * 1024
+MAX_HEADER_ELEMENT = 1024 * 1024
+
+class MediaProbeError(ValueError):
+    pass
+
+def _vint_length(first_byte: int) -> int:
+    for length in range(1, 9):
+        if first_byte & (0x80 >> (length - 1)):
+            return length
+    raise MediaProbeError("Invalid EBML variable-length integer")
+
+def _read_vint(buf: bytes, pos: int, keep_marker: bool) -> Tuple[int, int, bool]:
+    """Decode a VINT at ``buf[pos]``; returns ``(value, new_pos, is_unknown_size)``."""
+    if pos >= len(buf):
+        raise MediaProbeError("Truncated EBML data")
+    length = _vint_length(buf[pos])
+    if pos + length > len(buf):
+        raise MediaProbeError("Truncated EBML data")
+    value = int.from_bytes(buf[pos:pos + length], "big")
+    if keep_marker:
+        return value, pos + length, False
+    value &= (1 << (7 * length)) - 1
+    return value, pos + length, value == (1 << (7 * length)) - 1
+
+def _read_header(buf: bytes, pos: int) -> Tuple[int, int, Optional[int]]:
+    """Read an element header; returns ``(id, data_pos, size)`` with ``size=None`` when unknown."""
+    element_id, pos, _ = _read_vint(buf, pos, keep_marker=True)
+    size, pos, unknown = _read_vint(buf, pos, keep_marker=False)
+    return element_id, pos, None if unknown else size
+
+def _read_stream_header(f: BinaryIO) -> Optional[Tuple[int, Optional[int]]]:
+    head = f.read(12)
+    if not head:
+        return None
+    element_id, data_pos, size = _read_header(head, 0)
+    f.seek(data_pos - len(head), os.SEEK_CUR)
+    return element_id, size
+
+def _children(buf: bytes, start: int = 0, end: int = None) -> Iterator[Tuple[int, int, int]]:
+    end = len(buf) if end is None else end
+    pos = start
+    while pos < end:
+        element_id, data_pos, size = _read_header(buf, pos)
+        if size is None:
+            size = end - data_pos
+        yield element_id, data_pos, size
+        pos = data_pos + size
+
+def _uint(data: bytes) -> int:
+    return int.from_bytes(data, "big")
+
+def _float(data: bytes) -> float:
+    if len(data) == 4:
+        return struct.unpack(">f", data)[0]
+    if len(data) == 8:
+        return struct.unpack(">d", data)[0]
+    return 0.0
+
+def _parse_info(buf: bytes, result: Dict):
+    for element_id, pos, size in _children(buf):
+        data = buf[pos:pos + size]
+        if element_id == TIMECODE_SCALE:
+            result["timecode_scale"] = _uint(data)
+        elif element_id == DURATION:
+            result["duration_ticks"] = _float(data)
+
+def _parse_tracks(buf: bytes, result: Dict):
+    for element_id, pos, size in _children(buf):
+        if element_id != TRACK_ENTRY:
+            continue
+        track = {}
+        for child_id, child_pos, child_size in _children(buf, pos, pos + size):
+            data = buf[child_pos:child_pos + child_size]
+            if child_id == TRACK_TYPE:
+                track["type"] = _uint(data)
+            elif child_id == CODEC_ID:
+                track["codec"] = data.decode("ascii", "replace").rstrip("\x00")
+            elif child_id == VIDEO:
+                for video_id, video_pos, video_size in _children(buf, child_pos, child_pos + child_size):
+                    value = _uint(buf[video_pos:video_pos + video_size])
+                    if video_id == PIXEL_WIDTH:
+                        track["width"] = value
+                    elif video_id == PIXEL_HEIGHT:
+                        track["height"] = value
+
+        if track.get("type") == 1 and "video_codec" not in result:
+            result["video_codec"] = track.get("codec")
+            result["width"] = track.get("width")
+            result["height"] = track.get("height")
+        elif track.get("type") == 2 and "audio_codec" not in result:
+            result["audio_codec"] = track.get("codec")
+
+def _block_timecode(buf: bytes, pos: int) -> int:
+    _, pos, _ = _read_vint(buf, pos, keep_marker=False)
+    return struct.unpack(">h", buf[pos:pos + 2])[0]
+
+def _last_cluster_end(tail: bytes) -> Optional[int]:
+    """Latest block timestamp (in ticks) found in the last parseable cluster of ``tail``."""
+    search_end = len(tail)
+    while True:
+        start = tail.rfind(CLUSTER_ID_BYTES, 0, search_end)
+        if start < 0:
+            return None
+        search_end = start
+        cluster_timecode = None
+        latest = 0
+
+        try:
+            _, data_pos, size = _read_header(tail, start)
+            end = len(tail) if size is None else min(data_pos + size, len(tail))
+            for element_id, pos, child_size in _children(tail, data_pos, end):
+                if element_id == CLUSTER_TIMECODE:
+                    cluster_timecode = _uint(tail[pos:pos + child_size])
+                elif element_id == SIMPLE_BLOCK and pos + 3 <= len(tail):
+                    latest = max(latest, _block_timecode(tail, pos))
+                elif element_id == BLOCK_GROUP:
+                    for group_id, group_pos, _ in _children(tail, pos, min(pos + child_size, end)):
+                        if group_id == BLOCK:
+                            latest = max(latest, _block_timecode(tail, group_pos))
+                elif element_id == CLUSTER:
+                    break
+        except (MediaProbeError, struct.error):
+            # A truncated final element still leaves what was parsed so far usable.
+            pass
+
+        if cluster_timecode is not None:
+            return cluster_timecode + latest
+
+def probe_media(path: str) -> Dict:
+    """Read duration and track metadata from a WebM/Matroska file.
+
+    Only the element headers up to the first Cluster and, when the muxer did
+    not write a Duration (MediaRecorder output usually has none), the last
+    few MiB of the file are read; media payload is skipped by seeking.
+    """
+    result: Dict = {"timecode_scale": 1_000_000}
+
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+
+        header = _read_stream_header(f)
+        if not header or header[0] != EBML:
+            raise MediaProbeError("Not a WebM/Matroska file")
+        f.seek(header[1], os.SEEK_CUR)
+
+        header = _read_stream_header(f)
+        if not header or header[0] != SEGMENT:
+            raise MediaProbeError("Missing Segment element")
+        segment_end = file_size if header[1] is None else min(f.tell() + header[1], file_size)
+
+        while f.tell() < segment_end:
+            header = _read_stream_header(f)
+            if not header:
+                break
+            element_id, size = header
+            if element_id == CLUSTER or size is None:
+                break
+            if element_id in (INFO, TRACKS) and size <= MAX_HEADER_ELEMENT:
+                data = f.read(size)
+                if element_id == INFO:
+                    _parse_info(data, result)
+                else:
+                    _parse_tracks(data, result)
+            else:
+                f.seek(size, os.SEEK_CUR)
+
+        duration_ticks = result.pop("duration_ticks", None)
+        if not duration_ticks:
+            f.seek(max(file_size - TAIL_SCAN_BYTES, 0))
+            duration_ticks = _last_cluster_end(f.read(TAIL_SCAN_BYTES))
+
+    scale = result.pop("timecode_scale")
+    duration = (duration_ticks or 0) * scale / 1e9
+
+    result["duration_seconds"] = round(duration, 3)
+    result["file_size_bytes"] = file_size
+    result["thumbnail_time_seconds"] = round(min(1.0, duration / 2), 3)
+    return result
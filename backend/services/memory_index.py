@@ -0,0 +1,113 @@
+import re
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by do for from have how i i'm in is it it's me my of on or so "
+    "that the this to was we what with you your".split()
+)
+
+def embed_text(text: str, dim: int) -> np.ndarray:
+    """Hashing-trick embedding over word unigrams and bigrams, L2-normalised.
+
+    Runs on the CPU with no model download; good enough to rank memories by
+    topical overlap with the current message.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    for feature in features:
+        h = zlib.crc32(feature.encode())
+        vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+class VectorIndex:
+    """Brute-force cosine index for one user/companion pair.
+
+    Vectors live in one contiguous matrix that grows by doubling up to
+    ``max_items``; once full, new inserts overwrite the oldest slot.
+    """
+
+    def __init__(self, dim: int, max_items: int, initial_capacity: int = 64):
+        self.dim = dim
+        self.max_items = max_items
+        self.vectors = np.zeros((min(initial_capacity, max_items), dim), dtype=np.float32)
+        self.entries: List[Optional[Dict]] = [None] * len(self.vectors)
+        self.count = 0
+        self.inserted = 0
+
+    def insert(self, vector: np.ndarray, entry: Dict):
+        if self.count < self.max_items and self.count == len(self.vectors):
+            capacity = min(len(self.vectors) * 2, self.max_items)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:self.count] = self.vectors[:self.count]
+            self.vectors = grown
+            self.entries.extend([None] * (capacity - self.count))
+
+        slot = self.inserted % self.max_items
+        self.vectors[slot] = vector
+        self.entries[slot] = entry
+        self.count = min(self.count + 1, self.max_items)
+        self.inserted += 1
+
+    @property
+    def newest(self) -> Optional[Dict]:
+        return self.entries[(self.inserted - 1) % self.max_items] if self.count else None
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[float, Dict]]:
+        if not self.count or k <= 0:
+            return []
+
+        scores = self.vectors[:self.count] @ vector
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.entries[i]) for i in top]
+
+class MemoryIndex:
+    """Per-key vector indexes, with least recently used keys evicted past ``max_keys``."""
+
+    def __init__(self, dim: int, max_items: int, max_keys: int):
+        self.dim = dim
+        self.max_items = max_items
+        self.max_keys = max_keys
+        self._indexes: "OrderedDict[str, VectorIndex]" = OrderedDict()
+
+    def _text(self, entry: Dict) -> str:
+        return f"{entry.get('user_message', '')} {entry.get('ai_response', '')}"
+
+    def add(self, key: str, entry: Dict):
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = VectorIndex(self.dim, self.max_items)
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > self.max_keys:
+            self._indexes.popitem(last=False)
+
+        index.insert(embed_text(self._text(entry), self.dim), entry)
+
+    def search(self, key: str, query: str, k: int) -> List[Tuple[float, Dict]]:
+        index = self._indexes.get(key)
+        if index is None:
+            return []
+        self._indexes.move_to_end(key)
+        return index.search(embed_text(query, self.dim), k)
+
+    def size(self, key: str) -> int:
+        index = self._indexes.get(key)
+        return index.count if index else 0
+
+    def newest(self, key: str) -> Optional[Dict]:
+        index = self._indexes.get(key)
+        return index.newest if index else None
+
+    def clear(self, key: str):
+        self._indexes.pop(key, None)
@@ -1,17 +1,61 @@
-from typing import List, Dict, Optional
+import importlib.util
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from config.settings import get_settings
+from services.memory_store import MemoryStore, InProcessMemoryStore, RedisMemoryStore
+from services.memory_index import MemoryIndex
+from services.conversation_summarizer import ConversationSummarizer
+from utils.tokens import estimate_tokens
+
+settings = get_settings()
+
+def create_memory_store(backend: str) -> MemoryStore:
+    if backend == "redis":
+        return RedisMemoryStore(
+            settings.redis_url,
+            max_items=settings.memory_max_items,
+            ttl_seconds=settings.memory_ttl_seconds
+        )
+    return InProcessMemoryStore(
+        max_items=settings.memory_max_items,
+        ttl_seconds=settings.memory_ttl_seconds,
+        max_keys=settings.memory_max_keys
+    )
 
 class MemoryService:
-    def __init__(self):
+    def __init__(self, store: MemoryStore = None, summarizer: ConversationSummarizer = None):
+        self.summarizer = summarizer
         self.langmem_available = False
-        try:
-            import langmem
-            self.langmem = langmem
-            self.langmem_available = True
-            print("LangMem initialized successfully")
-        except ImportError:
-            print("LangMem not available, using fallback memory system")
-            self.memory_store: Dict[str, List[Dict]] = {}
+        backend = settings.memory_backend
+
+        if store is None and backend in ("auto", "langmem"):
+            # Only check that LangMem is installed; importing it pulls in
+            # LangChain and is deferred until the first memory operation.
+            if importlib.util.find_spec("langmem") is not None:
+                self.langmem_available = True
+                print("LangMem available")
+            else:
+                print("LangMem not available, using fallback memory system")
+
+        if not self.langmem_available:
+            self.memory_store = store or create_memory_store(backend)
+            # Rolling summaries live next to the interactions they cover.
+            if self.summarizer:
+                self.summarizer.store = self.memory_store
+
+        # The index holds what the store holds (max_items per pair), so its
+        # footprint is bounded the same way and it trims in step with the store.
+        self.index = MemoryIndex(
+            dim=settings.memory_index_dim,
+            max_items=self.memory_store.max_items if not self.langmem_available else settings.memory_max_items,
+            max_keys=settings.memory_max_keys
+        )
+
+    @property
+    def langmem(self):
+        import langmem
+
+        return langmem
 
     async def store_interaction(
         self,
@@ -22,31 +66,23 @@ class MemoryService:
         ai_response: str
     ) -> bool:
         try:
+            memory_key = f"{user_id}_{companion_id}"
+            memory = {
+                "user_message": user_message,
+                "ai_response": ai_response,
+                "timestamp": datetime.utcnow().isoformat(),
+                "room_id": room_id
+            }
+
+            self.index.add(memory_key, memory)
+
             if self.langmem_available:
-                memory_id = f"{user_id}_{companion_id}"
-                self.langmem.add_memory(
-                    memory_id,
-                    {
-                        "user_message": user_message,
-                        "ai_response": ai_response,
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "room_id": room_id
-                    }
-                )
+                self.langmem.add_memory(memory_key, memory)
             else:
-                memory_key = f"{user_id}_{companion_id}"
-                if memory_key not in self.memory_store:
-                    self.memory_store[memory_key] = []
-
-                self.memory_store[memory_key].append({
-                    "user_message": user_message,
-                    "ai_response": ai_response,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "room_id": room_id
-                })
+                await self.memory_store.append(memory_key, memory)
 
-                if len(self.memory_store[memory_key]) > 50:
-                    self.memory_store[memory_key] = self.memory_store[memory_key][-50:]
+            if self.summarizer:
+                await self.summarizer.record(memory_key, memory)
 
             return True
         except Exception as e:
@@ -57,21 +93,74 @@ class MemoryService:
         self,
         user_id: str,
         companion_id: str,
-        limit: int = 10
+        limit: int = 10,
+        query: str = None,
+        token_budget: int = None
     ) -> List[Dict]:
+        """Return stored interactions for a user/companion pair.
+
+        By default this is the last ``limit`` interactions. With ``query``,
+        it is the up to ``limit`` interactions most similar to ``query`` that
+        fit in ``token_budget``, in chronological order. The pair's index is
+        per worker, so before a search it is checked against the store (entry
+        count and newest entry) and rebuilt when they differ: after a
+        restart, when another worker sharing the store has added to it, or
+        once the store has trimmed or expired entries.
+        """
         try:
+            if query and not self.langmem_available:
+                if not await self._sync_index(f"{user_id}_{companion_id}"):
+                    return []
+
+            if query and self.index.size(f"{user_id}_{companion_id}"):
+                return self._search_context(user_id, companion_id, query, limit, token_budget)
+
             if self.langmem_available:
                 memory_id = f"{user_id}_{companion_id}"
                 memories = self.langmem.get_memories(memory_id, limit=limit)
                 return memories if memories else []
             else:
                 memory_key = f"{user_id}_{companion_id}"
-                memories = self.memory_store.get(memory_key, [])
-                return memories[-limit:] if memories else []
+                return await self.memory_store.recent(memory_key, limit)
         except Exception as e:
             print(f"Error retrieving memory: {e}")
             return []
 
+    async def _sync_index(self, memory_key: str) -> int:
+        """Make the pair's index match the store; returns how many entries it holds."""
+        count, newest = await self.memory_store.tail(memory_key)
+        expected = min(count, self.index.max_items)
+        if self.index.size(memory_key) == expected and self.index.newest(memory_key) == newest:
+            return expected
+
+        self.index.clear(memory_key)
+        for entry in await self.memory_store.recent(memory_key, self.index.max_items):
+            self.index.add(memory_key, entry)
+        return self.index.size(memory_key)
+
+    def _search_context(
+        self,
+        user_id: str,
+        companion_id: str,
+        query: str,
+        limit: int,
+        token_budget: Optional[int]
+    ) -> List[Dict]:
+        matches = self.index.search(f"{user_id}_{companion_id}", query, k=limit)
+
+        selected = []
+        used_tokens = 0
+        for score, memory in matches:
+            if score <= 0:
+                break
+            tokens = estimate_tokens(memory.get("user_message", "")) + estimate_tokens(memory.get("ai_response", ""))
+            if token_budget is not None and used_tokens + tokens > token_budget:
+                continue
+            selected.append(memory)
+            used_tokens += tokens
+
+        return sorted(selected, key=lambda memory: memory.get("timestamp", ""))
+
     async def clear_context(self, user_id: str, companion_id: str) -> bool:
         try:
             if self.langmem_available:
@@ -79,20 +168,41 @@ class MemoryService:
                 self.langmem.clear_memory(memory_id)
             else:
                 memory_key = f"{user_id}_{companion_id}"
-                if memory_key in self.memory_store:
-                    del self.memory_store[memory_key]
+                await self.memory_store.clear(memory_key)
+
+            self.index.clear(f"{user_id}_{companion_id}")
 
             return True
         except Exception as e:
             print(f"Error clearing memory: {e}")
             return False
 
+    async def close(self):
+        if self.summarizer:
+            await self.summarizer.close()
+        if not self.langmem_available:
+            await self.memory_store.close()
+
+    async def get_rolling_summary(self, user_id: str, companion_id: str) -> Tuple[Optional[str], List[Dict]]:
+        """The pair's rolling summary and the interactions it does not cover yet; ``(None, [])`` without a summarizer."""
+        if not self.summarizer:
+            return None, []
+        try:
+            return await self.summarizer.get(f"{user_id}_{companion_id}")
+        except Exception as e:
+            print(f"Error reading conversation summary: {e}")
+            return None, []
+
     async def get_summary(
         self,
         user_id: str,
         companion_id: str
     ) -> Optional[str]:
         try:
+            summary, _ = await self.get_rolling_summary(user_id, companion_id)
+            if summary:
+                return summary
+
             context = await self.get_context(user_id, companion_id, limit=20)
             if not context:
                 return None
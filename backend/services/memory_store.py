@@ -0,0 +1,187 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+class MemoryStore(ABC):
+    """Capped, expiring list of interactions per ``user_companion`` key.
+
+    Each key may also hold one summary document (see
+    ``ConversationSummarizer``), which expires with the same idle TTL.
+    ``update_summary`` applies a change to it atomically, so concurrent
+    writers (other tasks, or other workers sharing the store) never
+    overwrite each other's changes.
+    """
+
+    @abstractmethod
+    async def append(self, key: str, entry: Dict) -> None:
+        ...
+
+    @abstractmethod
+    async def recent(self, key: str, limit: int) -> List[Dict]:
+        """The newest ``limit`` entries, oldest first; ``[]`` when ``limit <= 0``."""
+
+    @abstractmethod
+    async def tail(self, key: str) -> Tuple[int, Optional[Dict]]:
+        """How many entries the key holds, and the newest one."""
+
+    @abstractmethod
+    async def clear(self, key: str) -> None:
+        """Drop the key's interactions and its summary."""
+
+    @abstractmethod
+    async def get_summary(self, key: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def update_summary(self, key: str, update: Callable[[Optional[Dict]], Dict]) -> Dict:
+        """Replace the summary with ``update(current)`` atomically; returns the new document.
+
+        ``update`` may be called more than once and must not have side effects.
+        """
+
+    async def close(self) -> None:
+        pass
+
+class InProcessMemoryStore(MemoryStore):
+    """Per-worker store; lost on restart and not shared across workers.
+
+    Each key holds a ``deque(maxlen=max_items)`` so appends never copy the
+    list, keys idle for ``ttl_seconds`` expire, and at most ``max_keys`` keys
+    are kept (least recently used first out).
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: int, max_keys: int):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self._data: "OrderedDict[str, Tuple[float, Deque[Dict]]]" = OrderedDict()
+        self._summaries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[Deque[Dict]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, entries = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return entries
+
+    def _touch(self, key: str, entries: Deque[Dict]):
+        self._data[key] = (time.monotonic() + self.ttl_seconds, entries)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+
+    async def append(self, key: str, entry: Dict) -> None:
+        entries = self._get(key)
+        if entries is None:
+            entries = deque(maxlen=self.max_items)
+        entries.append(entry)
+        self._touch(key, entries)
+
+    async def recent(self, key: str, limit: int) -> List[Dict]:
+        entries = self._get(key)
+        if not entries or limit <= 0:
+            return []
+        self._touch(key, entries)
+        start = max(len(entries) - limit, 0)
+        return [entries[i] for i in range(start, len(entries))]
+
+    async def tail(self, key: str) -> Tuple[int, Optional[Dict]]:
+        entries = self._get(key)
+        if not entries:
+            return 0, None
+        return len(entries), entries[-1]
+
+    async def clear(self, key: str) -> None:
+        self._data.pop(key, None)
+        self._summaries.pop(key, None)
+
+    async def get_summary(self, key: str) -> Optional[Dict]:
+        item = self._summaries.get(key)
+        if item is None:
+            return None
+        expires_at, summary = item
+        if expires_at < time.monotonic():
+            del self._summaries[key]
+            return None
+        return json.loads(json.dumps(summary))
+
+    async def update_summary(self, key: str, update: Callable[[Optional[Dict]], Dict]) -> Dict:
+        # get_summary never yields, so read and write are atomic on the event
+        # loop. Stored as a copy, so callers can't change it behind the store's back.
+        summary = update(await self.get_summary(key))
+        self._summaries[key] = (time.monotonic() + self.ttl_seconds, json.loads(json.dumps(summary)))
+        self._summaries.move_to_end(key)
+        while len(self._summaries) > self.max_keys:
+            self._summaries.popitem(last=False)
+        return summary
+
+class RedisMemoryStore(MemoryStore):
+    """Redis list per key, trimmed to ``max_items`` and expired after ``ttl_seconds`` idle."""
+
+    def __init__(self, redis_url: str, max_items: int, ttl_seconds: int, prefix: str = "memory:"):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def append(self, key: str, entry: Dict) -> None:
+        redis_key = self.prefix + key
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(redis_key, json.dumps(entry))
+            pipe.ltrim(redis_key, -self.max_items, -1)
+            pipe.expire(redis_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def recent(self, key: str, limit: int) -> List[Dict]:
+        # LRANGE key -0 -1 would be the whole list.
+        if limit <= 0:
+            return []
+        redis_key = self.prefix + key
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.lrange(redis_key, -limit, -1)
+            pipe.expire(redis_key, self.ttl_seconds)
+            raw, _ = await pipe.execute()
+        return [json.loads(item) for item in raw]
+
+    async def tail(self, key: str) -> Tuple[int, Optional[Dict]]:
+        redis_key = self.prefix + key
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.llen(redis_key)
+            pipe.lindex(redis_key, -1)
+            count, newest = await pipe.execute()
+        return count, json.loads(newest) if newest else None
+
+    async def clear(self, key: str) -> None:
+        await self.redis.delete(self.prefix + key, self.prefix + "summary:" + key)
+
+    async def get_summary(self, key: str) -> Optional[Dict]:
+        raw = await self.redis.get(self.prefix + "summary:" + key)
+        return json.loads(raw) if raw else None
+
+    async def update_summary(self, key: str, update: Callable[[Optional[Dict]], Dict]) -> Dict:
+        from redis.exceptions import WatchError
+
+        redis_key = self.prefix + "summary:" + key
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Optimistic: the write fails if another worker changed the key since the read.
+                    await pipe.watch(redis_key)
+                    raw = await pipe.get(redis_key)
+                    summary = update(json.loads(raw) if raw else None)
+                    pipe.multi()
+                    pipe.set(redis_key, json.dumps(summary), ex=self.ttl_seconds)
+                    await pipe.execute()
+                    return summary
+                except WatchError:
+                    continue
+
+    async def close(self) -> None:
+        await self.redis.aclose()
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+from config.settings import get_settings
+from services.supabase_client import get_supabase_client
+from services.executor import run_blocking
+
+settings = get_settings()
+
+class MessageWriter:
+    """Write-behind queue that persists chat messages in bulk inserts.
+
+    Messages are flushed when ``max_batch`` rows are waiting or
+    ``flush_interval`` seconds after the first queued row, whichever comes
+    first. A single consumer drains one FIFO queue, so rows for a room are
+    inserted in the order they were emitted. When ``max_queue`` rows are
+    pending, ``enqueue`` waits for room (backpressure) instead of growing
+    without bound. ``stop()`` flushes everything still queued.
+
+    A batch that still fails after ``max_retries`` is split up: each room's
+    rows are inserted on their own, and a room whose insert fails is
+    retried row by row, so one bad row (or room) does not take the rest
+    with it. Only rows that fail alone are dropped, and they are logged.
+    """
+
+    def __init__(
+        self,
+        max_batch: int,
+        flush_interval: float,
+        max_queue: int,
+        table: str = "messages",
+        client_factory: Callable = get_supabase_client,
+        max_retries: int = 3
+    ):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.table = table
+        self.client_factory = client_factory
+        self.max_retries = max_retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.backpressure_waits = 0
+        self.last_flush_ms = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def enqueue(self, row: Dict):
+        if self._task is None:
+            await self.start()
+        if self._queue.full():
+            self.backpressure_waits += 1
+        await self._queue.put(row)
+        self.enqueued += 1
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _insert(self, rows: List[Dict]):
+        supabase = self.client_factory()
+        await run_blocking(supabase.table(self.table).insert(rows).execute)
+        self.written += len(rows)
+        self.batches += 1
+
+    async def _flush(self, batch: List[Dict]):
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._insert(batch)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Error persisting {len(batch)} messages, retrying per room: {e}")
+                    await self._flush_rooms(batch)
+                else:
+                    await asyncio.sleep(0.1 * (2 ** attempt))
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    async def _flush_rooms(self, batch: List[Dict]):
+        rooms: Dict[str, List[Dict]] = {}
+        for row in batch:
+            rooms.setdefault(row.get("room_id"), []).append(row)
+
+        for rows in rooms.values():
+            try:
+                await self._insert(rows)
+                continue
+            except Exception as e:
+                if len(rows) == 1:
+                    self._drop(rows[0], e)
+                    continue
+            for row in rows:
+                try:
+                    await self._insert([row])
+                except Exception as e:
+                    self._drop(row, e)
+
+    def _drop(self, row: Dict, error: Exception):
+        self.dropped += 1
+        print(f"Error persisting message, dropping {row!r}: {error}")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "backpressure_waits": self.backpressure_waits,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+_message_writer: Optional[MessageWriter] = None
+
+def get_message_writer() -> MessageWriter:
+    global _message_writer
+    if _message_writer is None:
+        _message_writer = MessageWriter(
+            max_batch=settings.message_batch_size,
+            flush_interval=settings.message_flush_interval_ms / 1000,
+            max_queue=settings.message_queue_size
+        )
+    return _message_writer
@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from utils.tokens import estimate_tokens
+
+INSTRUCTIONS = """Respond to the user in a natural, engaging way that matches your personality.
+Keep responses concise and conversational (2-3 sentences).
+Be helpful, friendly, and stay in character."""
+
+HISTORY_HEADER = "Previous conversation:"
+MEMORY_HEADER = "Previous conversations:"
+SESSION_HEADER = "Current session:"
+SUMMARY_HEADER = "Summary of your conversations so far:"
+
+class PromptBuilder:
+    """Assembles companion prompts within a token budget.
+
+    The persona block (name, personality, description, specialties) is
+    rendered once per companion version and cached, keyed by
+    ``(id, updated_at)``. History lines are collected into lists and joined
+    once; when the prompt would exceed ``token_budget`` the oldest lines are
+    dropped first and replaced by a one-line omission marker. A rolling
+    ``summary`` follows the persona block and is never dropped.
+    """
+
+    def __init__(self, token_budget: int, max_personas: int = 256):
+        self.token_budget = token_budget
+        self.max_personas = max_personas
+        self._personas: "OrderedDict[Tuple[str, str], Tuple[str, int]]" = OrderedDict()
+        self.prompts_built = 0
+        self.prompt_tokens_total = 0
+        self.last_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self.truncated_prompts = 0
+        self.persona_hits = 0
+        self.persona_misses = 0
+
+    def persona_prefix(self, companion: Dict) -> Tuple[str, int]:
+        key = (companion["id"], str(companion.get("updated_at", "")))
+        cached = self._personas.get(key)
+        if cached is not None:
+            self.persona_hits += 1
+            self._personas.move_to_end(key)
+            return cached
+
+        self.persona_misses += 1
+        prefix = "\n".join([
+            f"You are {companion['name']}, an AI companion with the following traits:",
+            f"Personality: {companion['personality']}",
+            f"Description: {companion['description']}",
+            f"Specialties: {', '.join(companion['specialties'])}",
+        ])
+        cached = (prefix, estimate_tokens(prefix))
+        self._personas[key] = cached
+        while len(self._personas) > self.max_personas:
+            self._personas.popitem(last=False)
+        return cached
+
+    def invalidate(self, companion_id: Optional[str] = None):
+        if companion_id is None:
+            self._personas.clear()
+            return
+        for key in [key for key in self._personas if key[0] == companion_id]:
+            del self._personas[key]
+
+    def build(
+        self,
+        companion: Dict,
+        user_message: str,
+        memories: List[Dict] = None,
+        session_messages: List[Dict] = None,
+        summary: str = None
+    ) -> str:
+        name = companion["name"]
+        prefix, prefix_tokens = self.persona_prefix(companion)
+        if summary:
+            prefix = f"{prefix}\n\n{SUMMARY_HEADER}\n{summary}"
+            prefix_tokens = estimate_tokens(prefix)
+
+        memory_lines = []
+        for memory in memories or []:
+            memory_lines.append(f"User: {memory.get('user_message', '')}")
+            memory_lines.append(f"{name}: {memory.get('ai_response', '')}")
+
+        session_lines = []
+        for msg in session_messages or []:
+            sender = "User" if msg["sender_type"] == "user" else name
+            session_lines.append(f"{sender}: {msg['content']}")
+
+        suffix = f"\n\n{INSTRUCTIONS}\n\nUser: {user_message}\n{name}:"
+        fixed_tokens = prefix_tokens + estimate_tokens(suffix) + estimate_tokens(f"\n\n{HISTORY_HEADER}\n")
+
+        available = self.token_budget - fixed_tokens
+        memory_lines, session_lines, omitted = self._fit(memory_lines, session_lines, available)
+
+        history = []
+        if omitted:
+            history.append(f"({omitted} earlier lines omitted)")
+        if memory_lines:
+            history.append(MEMORY_HEADER)
+            history.extend(memory_lines)
+            history.append("")
+        if session_lines:
+            history.append(SESSION_HEADER)
+            history.extend(session_lines)
+
+        prompt = "\n".join([prefix, "", HISTORY_HEADER, *history]) + suffix
+        self._record(estimate_tokens(prompt), omitted)
+        return prompt
+
+    def _fit(self, memory_lines: List[str], session_lines: List[str], available: int) -> Tuple[List[str], List[str], int]:
+        """Drop the oldest lines (memories before session turns) until the history fits.
+
+        A section header is only counted while its section has lines left,
+        and the omission marker only once something was dropped.
+        """
+        lines = memory_lines + session_lines
+        costs = [estimate_tokens(line) for line in lines]
+        memory_header = estimate_tokens(f"{MEMORY_HEADER}\n\n")
+        session_header = estimate_tokens(f"{SESSION_HEADER}\n")
+
+        def overhead(drop: int) -> int:
+            tokens = estimate_tokens(f"({drop} earlier lines omitted)\n") if drop else 0
+            if drop < len(memory_lines):
+                tokens += memory_header
+            if session_lines and drop < len(lines):
+                tokens += session_header
+            return tokens
+
+        total = sum(costs)
+        drop = 0
+        while drop < len(lines) and total + overhead(drop) > available:
+            total -= costs[drop]
+            drop += 1
+
+        memory_drop = min(drop, len(memory_lines))
+        session_drop = drop - memory_drop
+        return memory_lines[memory_drop:], session_lines[session_drop:], drop
+
+    def _record(self, tokens: int, omitted: int):
+        self.prompts_built += 1
+        self.prompt_tokens_total += tokens
+        self.last_prompt_tokens = tokens
+        self.max_prompt_tokens = max(self.max_prompt_tokens, tokens)
+        if omitted:
+            self.truncated_prompts += 1
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "prompts_built": self.prompts_built,
+            "avg_prompt_tokens": round(self.prompt_tokens_total / self.prompts_built, 1) if self.prompts_built else 0,
+            "last_prompt_tokens": self.last_prompt_tokens,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "truncated_prompts": self.truncated_prompts,
+            "persona_cache_hits": self.persona_hits,
+            "persona_cache_misses": self.persona_misses,
+        }
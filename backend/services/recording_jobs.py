@@ -0,0 +1,208 @@
+import asyncio
+import json
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from config.settings import get_settings
+from services.media_probe import probe_media
+from services.recording_uploads import publish_recording
+
+settings = get_settings()
+
+class RecordingJobQueue:
+    """Background post-processing for uploaded recordings.
+
+    Each job probes the spooled file in a worker process (container header
+    parsing is CPU-bound and must not run on the event loop), then uploads it
+    to storage and writes the ``call_recordings`` row with the extracted
+    duration and metadata. Job state is kept in process for the status
+    endpoint and pruned after ``max_finished`` completed jobs; use
+    ``RedisRecordingJobQueue`` when status polls may reach another worker.
+
+    ``stop`` lets queued jobs finish for up to ``drain_seconds``; jobs still
+    queued or running after that are marked failed and their spool files
+    removed.
+    """
+
+    def __init__(self, workers: int, processes: int, max_finished: int = 1000, drain_seconds: float = 30.0):
+        self.workers = workers
+        self.processes = processes
+        self.max_finished = max_finished
+        self.drain_seconds = drain_seconds
+        self.jobs: Dict[str, Dict] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        if self._tasks and self.drain_seconds > 0:
+            try:
+                await asyncio.wait_for(self._queue.join(), self.drain_seconds)
+            except asyncio.TimeoutError:
+                print(f"Recording jobs still pending after {self.drain_seconds}s, abandoning {self._queue.qsize()} queued")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        while self._queue is not None and not self._queue.empty():
+            job, _, _, _, _, _, cleanup = self._queue.get_nowait()
+            await self._fail(job, "Server shut down before the recording was processed")
+            cleanup()
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def submit(
+        self,
+        room_id: str,
+        path: str,
+        filename: str,
+        content_type: Optional[str],
+        size: int,
+        sha256: str,
+        cleanup: Callable[[], None]
+    ) -> Dict:
+        if not self._tasks:
+            await self.start()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "recording_id": str(uuid.uuid4()),
+            "room_id": room_id,
+            "status": "queued",
+            "created_at": datetime.utcnow().isoformat()
+        }
+        self.jobs[job_id] = job
+        await self._save(job)
+        await self._queue.put((job, path, filename, content_type, size, sha256, cleanup))
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return self.jobs.get(job_id)
+
+    async def _save(self, job: Dict):
+        pass
+
+    async def _worker(self):
+        while True:
+            job, path, filename, content_type, size, sha256, cleanup = await self._queue.get()
+            try:
+                await self._process(job, path, filename, content_type, size, sha256)
+            except asyncio.CancelledError:
+                await self._fail(job, "Server shut down while the recording was processed")
+                raise
+            finally:
+                cleanup()
+                self._queue.task_done()
+                self._prune()
+
+    async def _process(self, job: Dict, path: str, filename: str, content_type: Optional[str], size: int, sha256: str):
+        job["status"] = "processing"
+        await self._save(job)
+        loop = asyncio.get_running_loop()
+
+        try:
+            metadata = await loop.run_in_executor(self._pool, probe_media, path)
+        except Exception as e:
+            print(f"Error probing recording {job['recording_id']}: {e}")
+            metadata = {"error": str(e)}
+
+        try:
+            job["recording"] = await publish_recording(
+                job["room_id"],
+                path,
+                filename,
+                content_type,
+                size,
+                sha256,
+                recording_id=job["recording_id"],
+                duration_seconds=int(round(metadata.get("duration_seconds", 0))),
+                metadata=metadata
+            )
+            job["status"] = "completed"
+        except Exception as e:
+            print(f"Error publishing recording {job['recording_id']}: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+
+        job["finished_at"] = datetime.utcnow().isoformat()
+        await self._save(job)
+
+    async def _fail(self, job: Dict, error: str):
+        print(f"Recording {job['recording_id']} failed: {error}")
+        job["status"] = "failed"
+        job["error"] = error
+        job["finished_at"] = datetime.utcnow().isoformat()
+        await self._save(job)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.get("finished_at")]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self.jobs[job_id]
+
+    def metrics(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"queue_depth": self._queue.qsize() if self._queue else 0, **counts}
+
+class RedisRecordingJobQueue(RecordingJobQueue):
+    """Job queue whose status is readable from every worker.
+
+    Jobs still run on the worker that accepted the upload (the spool file is
+    local to it), but each status change is written to Redis and expires
+    ``ttl_seconds`` later, so a status poll routed to any worker finds it.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int, *args, prefix: str = "recording-job:", **kwargs):
+        import redis.asyncio as redis
+
+        super().__init__(*args, **kwargs)
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        try:
+            raw = await self.redis.get(f"{self.prefix}{job_id}")
+        except Exception as e:
+            print(f"Error reading recording job {job_id}: {e}")
+            return self.jobs.get(job_id)
+        return json.loads(raw) if raw else self.jobs.get(job_id)
+
+    async def _save(self, job: Dict):
+        try:
+            await self.redis.set(f"{self.prefix}{job['job_id']}", json.dumps(job), ex=self.ttl_seconds)
+        except Exception as e:
+            print(f"Error saving recording job {job['job_id']}: {e}")
+
+    async def stop(self):
+        await super().stop()
+        await self.redis.aclose()
+
+_job_queue: Optional[RecordingJobQueue] = None
+
+def get_recording_jobs() -> RecordingJobQueue:
+    global _job_queue
+    if _job_queue is None:
+        options = dict(
+            workers=settings.recording_job_workers,
+            processes=settings.recording_job_processes,
+            drain_seconds=settings.recording_job_drain_seconds
+        )
+        if settings.recording_job_backend == "redis":
+            _job_queue = RedisRecordingJobQueue(settings.redis_url, settings.recording_job_ttl_seconds, **options)
+        else:
+            _job_queue = RecordingJobQueue(**options)
+    return _job_queue
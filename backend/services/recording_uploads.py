@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from config.settings import get_settings
+from services.supabase_client import get_supabase_client
+from services.executor import run_blocking
+
+settings = get_settings()
+
+CHUNK_SIZE = 1024 * 1024
+
+async def spool_stream(chunks: AsyncIterator[bytes], dest_path: str) -> Tuple[int, str]:
+    """Write an async byte stream to ``dest_path``; returns ``(size, sha256)``.
+
+    Only one chunk is held in memory at a time.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest_path, "wb") as out:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            digest.update(chunk)
+            size += len(chunk)
+            await run_blocking(out.write, chunk)
+    return size, digest.hexdigest()
+
+async def iter_upload_file(file, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+async def publish_recording(
+    room_id: str,
+    path: str,
+    filename: str,
+    content_type: Optional[str],
+    size: int,
+    sha256: str,
+    recording_id: Optional[str] = None,
+    duration_seconds: int = 0,
+    metadata: Optional[Dict] = None
+) -> Dict:
+    """Upload a spooled file to the ``recordings`` bucket and record it in ``call_recordings``.
+
+    storage3 streams the request body from the file on disk, so the
+    recording is never loaded into memory as a whole.
+    """
+    supabase = get_supabase_client()
+
+    recording_id = recording_id or str(uuid.uuid4())
+    file_extension = filename.split('.')[-1] if filename and '.' in filename else 'webm'
+    storage_path = f"recordings/{room_id}/{recording_id}.{file_extension}"
+
+    upload_response = await run_blocking(
+        supabase.storage.from_('recordings').upload,
+        storage_path,
+        path,
+        {
+            'content-type': content_type or 'video/webm',
+            'cache-control': '3600'
+        }
+    )
+
+    if hasattr(upload_response, 'error') and upload_response.error:
+        raise RuntimeError(f"Storage upload failed: {upload_response.error}")
+
+    public_url = supabase.storage.from_('recordings').get_public_url(storage_path)
+
+    recording_data = {
+        "id": recording_id,
+        "room_id": room_id,
+        "storage_path": storage_path,
+        "url": public_url,
+        "duration_seconds": duration_seconds,
+        "file_size_mb": round(size / (1024 * 1024), 2),
+        "checksum_sha256": sha256,
+        "metadata": metadata or {},
+        "processing_status": "failed" if metadata and metadata.get("error") else "completed",
+        "created_at": datetime.utcnow().isoformat()
+    }
+
+    insert_response = await run_blocking(supabase.table("call_recordings").insert(recording_data).execute)
+
+    if hasattr(insert_response, 'error') and insert_response.error:
+        raise RuntimeError(f"Database insert failed: {insert_response.error}")
+
+    return recording_data
+
+class ChunkedUploadStore:
+    """Resumable multipart uploads spooled to local disk.
+
+    Each upload is a directory holding ``manifest.json`` and one file per
+    part, so a client can re-send only the parts that failed and any worker
+    sharing the spool directory can pick the upload up.
+
+    Uploads (and single-shot spool files) untouched for ``ttl_seconds``
+    are abandoned; ``start`` removes them right away and then every
+    ``sweep_interval`` seconds.
+    """
+
+    def __init__(self, root: str, ttl_seconds: float = 24 * 60 * 60, sweep_interval: float = 60 * 60):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._task: Optional[asyncio.Task] = None
+        self.swept = 0
+        os.makedirs(root, exist_ok=True)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await run_blocking(self.sweep)
+            except Exception as e:
+                print(f"Error sweeping recording uploads: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    def _last_activity(self, path: str) -> float:
+        latest = os.path.getmtime(path)
+        if os.path.isdir(path):
+            for name in os.listdir(path):
+                try:
+                    latest = max(latest, os.path.getmtime(os.path.join(path, name)))
+                except FileNotFoundError:
+                    pass
+        return latest
+
+    def sweep(self) -> int:
+        """Remove uploads and spool files idle for ``ttl_seconds``; returns how many."""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if self._last_activity(path) >= cutoff:
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+        self.swept += removed
+        return removed
+
+    def _dir(self, upload_id: str) -> str:
+        if not upload_id or os.sep in upload_id or upload_id.startswith("."):
+            raise KeyError(upload_id)
+        return os.path.join(self.root, upload_id)
+
+    def _part_path(self, upload_id: str, index: int) -> str:
+        return os.path.join(self._dir(upload_id), f"part-{index:06d}")
+
+    def _manifest_path(self, upload_id: str) -> str:
+        return os.path.join(self._dir(upload_id), "manifest.json")
+
+    def _read_manifest(self, upload_id: str) -> Dict:
+        try:
+            with open(self._manifest_path(upload_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(upload_id)
+
+    def _write_manifest(self, upload_id: str, manifest: Dict):
+        tmp_path = self._manifest_path(upload_id) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path(upload_id))
+
+    def create(self, room_id: str, filename: str, content_type: Optional[str], total_parts: Optional[int] = None) -> Dict:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._dir(upload_id))
+        manifest = {
+            "upload_id": upload_id,
+            "room_id": room_id,
+            "filename": filename,
+            "content_type": content_type,
+            "total_parts": total_parts,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        self._write_manifest(upload_id, manifest)
+        return manifest
+
+    async def write_part(self, upload_id: str, index: int, chunks: AsyncIterator[bytes]) -> Dict:
+        self._read_manifest(upload_id)
+        part_path = self._part_path(upload_id, index)
+
+        # Parts become visible only once complete, so a retried or
+        # interrupted part never leaves a truncated file behind. Each write
+        # spools to its own temp file: two concurrent retries of one part
+        # each rename a complete copy, and the last one wins.
+        fd, tmp_path = tempfile.mkstemp(prefix=f"part-{index:06d}.", suffix=".tmp", dir=self._dir(upload_id))
+        os.close(fd)
+        meta_tmp_path = None
+        try:
+            size, sha256 = await spool_stream(chunks, tmp_path)
+            part = {"index": index, "size": size, "sha256": sha256}
+            meta_fd, meta_tmp_path = tempfile.mkstemp(prefix=f"part-{index:06d}.", suffix=".tmp", dir=self._dir(upload_id))
+            with os.fdopen(meta_fd, "w") as f:
+                json.dump(part, f)
+            os.replace(tmp_path, part_path)
+            os.replace(meta_tmp_path, part_path + ".json")
+        except BaseException:
+            for path in (tmp_path, meta_tmp_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+            raise
+        return part
+
+    def _parts(self, upload_id: str) -> Dict[int, Dict]:
+        parts = {}
+        for name in os.listdir(self._dir(upload_id)):
+            if name.startswith("part-") and name.endswith(".json") and os.path.exists(os.path.join(self._dir(upload_id), name[:-5])):
+                with open(os.path.join(self._dir(upload_id), name)) as f:
+                    part = json.load(f)
+                parts[part["index"]] = part
+        return parts
+
+    def status(self, upload_id: str) -> Dict:
+        manifest = self._read_manifest(upload_id)
+        parts = self._parts(upload_id)
+        missing: List[int] = []
+        if manifest["total_parts"]:
+            missing = [i for i in range(manifest["total_parts"]) if i not in parts]
+        return {**manifest, "parts": [parts[i] for i in sorted(parts)], "missing": missing}
+
+    async def assemble(self, upload_id: str, total_parts: int) -> Tuple[Dict, str, int, str]:
+        """Concatenate parts ``0..total_parts-1`` into one file; returns manifest, path, size and sha256."""
+        manifest = self._read_manifest(upload_id)
+        parts = self._parts(upload_id)
+        missing = [i for i in range(total_parts) if i not in parts]
+        if missing:
+            raise ValueError(f"Missing parts: {missing}")
+
+        async def chunks():
+            for index in range(total_parts):
+                with open(self._part_path(upload_id, index), "rb") as part:
+                    while True:
+                        chunk = await run_blocking(part.read, CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        yield chunk
+
+        path = os.path.join(self._dir(upload_id), "assembled")
+        size, sha256 = await spool_stream(chunks(), path)
+        return manifest, path, size, sha256
+
+    def discard(self, upload_id: str):
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+_upload_store: Optional[ChunkedUploadStore] = None
+
+def get_upload_store() -> ChunkedUploadStore:
+    global _upload_store
+    if _upload_store is None:
+        root = settings.recording_spool_dir or os.path.join(tempfile.gettempdir(), "recording-uploads")
+        _upload_store = ChunkedUploadStore(
+            root,
+            ttl_seconds=settings.recording_upload_ttl_seconds,
+            sweep_interval=settings.recording_upload_sweep_interval_seconds
+        )
+    return _upload_store
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config.settings import get_settings
+
+settings = get_settings()
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_message(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace: ``"Hi!!  "`` -> ``"hi"``."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+class ResponseCache:
+    """Cache of companion replies to short, context-free openers.
+
+    Only the first turn of a conversation (no session history) with at most
+    ``max_words`` words is eligible. The key covers the companion id, its
+    persona version (``updated_at``) and the normalized message, so editing
+    a persona retires its cached replies. Nothing about the user is in the
+    key, so ``AIService`` neither reads nor writes the cache for a turn
+    whose prompt carries that user's memories or summary.
+
+    Each key holds up to ``variants`` different replies: until that many
+    have been generated every request still goes to the model and adds its
+    reply, after which one of them is picked at random. ``variants=1``
+    always returns the same reply.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, max_words: int, variants: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_words = max_words
+        self.variants = max(variants, 1)
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.stores = 0
+
+    def key_for(self, companion: Dict, user_message: str, session_messages: Optional[List[Dict]]) -> Optional[str]:
+        """Cache key for this turn, or None when the turn depends on context or is too long."""
+        normalized = normalize_message(user_message)
+        if session_messages is None or session_messages or not normalized or len(normalized.split()) > self.max_words:
+            self.skipped += 1
+            return None
+
+        raw = f"{companion['id']}|{companion.get('updated_at', '')}|{normalized}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _pick(self, replies: List[str]) -> Optional[str]:
+        if len(replies) < self.variants:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return random.choice(replies)
+
+    async def _load(self, key: str) -> List[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return []
+        expires_at, replies = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return []
+        self._entries.move_to_end(key)
+        return replies
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._pick(await self._load(key))
+
+    async def put(self, key: str, reply: str):
+        replies = await self._load(key)
+        if len(replies) >= self.variants:
+            return
+        entry = self._entries.get(key)
+        expires_at = entry[0] if entry else time.monotonic() + self.ttl_seconds
+        self._entries[key] = (expires_at, replies + [reply])
+        self._entries.move_to_end(key)
+        self.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def close(self):
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class RedisResponseCache(ResponseCache):
+    """Response cache shared by every worker through Redis.
+
+    Each key is a capped list that expires ``ttl_seconds`` after its first
+    reply; LRU eviction is left to the server's ``maxmemory-policy``.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int, max_words: int, variants: int, prefix: str = "response-cache:"):
+        import redis.asyncio as redis
+
+        super().__init__(ttl_seconds, max_entries=0, max_words=max_words, variants=variants)
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.prefix = prefix
+
+    async def _load(self, key: str) -> List[str]:
+        return [json.loads(reply) for reply in await self.redis.lrange(self.prefix + key, 0, self.variants - 1)]
+
+    async def put(self, key: str, reply: str):
+        replies = await self._load(key)
+        if len(replies) >= self.variants:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(self.prefix + key, json.dumps(reply))
+            pipe.ltrim(self.prefix + key, 0, self.variants - 1)
+            if not replies:
+                pipe.expire(self.prefix + key, self.ttl_seconds)
+            await pipe.execute()
+        self.stores += 1
+
+    async def close(self):
+        await self.redis.aclose()
+
+    def metrics(self) -> Dict[str, float]:
+        metrics = super().metrics()
+        metrics.pop("entries")
+        return metrics
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The configured response cache, or None unless ``RESPONSE_CACHE_ENABLED`` is set."""
+    global _response_cache
+    if _response_cache is None and settings.response_cache_enabled:
+        if settings.response_cache_backend == "redis":
+            _response_cache = RedisResponseCache(
+                settings.redis_url,
+                ttl_seconds=settings.response_cache_ttl_seconds,
+                max_words=settings.response_cache_max_words,
+                variants=settings.response_cache_variants
+            )
+        else:
+            _response_cache = ResponseCache(
+                ttl_seconds=settings.response_cache_ttl_seconds,
+                max_entries=settings.response_cache_max_entries,
+                max_words=settings.response_cache_max_words,
+                variants=settings.response_cache_variants
+            )
+    return _response_cache
@@ -0,0 +1,131 @@
+import json
+import os
+import socket
+from typing import Dict, List, Optional, Set
+from config.settings import get_settings
+
+settings = get_settings()
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+class RoomPresence:
+    """Which sockets are in which signaling room, for a single worker."""
+
+    def __init__(self):
+        self._rooms: Dict[str, Dict[str, Dict]] = {}
+        self._sids: Dict[str, Set[str]] = {}
+
+    async def join(self, room_id: str, sid: str, member: Dict):
+        self._rooms.setdefault(room_id, {})[sid] = {**member, "worker": WORKER_ID}
+        self._sids.setdefault(sid, set()).add(room_id)
+
+    async def leave(self, room_id: str, sid: str) -> int:
+        """Remove ``sid`` from ``room_id``; returns how many members remain."""
+        members = self._rooms.get(room_id, {})
+        members.pop(sid, None)
+        rooms = self._sids.get(sid)
+        if rooms is not None:
+            rooms.discard(room_id)
+            if not rooms:
+                del self._sids[sid]
+        if not members:
+            self._rooms.pop(room_id, None)
+        return len(members)
+
+    async def disconnect(self, sid: str) -> Dict[str, int]:
+        """Remove ``sid`` from every room; returns remaining member counts per room."""
+        return {room_id: await self.leave(room_id, sid) for room_id in list(self._sids.get(sid, ()))}
+
+    async def members(self, room_id: str) -> List[Dict]:
+        return [{"sid": sid, **member} for sid, member in self._rooms.get(room_id, {}).items()]
+
+    async def clear(self, room_id: str) -> List[str]:
+        """Remove every member of ``room_id``; returns their sids."""
+        sids = list(self._rooms.get(room_id, {}))
+        for sid in sids:
+            await self.leave(room_id, sid)
+        return sids
+
+    async def aclose(self):
+        self._rooms.clear()
+        self._sids.clear()
+
+class RedisRoomPresence(RoomPresence):
+    """Room membership shared by every worker through Redis.
+
+    Each room is a hash of ``sid -> member`` and each socket a set of the
+    rooms it joined. Keys expire ``ttl_seconds`` after the last join so
+    members of a worker that died without running ``disconnect`` do not
+    linger forever.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int, prefix: str = "presence:"):
+        import redis.asyncio as redis
+
+        super().__init__()
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def _room_key(self, room_id: str) -> str:
+        return f"{self.prefix}room:{room_id}"
+
+    def _sid_key(self, sid: str) -> str:
+        return f"{self.prefix}sid:{sid}"
+
+    async def join(self, room_id: str, sid: str, member: Dict):
+        room_key, sid_key = self._room_key(room_id), self._sid_key(sid)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(room_key, sid, json.dumps({**member, "worker": WORKER_ID}))
+            pipe.sadd(sid_key, room_id)
+            pipe.expire(room_key, self.ttl_seconds)
+            pipe.expire(sid_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def leave(self, room_id: str, sid: str) -> int:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(self._room_key(room_id), sid)
+            pipe.srem(self._sid_key(sid), room_id)
+            pipe.hlen(self._room_key(room_id))
+            _, _, remaining = await pipe.execute()
+        return remaining
+
+    async def disconnect(self, sid: str) -> Dict[str, int]:
+        room_ids = await self.redis.smembers(self._sid_key(sid))
+        if not room_ids:
+            return {}
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for room_id in room_ids:
+                pipe.hdel(self._room_key(room_id), sid)
+                pipe.hlen(self._room_key(room_id))
+            pipe.delete(self._sid_key(sid))
+            results = await pipe.execute()
+        return {room_id: results[i * 2 + 1] for i, room_id in enumerate(room_ids)}
+
+    async def members(self, room_id: str) -> List[Dict]:
+        members = await self.redis.hgetall(self._room_key(room_id))
+        return [{"sid": sid, **json.loads(member)} for sid, member in members.items()]
+
+    async def clear(self, room_id: str) -> List[str]:
+        sids = await self.redis.hkeys(self._room_key(room_id))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for sid in sids:
+                pipe.srem(self._sid_key(sid), room_id)
+            pipe.delete(self._room_key(room_id))
+            await pipe.execute()
+        return sids
+
+    async def aclose(self):
+        await self.redis.aclose()
+
+_room_presence: Optional[RoomPresence] = None
+
+def get_room_presence() -> RoomPresence:
+    global _room_presence
+    if _room_presence is None:
+        if settings.socketio_manager == "redis":
+            _room_presence = RedisRoomPresence(settings.redis_url, ttl_seconds=settings.room_presence_ttl_seconds)
+        else:
+            _room_presence = RoomPresence()
+    return _room_presence
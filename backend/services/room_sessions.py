@@ -0,0 +1,169 @@
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+from config.settings import get_settings
+from services.supabase_client import get_supabase_client
+from services.executor import run_blocking
+from services.companion_cache import get_companion_cache
+
+settings = get_settings()
+
+@dataclass
+class RoomSession:
+    room_id: str
+    room: Dict
+    companion: Dict
+    messages: Deque[Dict] = field(default_factory=deque)
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.room.get("user_id")
+
+    def history(self) -> List[Dict]:
+        return list(self.messages)
+
+async def load_room_state(room_id: str, max_messages: int) -> Optional[Dict]:
+    """Fetch the room row, its companion and the newest ``max_messages`` messages."""
+    supabase = get_supabase_client()
+
+    room_response = await run_blocking(supabase.table("video_rooms").select("*").eq("room_id", room_id).maybeSingle().execute)
+    if not room_response.data:
+        return None
+
+    companion = await get_companion_cache().get(room_response.data.get("companion_id"))
+    if not companion:
+        return None
+
+    messages_response = await run_blocking(
+        supabase.table("messages").select("sender_type, content, created_at").eq("room_id", room_id)
+        .order("created_at", desc=True).order("id", desc=True).limit(max_messages).execute
+    )
+    messages = [
+        {"sender_type": msg["sender_type"], "content": msg["content"], "timestamp": msg.get("created_at")}
+        for msg in reversed(messages_response.data or [])
+    ]
+
+    return {"room": room_response.data, "companion": companion, "messages": messages}
+
+class RoomSessionStore:
+    """Per-worker room sessions, created at ``join`` and dropped at ``leave``/``end_call``."""
+
+    def __init__(self, max_messages: int):
+        self.max_messages = max_messages
+        self._sessions: Dict[str, RoomSession] = {}
+
+    async def open(self, room_id: str) -> Optional[RoomSession]:
+        state = await load_room_state(room_id, self.max_messages)
+        if state is None:
+            return None
+
+        session = RoomSession(
+            room_id=room_id,
+            room=state["room"],
+            companion=state["companion"],
+            messages=deque(state["messages"], maxlen=self.max_messages)
+        )
+        self._sessions[room_id] = session
+        return session
+
+    async def get(self, room_id: str) -> Optional[RoomSession]:
+        session = self._sessions.get(room_id)
+        if session is None:
+            session = await self.open(room_id)
+        return session
+
+    async def append_message(self, room_id: str, message: Dict):
+        session = self._sessions.get(room_id)
+        if session is not None:
+            session.messages.append(message)
+
+    async def close(self, room_id: str):
+        self._sessions.pop(room_id, None)
+
+    async def aclose(self):
+        self._sessions.clear()
+
+class RedisRoomSessionStore(RoomSessionStore):
+    """Room sessions shared by every worker through Redis.
+
+    The room and companion rows live in one hash and the recent messages in
+    a capped list; both expire ``ttl_seconds`` after the last write.
+    """
+
+    def __init__(self, redis_url: str, max_messages: int, ttl_seconds: int, prefix: str = "room-session:"):
+        import redis.asyncio as redis
+
+        super().__init__(max_messages)
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def _keys(self, room_id: str):
+        return f"{self.prefix}{room_id}", f"{self.prefix}{room_id}:messages"
+
+    async def open(self, room_id: str) -> Optional[RoomSession]:
+        state = await load_room_state(room_id, self.max_messages)
+        if state is None:
+            return None
+
+        state_key, messages_key = self._keys(room_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(state_key, mapping={"room": json.dumps(state["room"]), "companion": json.dumps(state["companion"])})
+            pipe.delete(messages_key)
+            if state["messages"]:
+                pipe.rpush(messages_key, *[json.dumps(msg) for msg in state["messages"]])
+            pipe.expire(state_key, self.ttl_seconds)
+            pipe.expire(messages_key, self.ttl_seconds)
+            await pipe.execute()
+
+        return RoomSession(room_id, state["room"], state["companion"], deque(state["messages"], maxlen=self.max_messages))
+
+    async def get(self, room_id: str) -> Optional[RoomSession]:
+        state_key, messages_key = self._keys(room_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(state_key)
+            pipe.lrange(messages_key, 0, -1)
+            state, messages = await pipe.execute()
+
+        if not state:
+            return await self.open(room_id)
+
+        return RoomSession(
+            room_id=room_id,
+            room=json.loads(state["room"]),
+            companion=json.loads(state["companion"]),
+            messages=deque((json.loads(msg) for msg in messages), maxlen=self.max_messages)
+        )
+
+    async def append_message(self, room_id: str, message: Dict):
+        state_key, messages_key = self._keys(room_id)
+        if not await self.redis.exists(state_key):
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(messages_key, json.dumps(message))
+            pipe.ltrim(messages_key, -self.max_messages, -1)
+            pipe.expire(messages_key, self.ttl_seconds)
+            pipe.expire(state_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def close(self, room_id: str):
+        await self.redis.delete(*self._keys(room_id))
+
+    async def aclose(self):
+        await self.redis.aclose()
+
+_room_sessions: Optional[RoomSessionStore] = None
+
+def get_room_sessions() -> RoomSessionStore:
+    global _room_sessions
+    if _room_sessions is None:
+        if settings.room_session_backend == "redis":
+            _room_sessions = RedisRoomSessionStore(
+                settings.redis_url,
+                max_messages=settings.room_session_max_messages,
+                ttl_seconds=settings.room_session_ttl_seconds
+            )
+        else:
+            _room_sessions = RoomSessionStore(settings.room_session_max_messages)
+    return _room_sessions
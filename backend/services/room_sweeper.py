@@ -0,0 +1,235 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from config.settings import get_settings
+from services.supabase_client import get_supabase_client
+from services.executor import run_blocking
+from services.did_service import DIDService, get_did_service
+from services.ice_forwarder import get_ice_forwarder
+from services.room_presence import RoomPresence, get_room_presence
+from services.metrics import get_metrics
+
+settings = get_settings()
+
+OPEN_STATUSES = ["waiting", "active"]
+
+SWEEP_SECONDS = get_metrics().histogram("room_sweep_seconds", "Duration of one room expiry sweep")
+ROOMS_ENDED = get_metrics().counter("rooms_reclaimed", "Rooms ended by the sweeper", labels=("reason",))
+STREAMS_DELETED = get_metrics().counter("did_streams_reclaimed", "D-ID streams deleted by the sweeper", labels=("reason",))
+
+class RoomSweeper:
+    """Ends expired and idle rooms and reclaims what they hold.
+
+    Every ``interval`` seconds:
+
+    * rooms past ``expires_at`` that are still waiting/active are ended in
+      bulk updates of up to ``batch_size`` rows;
+    * open rooms older than ``idle_seconds`` are checked against presence,
+      and ended once they have had no members for ``idle_seconds``;
+    * for each room this worker ended, ``on_room_ended(room_id, reason)``
+      tells the signaling layer to notify and drop its sockets and state,
+      and the room's D-ID streams are deleted;
+    * D-ID streams this worker attached to a room are deleted once that
+      room is no longer open or they have outlived any room. Streams it
+      never saw attached are only forgotten, since another worker may be
+      using them.
+
+    Every worker may run a sweeper: the update only matches rooms that are
+    still open, so each room is ended (and announced) once.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        batch_size: int,
+        max_batches: int,
+        idle_seconds: float,
+        on_room_ended: Callable[[str, str], Awaitable] = None,
+        client_factory: Callable = get_supabase_client,
+        did_service: DIDService = None,
+        presence: RoomPresence = None
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.idle_seconds = idle_seconds
+        self.on_room_ended = on_room_ended
+        self.client_factory = client_factory
+        self.did_service = did_service
+        self.presence = presence
+        self._task: Optional[asyncio.Task] = None
+        self._empty_since: Dict[str, float] = {}
+        self.sweeps = 0
+        self.failed_sweeps = 0
+        self.rooms_ended = 0
+        self.streams_deleted = 0
+        self.last_sweep_ms = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.failed_sweeps += 1
+                print(f"Error sweeping rooms: {e}")
+
+    async def sweep(self) -> Dict[str, int]:
+        started = time.perf_counter()
+        try:
+            with SWEEP_SECONDS.time():
+                expired = await self._sweep_expired()
+                idle = await self._sweep_idle()
+                streams = await self._delete_stale_streams()
+            self.sweeps += 1
+            return {"expired": expired, "idle": idle, "streams": streams}
+        finally:
+            self.last_sweep_ms = (time.perf_counter() - started) * 1000
+
+    async def _sweep_expired(self) -> int:
+        supabase = self.client_factory()
+        ended = 0
+        for _ in range(self.max_batches):
+            now = datetime.utcnow().isoformat()
+            response = await run_blocking(
+                supabase.table("video_rooms").select("room_id").in_("status", OPEN_STATUSES)
+                .lt("expires_at", now).order("expires_at").limit(self.batch_size).execute
+            )
+            rows = response.data or []
+            if rows:
+                ended += await self._end_rooms([row["room_id"] for row in rows], "expired")
+            if len(rows) < self.batch_size:
+                break
+        return ended
+
+    async def _sweep_idle(self) -> int:
+        supabase = self.client_factory()
+        presence = self.presence or get_room_presence()
+        cutoff = (datetime.utcnow() - timedelta(seconds=self.idle_seconds)).isoformat()
+        now = time.monotonic()
+        seen = set()
+        idle = []
+
+        after = None
+        for _ in range(self.max_batches):
+            query = supabase.table("video_rooms").select("room_id, created_at").in_("status", OPEN_STATUSES).lt("created_at", cutoff)
+            if after:
+                # Seek past (created_at, room_id) so rooms sharing a timestamp
+                # across a page boundary are not skipped.
+                created_at, room_id = after
+                query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",room_id.gt."{room_id}")')
+            response = await run_blocking(query.order("created_at").order("room_id").limit(self.batch_size).execute)
+            rows = response.data or []
+
+            for row in rows:
+                room_id = row["room_id"]
+                seen.add(room_id)
+                if await presence.members(room_id):
+                    self._empty_since.pop(room_id, None)
+                elif now - self._empty_since.setdefault(room_id, now) >= self.idle_seconds:
+                    idle.append(room_id)
+
+            if len(rows) < self.batch_size:
+                break
+            after = (rows[-1]["created_at"], rows[-1]["room_id"])
+
+        # Forget rooms that have since ended some other way.
+        for room_id in [room_id for room_id in self._empty_since if room_id not in seen]:
+            del self._empty_since[room_id]
+
+        ended = 0
+        for i in range(0, len(idle), self.batch_size):
+            ended += await self._end_rooms(idle[i:i + self.batch_size], "idle")
+        return ended
+
+    async def _end_rooms(self, room_ids: List[str], reason: str) -> int:
+        supabase = self.client_factory()
+        response = await run_blocking(
+            supabase.table("video_rooms").update({
+                "status": "ended",
+                "ended_at": datetime.utcnow().isoformat()
+            }).in_("room_id", room_ids).in_("status", OPEN_STATUSES).execute
+        )
+        # Only rooms this update actually changed; another worker may have
+        # ended the rest a moment earlier.
+        ended = [row["room_id"] for row in response.data or []]
+
+        did_service = self.did_service or get_did_service()
+        for room_id in ended:
+            self._empty_since.pop(room_id, None)
+            if self.on_room_ended:
+                try:
+                    await self.on_room_ended(room_id, reason)
+                except Exception as e:
+                    print(f"Error closing room {room_id}: {e}")
+            for stream_id in did_service.streams_for_room(room_id):
+                await self._delete_stream(stream_id, "room_ended")
+
+        self.rooms_ended += len(ended)
+        if ended:
+            ROOMS_ENDED.inc(len(ended), reason=reason)
+        return len(ended)
+
+    async def _delete_stale_streams(self) -> int:
+        did_service = self.did_service or get_did_service()
+        did_service.forget_unattached(settings.did_stream_unattached_seconds)
+        stale = set(did_service.stale_streams(settings.did_stream_max_age_seconds))
+
+        # Streams attached to rooms that were ended some other way (end_call).
+        attached_rooms = {entry["room_id"] for entry in did_service.streams.values() if entry["room_id"]}
+        if attached_rooms:
+            supabase = self.client_factory()
+            response = await run_blocking(
+                supabase.table("video_rooms").select("room_id").in_("room_id", list(attached_rooms))
+                .in_("status", OPEN_STATUSES).execute
+            )
+            open_rooms = {row["room_id"] for row in response.data or []}
+            for room_id in attached_rooms - open_rooms:
+                stale.update(did_service.streams_for_room(room_id))
+
+        deleted = 0
+        for stream_id in stale:
+            deleted += await self._delete_stream(stream_id, "stale")
+        return deleted
+
+    async def _delete_stream(self, stream_id: str, reason: str) -> bool:
+        get_ice_forwarder().forget(stream_id)
+        deleted = await (self.did_service or get_did_service()).delete_stream(stream_id)
+        if deleted:
+            self.streams_deleted += 1
+            STREAMS_DELETED.inc(reason=reason)
+        return deleted
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "sweeps": self.sweeps,
+            "failed_sweeps": self.failed_sweeps,
+            "rooms_ended": self.rooms_ended,
+            "streams_deleted": self.streams_deleted,
+            "idle_candidates": len(self._empty_since),
+            "last_sweep_ms": round(self.last_sweep_ms, 2),
+        }
+
+_room_sweeper: Optional[RoomSweeper] = None
+
+def get_room_sweeper() -> RoomSweeper:
+    global _room_sweeper
+    if _room_sweeper is None:
+        _room_sweeper = RoomSweeper(
+            interval=settings.room_sweep_interval_seconds,
+            batch_size=settings.room_sweep_batch_size,
+            max_batches=settings.room_sweep_max_batches,
+            idle_seconds=settings.room_idle_seconds
+        )
+    return _room_sweeper
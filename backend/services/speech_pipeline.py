@@ -0,0 +1,190 @@
+import asyncio
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from config.settings import get_settings
+from services.did_service import DIDService, get_did_service
+from services.metrics import get_metrics
+
+settings = get_settings()
+
+# Sentence-ending punctuation (plus closing quotes/brackets) followed by
+# whitespace, or a line break. Requiring the whitespace keeps "3.5" and
+# "e.g" from ending a sentence mid-stream.
+_SENTENCE_END = re.compile(r"""[.!?…]+["'”’)\]]*\s+|\n+""")
+
+FIRST_SENTENCE_SECONDS = get_metrics().histogram(
+    "speech_first_sentence_seconds",
+    "Time from the start of a reply until D-ID accepted its first sentence"
+)
+SENTENCES = get_metrics().counter("speech_sentences", "Reply sentences by outcome", labels=("outcome",))
+
+def split_sentences(text: str, min_chars: int, max_chars: int) -> Tuple[List[str], str]:
+    """Split complete sentences off the front of ``text``; returns ``(sentences, remainder)``.
+
+    Fragments shorter than ``min_chars`` ("Dr.", "Oh!") are kept with the
+    next sentence. A remainder longer than ``max_chars`` without a boundary
+    is cut at its last comma or space so a run-on clause doesn't hold up
+    speech.
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        sentence = text[start:match.end()].strip()
+        if len(sentence) < min_chars:
+            continue
+        sentences.append(sentence)
+        start = match.end()
+
+    rest = text[start:].lstrip()
+    while len(rest) > max_chars:
+        cut = rest.rfind(", ", 0, max_chars) + 1 or rest.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        sentences.append(rest[:cut].strip())
+        rest = rest[cut:].lstrip()
+    return sentences, rest
+
+class SpeechPipeline:
+    """Speaks a streamed reply on a D-ID stream one sentence at a time.
+
+    ``feed`` takes text deltas as the model produces them and queues each
+    completed sentence; a single worker sends them to ``stream_text`` in
+    order. At most ``max_pending`` sentences wait in the queue, after which
+    ``feed`` blocks, so a slow D-ID stream holds back the producer instead
+    of buffering the whole reply. ``cancel`` drops everything not yet sent.
+    """
+
+    def __init__(
+        self,
+        did_service: DIDService,
+        stream_id: str,
+        voice_id: str = None,
+        max_pending: int = 2,
+        min_chars: int = 12,
+        max_chars: int = 240
+    ):
+        self.did_service = did_service
+        self.stream_id = stream_id
+        self.voice_id = voice_id
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.cancelled = False
+        self._buffer = ""
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(max_pending, 1))
+        self._started = time.perf_counter()
+        self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            sentence = await self._queue.get()
+            if sentence is None:
+                return
+
+            if await self.did_service.stream_text(self.stream_id, sentence, self.voice_id):
+                if not self.sent:
+                    FIRST_SENTENCE_SECONDS.observe(time.perf_counter() - self._started)
+                self.sent += 1
+                SENTENCES.inc(outcome="sent")
+            else:
+                self.failed += 1
+                SENTENCES.inc(outcome="failed")
+
+    async def _put(self, item: Optional[str]):
+        if self.cancelled:
+            return
+        await self._queue.put(item)
+        if self.cancelled:
+            self._drain()
+
+    def _drain(self):
+        while not self._queue.empty():
+            if self._queue.get_nowait() is not None:
+                self.dropped += 1
+                SENTENCES.inc(outcome="cancelled")
+
+    async def feed(self, delta: str):
+        if self.cancelled:
+            return
+        self._buffer += delta
+        sentences, self._buffer = split_sentences(self._buffer, self.min_chars, self.max_chars)
+        for sentence in sentences:
+            await self._put(sentence)
+
+    async def finish(self):
+        """Send whatever is left of the reply and wait until every sentence has been dispatched."""
+        if self._buffer.strip():
+            await self._put(self._buffer.strip())
+        self._buffer = ""
+        await self._put(None)
+        await asyncio.gather(self._worker, return_exceptions=True)
+
+    async def cancel(self):
+        if self.cancelled:
+            return
+        self.cancelled = True
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._drain()
+        if self._buffer.strip():
+            self.dropped += 1
+            SENTENCES.inc(outcome="cancelled")
+        self._buffer = ""
+
+class SpeechPipelines:
+    """The pipeline currently speaking in each room.
+
+    Starting a new reply or interrupting a room cancels the sentences the
+    previous reply has not sent yet.
+    """
+
+    def __init__(self, did_service: DIDService = None):
+        self.did_service = did_service
+        self._pipelines: Dict[str, SpeechPipeline] = {}
+        self.interrupted = 0
+
+    async def start(self, room_id: str, stream_id: str, voice_id: str = None) -> SpeechPipeline:
+        await self.interrupt(room_id)
+        pipeline = SpeechPipeline(
+            self.did_service or get_did_service(),
+            stream_id,
+            voice_id,
+            max_pending=settings.speech_max_pending_sentences,
+            min_chars=settings.speech_min_sentence_chars,
+            max_chars=settings.speech_max_sentence_chars
+        )
+        self._pipelines[room_id] = pipeline
+        return pipeline
+
+    async def end(self, room_id: str, pipeline: SpeechPipeline, cancel: bool = False):
+        if cancel:
+            await pipeline.cancel()
+        else:
+            await pipeline.finish()
+        if self._pipelines.get(room_id) is pipeline:
+            del self._pipelines[room_id]
+
+    async def interrupt(self, room_id: str) -> bool:
+        pipeline = self._pipelines.pop(room_id, None)
+        if pipeline is None:
+            return False
+        await pipeline.cancel()
+        self.interrupted += 1
+        return True
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "active": len(self._pipelines),
+            "interrupted": self.interrupted,
+        }
+
+_speech_pipelines: Optional[SpeechPipelines] = None
+
+def get_speech_pipelines() -> SpeechPipelines:
+    global _speech_pipelines
+    if _speech_pipelines is None:
+        _speech_pipelines = SpeechPipelines()
+    return _speech_pipelines
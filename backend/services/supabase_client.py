@@ -1,21 +1,28 @@
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Optional
 from config.settings import get_settings
-import sys
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 settings = get_settings()
 
-try:
+_supabase: Optional["Client"] = None
+
+def create_supabase_client() -> "Client":
     if not settings.supabase_url or not settings.supabase_service_key:
         print("ERROR: Supabase URL or Service Key not configured!")
         print(f"SUPABASE_URL: {'Set' if settings.supabase_url else 'NOT SET'}")
         print(f"SUPABASE_SERVICE_KEY: {'Set' if settings.supabase_service_key else 'NOT SET'}")
-        sys.exit(1)
+        raise RuntimeError("Supabase URL or Service Key not configured")
+
+    from supabase import create_client
 
-    supabase: Client = create_client(settings.supabase_url, settings.supabase_service_key)
-    print("Supabase client initialized successfully")
-except Exception as e:
-    print(f"ERROR: Failed to initialize Supabase client: {e}")
-    sys.exit(1)
+    return create_client(settings.supabase_url, settings.supabase_service_key)
 
-def get_supabase_client() -> Client:
-    return supabase
+def get_supabase_client() -> "Client":
+    """Shared Supabase client, created on first use (normally the app lifespan)."""
+    global _supabase
+    if _supabase is None:
+        _supabase = create_supabase_client()
+        print("Supabase client initialized successfully")
+    return _supabase
@@ -0,0 +1,240 @@
+import hashlib
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+from config.settings import get_settings
+from services.executor import run_blocking
+from services.llm_admission import RedisTokenBuckets, TokenBuckets
+from services.metrics import get_metrics
+
+settings = get_settings()
+
+READ_CHUNK_SIZE = 64 * 1024
+
+FIRST_AUDIO_SECONDS = get_metrics().histogram(
+    "tts_first_audio_seconds",
+    "Time until the first audio chunk of a TTS request is available",
+    labels=("source",)
+)
+
+# ElevenLabs output format prefix -> Content-Type. pcm_* is raw 16-bit
+# little-endian mono at the rate in the format name.
+MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "ulaw": "audio/basic",
+    "opus": "audio/ogg",
+}
+
+def audio_media_type(output_format: str) -> str:
+    codec, _, rest = output_format.partition("_")
+    if codec == "pcm":
+        return f"audio/pcm;rate={rest.split('_')[0]}"
+    return MEDIA_TYPES.get(codec, "application/octet-stream")
+
+def create_elevenlabs_client():
+    from elevenlabs.client import AsyncElevenLabs
+
+    return AsyncElevenLabs(api_key=settings.elevenlabs_api_key)
+
+class AudioCache:
+    """Content-addressed audio files on local disk with a size-bounded LRU.
+
+    Files are named by the SHA-256 of what produced them (text, voice,
+    model, format) and fanned out into two-character directories. Recency
+    is tracked in memory and seeded from file mtimes at startup; hits touch
+    the file so the order survives restarts. A file only appears once its
+    audio has been written completely.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+        self._scan()
+
+    @staticmethod
+    def key(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+        return hashlib.sha256(f"{voice_id}\0{model_id}\0{output_format}\0{text}".encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _scan(self):
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    os.remove(os.path.join(dirpath, name))
+                    continue
+                stat = os.stat(os.path.join(dirpath, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self.total_bytes += size
+
+    def lookup(self, key: str) -> Optional[str]:
+        if key in self._files and os.path.exists(self.path(key)):
+            self._files.move_to_end(key)
+            self.hits += 1
+            try:
+                os.utime(self.path(key))
+            except OSError:
+                pass
+            return self.path(key)
+
+        if key in self._files:
+            self.total_bytes -= self._files.pop(key)
+        self.misses += 1
+        return None
+
+    def open_writer(self, key: str) -> Tuple[str, object]:
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(self.path(key)))
+        return tmp_path, os.fdopen(fd, "wb")
+
+    def commit(self, key: str, tmp_path: str, size: int):
+        os.replace(tmp_path, self.path(key))
+        self.total_bytes += size - self._files.get(key, 0)
+        self._files[key] = size
+        self._files.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._files:
+            key, size = self._files.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def metrics(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "files": len(self._files),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class TTSService:
+    """ElevenLabs speech as an async stream of audio chunks, backed by ``AudioCache``.
+
+    A miss streams chunks to the caller as ElevenLabs produces them while
+    teeing them into the cache; a hit streams the cached file. Audio from
+    an interrupted or failed synthesis is never cached.
+    """
+
+    def __init__(self, cache: AudioCache, client_factory: Callable = create_elevenlabs_client):
+        self.cache = cache
+        self.client_factory = client_factory
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    @property
+    def media_type(self) -> str:
+        return audio_media_type(settings.tts_output_format)
+
+    def cache_key(self, text: str, voice_id: str) -> str:
+        return self.cache.key(text, voice_id, settings.tts_model_id, settings.tts_output_format)
+
+    def is_cached(self, text: str, voice_id: str) -> bool:
+        return os.path.exists(self.cache.path(self.cache_key(text, voice_id)))
+
+    async def _read_cached(self, path: str) -> AsyncIterator[bytes]:
+        with open(path, "rb") as f:
+            while True:
+                chunk = await run_blocking(f.read, READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def _synthesize(self, text: str, voice_id: str, key: str) -> AsyncIterator[bytes]:
+        tmp_path, out = self.cache.open_writer(key)
+        size = 0
+        complete = False
+        try:
+            async for chunk in self.client.text_to_speech.convert_as_stream(
+                voice_id,
+                text=text,
+                model_id=settings.tts_model_id,
+                output_format=settings.tts_output_format
+            ):
+                if not chunk:
+                    continue
+                await run_blocking(out.write, chunk)
+                size += len(chunk)
+                yield chunk
+            complete = True
+        finally:
+            out.close()
+            if complete and size:
+                self.cache.commit(key, tmp_path, size)
+            else:
+                os.remove(tmp_path)
+
+    async def stream(self, text: str, voice_id: str) -> AsyncIterator[bytes]:
+        key = self.cache_key(text, voice_id)
+        path = self.cache.lookup(key)
+        source = "cache" if path else "api"
+        chunks = self._read_cached(path) if path else self._synthesize(text, voice_id, key)
+
+        started = time.perf_counter()
+        first = True
+        try:
+            async for chunk in chunks:
+                if first:
+                    FIRST_AUDIO_SECONDS.observe(time.perf_counter() - started, source=source)
+                    first = False
+                yield chunk
+        finally:
+            # Close the inner generator now, so a listener hanging up
+            # mid-clip discards the partial file instead of leaving it to GC.
+            await chunks.aclose()
+
+    async def synthesize(self, text: str, voice_id: str) -> bytes:
+        return b"".join([chunk async for chunk in self.stream(text, voice_id)])
+
+_tts_service: Optional[TTSService] = None
+_tts_rate_limiter: Optional[TokenBuckets] = None
+
+def get_tts_service() -> TTSService:
+    global _tts_service
+    if _tts_service is None:
+        root = settings.tts_cache_dir or os.path.join(tempfile.gettempdir(), "tts-cache")
+        _tts_service = TTSService(AudioCache(root, max_bytes=settings.tts_cache_max_mb * 1024 * 1024))
+    return _tts_service
+
+def get_tts_rate_limiter() -> TokenBuckets:
+    """Per-user buckets of uncached syntheses, shared through Redis with ``LLM_ADMISSION_BACKEND=redis``."""
+    global _tts_rate_limiter
+    if _tts_rate_limiter is None:
+        rate = settings.tts_user_rate_per_minute / 60
+        if settings.llm_admission_backend == "redis":
+            import redis.asyncio as redis
+
+            _tts_rate_limiter = RedisTokenBuckets(
+                redis.from_url(settings.redis_url, decode_responses=True),
+                rate,
+                settings.tts_user_burst,
+                prefix="tts:bucket:"
+            )
+        else:
+            _tts_rate_limiter = TokenBuckets(rate, settings.tts_user_burst, max_keys=settings.memory_max_keys)
+    return _tts_rate_limiter
@@ -0,0 +1,33 @@
+import asyncio
+
+from benchmarks.fakes import FakeGeminiModel
+from services.ai_service import AIService
+from services.llm_admission import LLMAdmission
+from services.memory_service import MemoryService
+from services.memory_store import InProcessMemoryStore
+
+COMPANION = {"id": "test", "name": "Ava", "personality": "warm", "description": "test companion", "specialties": []}
+
+
+def test_slow_stream_consumer_does_not_hold_the_admission_slot():
+    async def scenario():
+        admission = LLMAdmission(max_concurrent=1, max_queue=10, queue_timeout=5.0)
+        service = AIService(
+            model=FakeGeminiModel("one two three four five", first_token_delay=0.01, token_delay=0.001),
+            memory_service=MemoryService(store=InProcessMemoryStore(max_items=10, ttl_seconds=60, max_keys=10)),
+            admission=admission
+        )
+        service.response_cache = None
+
+        chunks = []
+        async for chunk in service.stream_response("hi", COMPANION, "room", "user", []):
+            chunks.append(chunk)
+            # Emits and speech backpressure happen here, outside the slot.
+            await asyncio.sleep(0.05)
+        await admission.close()
+        return "".join(chunks), admission.metrics()
+
+    reply, metrics = asyncio.run(scenario())
+    assert reply.split() == ["one", "two", "three", "four", "five"]
+    assert metrics["active"] == 0
+    assert metrics["avg_call_ms"] < 50
@@ -0,0 +1,49 @@
+import base64
+import json
+import time
+
+import pytest
+from jose import JWTError, jwt
+
+from utils.auth import decode_hs256
+
+SECRET = "test-secret"
+
+
+def token(claims, secret=SECRET, algorithm="HS256"):
+    return jwt.encode(claims, secret, algorithm=algorithm)
+
+
+def segment(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_valid_token_returns_its_claims():
+    claims = {"sub": "user-1", "aud": "authenticated", "exp": time.time() + 60}
+    assert decode_hs256(token(claims), SECRET) == claims
+
+
+def test_token_without_audience_is_accepted():
+    assert decode_hs256(token({"sub": "user-1"}), SECRET)["sub"] == "user-1"
+
+
+@pytest.mark.parametrize("bad_token, secret", [
+    (token({"sub": "user-1"}, secret="other-secret"), SECRET),
+    (token({"sub": "user-1", "exp": time.time() - 1}), SECRET),
+    (token({"sub": "user-1", "nbf": time.time() + 60}), SECRET),
+    (token({"sub": "user-1", "aud": "someone-else"}), SECRET),
+    (token({"sub": "user-1"}, algorithm="HS512"), SECRET),
+    (token({"sub": "user-1"}), ""),
+    ("not-a-token", SECRET),
+    (f"{segment([])}.{segment({'sub': 'user-1'})}.c2ln", SECRET),
+    (f"{segment({'alg': 'HS256'})}.{segment('user-1')}.c2ln", SECRET),
+])
+def test_invalid_tokens_are_rejected(bad_token, secret):
+    with pytest.raises(JWTError):
+        decode_hs256(bad_token, secret)
+
+
+def test_agrees_with_python_jose():
+    claims = {"sub": "user-1", "aud": ["authenticated", "other"], "exp": int(time.time()) + 60}
+    encoded = token(claims)
+    assert decode_hs256(encoded, SECRET) == jwt.decode(encoded, SECRET, algorithms=["HS256"], audience="authenticated")
@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis.aioredis
+
+import services.companion_cache as companion_cache
+from services.companion_cache import RedisCompanionCache
+
+
+class FakeCompanionsQuery:
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def select(self, *args):
+        return self
+
+    def eq(self, *args):
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=list(self.catalog))
+
+
+def test_invalidate_reaches_other_workers(monkeypatch):
+    catalog = [{"id": "ava", "name": "Ava"}]
+    client = SimpleNamespace(table=lambda name: FakeCompanionsQuery(catalog))
+    monkeypatch.setattr(companion_cache, "get_supabase_client", lambda: client)
+
+    async def scenario():
+        redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        syncing = RedisCompanionCache("redis://localhost:6379", ttl_seconds=300)
+        other = RedisCompanionCache("redis://localhost:6379", ttl_seconds=300)
+        syncing.redis = other.redis = redis
+
+        before = await other.get("ava")
+        catalog[0] = {"id": "ava", "name": "Ava 2"}
+        cached = await other.get("ava")
+        await syncing.invalidate()
+        after = await other.get("ava")
+        return before, cached, after, other.misses
+
+    before, cached, after, misses = asyncio.run(scenario())
+    assert before["name"] == "Ava"
+    assert cached["name"] == "Ava"
+    assert after["name"] == "Ava 2"
+    assert misses == 2
@@ -0,0 +1,28 @@
+import asyncio
+import threading
+
+from services.executor import BlockingExecutor
+
+
+def test_cancelled_queued_jobs_leave_the_queue_depth():
+    async def scenario():
+        executor = BlockingExecutor(max_workers=1)
+        release = threading.Event()
+        running = asyncio.create_task(executor.run(release.wait))
+        queued = [asyncio.create_task(executor.run(lambda: None)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        depth_while_queued = executor.queue_depth
+
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        release.set()
+        await running
+        executor.shutdown()
+        return depth_while_queued, executor.metrics()
+
+    depth_while_queued, metrics = asyncio.run(scenario())
+    assert depth_while_queued == 3
+    assert metrics["queue_depth"] == 0
+    assert metrics["active"] == 0
+    assert metrics["completed"] == 1
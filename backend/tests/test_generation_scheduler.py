@@ -0,0 +1,90 @@
+import asyncio
+
+from services.generation_scheduler import GenerationScheduler, merge_messages
+
+
+def test_failed_generation_still_delivers_its_messages_without_a_reply():
+    async def scenario():
+        scheduler = GenerationScheduler(debounce_seconds=0.01)
+        delivered = []
+
+        async def generate(batch):
+            raise RuntimeError("model unavailable")
+
+        async def deliver(batch, reply):
+            delivered.append((batch, reply))
+
+        await scheduler.submit("room", "hello", generate, deliver)
+        await asyncio.sleep(0.05)
+        return delivered, scheduler.metrics()
+
+    delivered, metrics = asyncio.run(scenario())
+    assert delivered == [(["hello"], None)]
+    assert metrics["failed"] == 1
+    assert metrics["generations"] == 0
+
+
+def test_burst_is_answered_once_with_every_message():
+    async def scenario():
+        scheduler = GenerationScheduler(debounce_seconds=0.02)
+        generated, delivered = [], []
+
+        async def generate(batch):
+            generated.append(list(batch))
+            return merge_messages(batch)
+
+        async def deliver(batch, reply):
+            delivered.append(reply)
+
+        for message in ["hi", "are you there?", "hello"]:
+            await scheduler.submit("room", message, generate, deliver)
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.1)
+        return generated, delivered
+
+    generated, delivered = asyncio.run(scenario())
+    assert generated == [["hi", "are you there?", "hello"]]
+    assert delivered == ["hi\nare you there?\nhello"]
+
+
+def test_newer_message_cancels_the_reply_in_progress():
+    async def scenario():
+        scheduler = GenerationScheduler(debounce_seconds=0.01)
+        delivered = []
+
+        async def generate(batch):
+            await asyncio.sleep(0.05)
+            return merge_messages(batch)
+
+        async def deliver(batch, reply):
+            delivered.append(reply)
+
+        await scheduler.submit("room", "first", generate, deliver)
+        await asyncio.sleep(0.03)
+        await scheduler.submit("room", "second", generate, deliver)
+        await asyncio.sleep(0.15)
+        return delivered, scheduler.metrics()
+
+    delivered, metrics = asyncio.run(scenario())
+    assert delivered == ["first\nsecond"]
+    assert metrics["cancelled"] == 1
+    assert metrics["rooms"] == 0
+
+
+def test_cancel_drops_queued_messages():
+    async def scenario():
+        scheduler = GenerationScheduler(debounce_seconds=0.05)
+        delivered = []
+
+        async def generate(batch):
+            return merge_messages(batch)
+
+        async def deliver(batch, reply):
+            delivered.append(reply)
+
+        await scheduler.submit("room", "hello", generate, deliver)
+        await scheduler.cancel("room")
+        await asyncio.sleep(0.1)
+        return delivered
+
+    assert asyncio.run(scenario()) == []
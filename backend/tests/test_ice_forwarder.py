@@ -0,0 +1,57 @@
+import asyncio
+
+from services.ice_forwarder import IceCandidateForwarder
+
+
+class FakeDIDService:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.ended = []
+
+    async def send_ice_candidate(self, stream_id, candidate, sdp_mid, sdp_m_line_index):
+        await asyncio.sleep(self.delay)
+        self.sent.append(candidate["candidate"])
+        return True
+
+    async def send_end_of_candidates(self, stream_id):
+        self.ended.append(stream_id)
+        return True
+
+
+def candidate(n):
+    return {"candidate": {"candidate": f"candidate {n}"}, "sdp_mid": "0", "sdp_m_line_index": 0}
+
+
+def test_duplicates_are_acknowledged_without_another_request():
+    did = FakeDIDService()
+
+    async def scenario():
+        forwarder = IceCandidateForwarder(did, window_seconds=0.01, max_concurrency=2)
+        first = await forwarder.submit("stream", [candidate(1), candidate(2), candidate(1)])
+        second = await forwarder.submit("stream", [candidate(2)], end_of_candidates=True)
+        return first, second, forwarder.metrics()
+
+    first, second, metrics = asyncio.run(scenario())
+    assert first == [True, True, True] and second == [True]
+    assert sorted(did.sent) == ["candidate 1", "candidate 2"]
+    assert did.ended == ["stream"]
+    assert metrics["deduplicated"] == 2
+    assert metrics["streams"] == 0
+
+
+def test_close_cancels_in_flight_flushes():
+    did = FakeDIDService(delay=10)
+
+    async def scenario():
+        forwarder = IceCandidateForwarder(did, window_seconds=0, max_concurrency=2)
+        waiting = asyncio.create_task(forwarder.submit("stream", [candidate(1)]))
+        await asyncio.sleep(0.01)
+        in_flight = len(forwarder._flushes)
+        await forwarder.close()
+        return await waiting, in_flight, len(forwarder._flushes)
+
+    results, in_flight, left = asyncio.run(asyncio.wait_for(scenario(), 2))
+    assert results == [False]
+    assert in_flight == 1
+    assert left == 0
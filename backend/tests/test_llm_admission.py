@@ -0,0 +1,104 @@
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from services.llm_admission import AdmissionRejected, LLMAdmission, RedisTokenBuckets, TokenBuckets
+
+
+def in_process_buckets(rate, burst):
+    return TokenBuckets(rate=rate, burst=burst)
+
+
+def redis_buckets(rate, burst):
+    return RedisTokenBuckets(fakeredis.aioredis.FakeRedis(decode_responses=True), rate=rate, burst=burst)
+
+
+@pytest.mark.parametrize("make_buckets", [in_process_buckets, redis_buckets])
+def test_bucket_allows_a_burst_then_rate_limits(make_buckets):
+    async def scenario():
+        buckets = make_buckets(rate=1.0, burst=2)
+        waits = [await buckets.take("user") for _ in range(3)]
+        other = await buckets.take("other")
+        await buckets.close()
+        return waits, other
+
+    waits, other = asyncio.run(scenario())
+    assert waits[:2] == [0.0, 0.0]
+    assert 0 < waits[2] <= 1.0
+    assert other == 0.0
+
+
+def test_user_over_the_rate_limit_is_rejected():
+    async def scenario():
+        admission = LLMAdmission(max_concurrent=4, max_queue=4, queue_timeout=1.0, buckets=TokenBuckets(rate=0.1, burst=1))
+        async with admission.slot("user"):
+            pass
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.slot("user"):
+                pass
+        # Calls without a user (summaries) are not rate limited.
+        async with admission.slot(None, "background"):
+            pass
+        await admission.close()
+        return rejected.value, admission.metrics()
+
+    rejected, metrics = asyncio.run(scenario())
+    assert rejected.reason == "rate_limited"
+    assert rejected.retry_after > 0
+    assert metrics["admitted"] == 2
+
+
+def test_voice_is_admitted_before_text_once_a_slot_frees():
+    async def scenario():
+        admission = LLMAdmission(max_concurrent=1, max_queue=4, queue_timeout=1.0)
+        order = []
+
+        async def call(user_id, priority):
+            async with admission.slot(user_id, priority):
+                order.append(priority)
+
+        lease = await admission.acquire("holder")
+        text = asyncio.create_task(call("a", "text"))
+        await asyncio.sleep(0)
+        voice = asyncio.create_task(call("b", "voice"))
+        await asyncio.sleep(0)
+        await admission.release(lease)
+        await asyncio.gather(text, voice)
+        await admission.close()
+        return order, admission.metrics()
+
+    order, metrics = asyncio.run(scenario())
+    assert order == ["voice", "text"]
+    assert metrics["active"] == 0
+
+
+def test_full_queue_rejects_new_calls():
+    async def scenario():
+        admission = LLMAdmission(max_concurrent=1, max_queue=1, queue_timeout=1.0)
+        lease = await admission.acquire("holder")
+        waiting = asyncio.create_task(admission.acquire("a"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("b")
+        await admission.release(lease)
+        await admission.release(await waiting)
+        await admission.close()
+        return rejected.value
+
+    assert asyncio.run(scenario()).reason == "queue_full"
+
+
+def test_waiter_past_the_queue_timeout_is_rejected():
+    async def scenario():
+        admission = LLMAdmission(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+        lease = await admission.acquire("holder")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("a")
+        await admission.release(lease)
+        await admission.close()
+        return rejected.value, admission.metrics()
+
+    rejected, metrics = asyncio.run(scenario())
+    assert rejected.reason == "deadline"
+    assert metrics["waiting"] == 0
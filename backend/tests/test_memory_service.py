@@ -0,0 +1,76 @@
+import asyncio
+
+from services.conversation_summarizer import ConversationSummarizer
+from services.memory_service import MemoryService
+from services.memory_store import InProcessMemoryStore
+
+
+def test_semantic_context_is_rebuilt_from_the_store_on_a_new_worker():
+    async def scenario():
+        store = InProcessMemoryStore(max_items=50, ttl_seconds=3600, max_keys=10)
+        writer = MemoryService(store=store)
+        await writer.store_interaction("user", "companion", "room", "My job interview is on Friday", "Good luck!")
+        await writer.store_interaction("user", "companion", "room", "I went hiking in the Alps", "Sounds lovely")
+
+        # A restarted (or different) worker shares the store but not the index.
+        reader = MemoryService(store=store)
+        context = await reader.get_context("user", "companion", limit=1, query="how did the job interview go?")
+        return context, reader.index.size("user_companion")
+
+    context, indexed = asyncio.run(scenario())
+    assert [memory["user_message"] for memory in context] == ["My job interview is on Friday"]
+    assert indexed == 2
+
+
+def test_index_is_capped_like_the_store():
+    service = MemoryService(store=InProcessMemoryStore(max_items=50, ttl_seconds=3600, max_keys=10))
+    assert service.index.max_items == service.memory_store.max_items == 50
+
+
+def test_rolling_summary_is_kept_in_the_store():
+    async def summarize(prompt):
+        return "The user has a job interview on Friday."
+
+    async def scenario():
+        store = InProcessMemoryStore(max_items=50, ttl_seconds=3600, max_keys=10)
+        writer = MemoryService(store=store, summarizer=ConversationSummarizer(summarize, every=2))
+        await writer.store_interaction("user", "companion", "room", "My job interview is on Friday", "Good luck!")
+        await writer.store_interaction("user", "companion", "room", "I am nervous", "You'll do great")
+        await asyncio.gather(*writer.summarizer._tasks)
+        await writer.store_interaction("user", "companion", "room", "Any tips?", "Breathe")
+
+        # Another worker (or this one after a restart) reads it from the store.
+        reader = MemoryService(store=store, summarizer=ConversationSummarizer(summarize, every=2))
+        return await reader.get_rolling_summary("user", "companion")
+
+    summary, pending = asyncio.run(scenario())
+    assert summary == "The user has a job interview on Friday."
+    assert [memory["user_message"] for memory in pending] == ["Any tips?"]
+
+
+def test_warm_index_picks_up_interactions_written_by_another_worker():
+    async def scenario():
+        store = InProcessMemoryStore(max_items=50, ttl_seconds=3600, max_keys=10)
+        this_worker = MemoryService(store=store)
+        other_worker = MemoryService(store=store)
+        await this_worker.store_interaction("user", "companion", "room", "I went hiking in the Alps", "Sounds lovely")
+        await this_worker.get_context("user", "companion", limit=1, query="hiking")
+
+        await other_worker.store_interaction("user", "companion", "room", "My job interview is on Friday", "Good luck!")
+        return await this_worker.get_context("user", "companion", limit=1, query="how did the job interview go?")
+
+    context = asyncio.run(scenario())
+    assert [memory["user_message"] for memory in context] == ["My job interview is on Friday"]
+
+
+def test_index_forgets_what_the_store_expired():
+    async def scenario():
+        store = InProcessMemoryStore(max_items=50, ttl_seconds=3600, max_keys=10)
+        service = MemoryService(store=store)
+        await service.store_interaction("user", "companion", "room", "I went hiking in the Alps", "Sounds lovely")
+        await store.clear("user_companion")
+        return await service.get_context("user", "companion", limit=1, query="hiking"), service.index.size("user_companion")
+
+    context, indexed = asyncio.run(scenario())
+    assert context == []
+    assert indexed == 0
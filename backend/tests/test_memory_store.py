@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from services.memory_store import InProcessMemoryStore, MemoryStore, RedisMemoryStore
+
+
+def in_process_store(max_items=3, ttl_seconds=60, max_keys=10):
+    return InProcessMemoryStore(max_items=max_items, ttl_seconds=ttl_seconds, max_keys=max_keys)
+
+
+def redis_store(max_items=3, ttl_seconds=60):
+    store = RedisMemoryStore("redis://localhost:6379", max_items=max_items, ttl_seconds=ttl_seconds)
+    store.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return store
+
+
+STORES = [in_process_store, redis_store]
+
+
+def entry(i):
+    return {"user_message": f"message {i}", "ai_response": f"reply {i}"}
+
+
+def test_memory_store_is_abstract():
+    with pytest.raises(TypeError):
+        MemoryStore()
+
+
+@pytest.mark.parametrize("make_store", STORES)
+def test_recent_returns_newest_entries_oldest_first(make_store):
+    async def scenario():
+        store = make_store()
+        for i in range(5):
+            await store.append("user_companion", entry(i))
+        recent = await store.recent("user_companion", 2)
+        everything = await store.recent("user_companion", 10)
+        await store.close()
+        return recent, everything
+
+    recent, everything = asyncio.run(scenario())
+    assert recent == [entry(3), entry(4)]
+    # Capped at max_items.
+    assert everything == [entry(2), entry(3), entry(4)]
+
+
+@pytest.mark.parametrize("make_store", STORES)
+@pytest.mark.parametrize("limit", [0, -1])
+def test_recent_without_a_positive_limit_is_empty(make_store, limit):
+    async def scenario():
+        store = make_store()
+        await store.append("user_companion", entry(0))
+        result = await store.recent("user_companion", limit)
+        await store.close()
+        return result
+
+    assert asyncio.run(scenario()) == []
+
+
+@pytest.mark.parametrize("make_store", STORES)
+def test_keys_are_independent_and_clear_removes_one(make_store):
+    async def scenario():
+        store = make_store()
+        await store.append("a", entry(1))
+        await store.append("b", entry(2))
+        await store.clear("a")
+        result = await store.recent("a", 5), await store.recent("b", 5), await store.recent("missing", 5)
+        await store.close()
+        return result
+
+    assert asyncio.run(scenario()) == ([], [entry(2)], [])
+
+
+def test_redis_store_sets_and_refreshes_ttl():
+    async def scenario():
+        store = redis_store(ttl_seconds=30)
+        await store.append("a", entry(1))
+        after_append = await store.redis.ttl("memory:a")
+        await store.redis.expire("memory:a", 5)
+        await store.recent("a", 1)
+        after_read = await store.redis.ttl("memory:a")
+        await store.close()
+        return after_append, after_read
+
+    after_append, after_read = asyncio.run(scenario())
+    assert 0 < after_append <= 30
+    assert after_read > 5
+
+
+def test_in_process_store_expires_idle_keys_and_evicts_least_recently_used(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.memory_store.time.monotonic", lambda: now[0])
+
+    async def scenario():
+        store = in_process_store(ttl_seconds=10, max_keys=2)
+        await store.append("a", entry(1))
+        await store.append("b", entry(2))
+        await store.recent("a", 1)
+        await store.append("c", entry(3))
+        evicted = await store.recent("b", 1)
+        now[0] += 11
+        expired = await store.recent("a", 1)
+        return evicted, expired
+
+    assert asyncio.run(scenario()) == ([], [])
+
+
+@pytest.mark.parametrize("make_store", STORES)
+def test_summary_round_trips_and_is_cleared_with_the_key(make_store):
+    async def scenario():
+        store = make_store()
+        await store.update_summary("user_companion", lambda current: {"text": "likes hiking", "pending": [entry(1)], "summarized": 5})
+        stored = await store.get_summary("user_companion")
+        await store.clear("user_companion")
+        cleared = await store.get_summary("user_companion")
+        await store.close()
+        return stored, cleared
+
+    stored, cleared = asyncio.run(scenario())
+    assert stored == {"text": "likes hiking", "pending": [entry(1)], "summarized": 5}
+    assert cleared is None
+
+
+def test_summary_update_retries_when_another_worker_wrote_in_between():
+    server = fakeredis.FakeServer()
+    other_worker = fakeredis.FakeRedis(server=server, decode_responses=True)
+
+    async def scenario():
+        store = redis_store()
+        store.redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        calls = []
+
+        def add(current):
+            if not calls:
+                # Another worker records its interaction after this read.
+                other_worker.set(store.prefix + "summary:user_companion", json.dumps({"pending": ["other"]}))
+            calls.append(current)
+            return {"pending": (current or {"pending": []})["pending"] + ["mine"]}
+
+        await store.update_summary("user_companion", add)
+        return await store.get_summary("user_companion"), len(calls)
+
+    summary, calls = asyncio.run(scenario())
+    assert summary["pending"] == ["other", "mine"]
+    assert calls == 2
+
+
+@pytest.mark.parametrize("make_store", STORES)
+def test_tail_reports_count_and_newest_entry(make_store):
+    async def scenario():
+        store = make_store()
+        empty = await store.tail("user_companion")
+        for i in range(5):
+            await store.append("user_companion", entry(i))
+        tail = await store.tail("user_companion")
+        await store.close()
+        return empty, tail
+
+    empty, tail = asyncio.run(scenario())
+    assert empty == (0, None)
+    assert tail == (3, entry(4))
@@ -0,0 +1,38 @@
+import asyncio
+
+from services.message_writer import MessageWriter
+
+
+class RejectingClient:
+    """Inserts fail whenever they include a row with ``bad`` set."""
+
+    def __init__(self):
+        self.rows = []
+
+    def table(self, name):
+        return self
+
+    def insert(self, rows):
+        self._pending = rows
+        return self
+
+    def execute(self):
+        if any(row.get("bad") for row in self._pending):
+            raise ValueError("invalid row")
+        self.rows.extend(self._pending)
+
+
+def test_one_bad_row_does_not_drop_the_batch():
+    client = RejectingClient()
+
+    async def scenario():
+        writer = MessageWriter(max_batch=10, flush_interval=0.01, max_queue=100, client_factory=lambda: client, max_retries=0)
+        for room_id, content, bad in [("a", "1", False), ("b", "1", False), ("a", "2", True), ("a", "3", False), ("b", "2", False)]:
+            await writer.enqueue({"room_id": room_id, "content": content, "bad": bad})
+        await writer.stop()
+        return writer.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert [(row["room_id"], row["content"]) for row in client.rows] == [("a", "1"), ("a", "3"), ("b", "1"), ("b", "2")]
+    assert metrics["written"] == 4
+    assert metrics["dropped"] == 1
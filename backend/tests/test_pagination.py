@@ -0,0 +1,46 @@
+import pytest
+
+from utils.pagination import decode_cursor, encode_cursor, keyset_page, page_response
+
+ROW = {"created_at": "2026-10-18T09:30:00.123456+00:00", "id": "5f0c4c2e-8f6f-4d7e-9a51-2c3b1d0e7a11"}
+
+
+class RecordingQuery:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor(ROW)) == (ROW["created_at"], ROW["id"])
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", encode_cursor({"created_at": "yesterday", "id": ROW["id"]}),
+                                    encode_cursor({"created_at": ROW["created_at"], "id": "1 or 1=1"})])
+def test_foreign_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_page_response_returns_a_cursor_only_when_more_rows_exist():
+    rows = [{"created_at": ROW["created_at"], "id": ROW["id"], "n": i} for i in range(3)]
+    items, next_cursor = page_response(rows, 2)
+    assert [item["n"] for item in items] == [0, 1]
+    assert decode_cursor(next_cursor) == (ROW["created_at"], ROW["id"])
+    assert page_response(rows, 3) == (rows, None)
+
+
+def test_keyset_page_seeks_past_the_cursor():
+    first = keyset_page(RecordingQuery(), None, 20)
+    assert [name for name, _, _ in first.calls] == ["order", "order", "limit"]
+    assert first.calls[-1][1] == (21,)
+
+    query = keyset_page(RecordingQuery(), encode_cursor(ROW), 20)
+    name, args, _ = query.calls[0]
+    assert name == "or_"
+    assert args[0] == f'created_at.lt."{ROW["created_at"]}",and(created_at.eq."{ROW["created_at"]}",id.lt.{ROW["id"]})'
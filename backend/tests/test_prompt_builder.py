@@ -0,0 +1,32 @@
+from services.prompt_builder import MEMORY_HEADER, SESSION_HEADER, PromptBuilder
+from utils.tokens import estimate_tokens
+
+COMPANION = {"id": "ava", "name": "Ava", "personality": "warm", "description": "test companion", "specialties": ["listening"]}
+MEMORIES = [{"user_message": f"memory question {i} " * 5, "ai_response": f"memory answer {i} " * 5} for i in range(10)]
+SESSION = [{"sender_type": "user" if i % 2 == 0 else "companion", "content": f"session line {i} " * 5} for i in range(10)]
+
+
+def test_prompts_stay_within_the_budget():
+    for budget in range(150, 1200, 25):
+        builder = PromptBuilder(token_budget=budget)
+        prompt = builder.build(COMPANION, "How are you?", memories=MEMORIES, session_messages=SESSION)
+        assert estimate_tokens(prompt) <= budget, budget
+
+
+def test_headers_only_for_sections_that_are_present():
+    builder = PromptBuilder(token_budget=2000)
+    prompt = builder.build(COMPANION, "How are you?", session_messages=SESSION[:2])
+    assert SESSION_HEADER in prompt
+    assert MEMORY_HEADER not in prompt
+    assert "omitted" not in prompt
+    assert builder.truncated_prompts == 0
+
+
+def test_no_room_is_reserved_for_absent_sections():
+    roomy = PromptBuilder(token_budget=5000)
+    prompt = roomy.build(COMPANION, "How are you?", session_messages=SESSION)
+
+    # Lines are estimated one by one, which rounds up once per line.
+    tight = PromptBuilder(token_budget=estimate_tokens(prompt) + len(SESSION))
+    assert tight.build(COMPANION, "How are you?", session_messages=SESSION) == prompt
+    assert tight.truncated_prompts == 0
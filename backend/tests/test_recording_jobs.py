@@ -0,0 +1,57 @@
+import asyncio
+
+import fakeredis.aioredis
+
+import services.recording_jobs as recording_jobs
+from services.recording_jobs import RecordingJobQueue, RedisRecordingJobQueue
+
+
+def test_stop_fails_unfinished_jobs_and_removes_their_spool_files(tmp_path, monkeypatch):
+    async def slow_publish(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(recording_jobs, "publish_recording", slow_publish)
+
+    async def scenario():
+        queue = RecordingJobQueue(workers=1, processes=1, drain_seconds=0.5)
+        cleaned = []
+        jobs = []
+        for i in range(3):
+            path = tmp_path / f"recording-{i}"
+            path.write_bytes(b"not a media file")
+            jobs.append(await queue.submit("room", str(path), "a.webm", "video/webm", 16, "sha", cleanup=lambda i=i: cleaned.append(i)))
+        await queue.stop()
+        return jobs, cleaned
+
+    jobs, cleaned = asyncio.run(scenario())
+    assert [job["status"] for job in jobs] == ["failed"] * 3
+    assert all(job["finished_at"] for job in jobs)
+    assert sorted(cleaned) == [0, 1, 2]
+
+
+def test_job_status_is_visible_from_another_worker(tmp_path, monkeypatch):
+    async def publish(*args, recording_id, **kwargs):
+        return {"id": recording_id}
+
+    monkeypatch.setattr(recording_jobs, "publish_recording", publish)
+
+    async def scenario():
+        redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        accepting = RedisRecordingJobQueue("redis://localhost:6379", 60, workers=1, processes=1)
+        polled = RedisRecordingJobQueue("redis://localhost:6379", 60, workers=1, processes=1)
+        accepting.redis = polled.redis = redis
+        path = tmp_path / "recording"
+        path.write_bytes(b"not a media file")
+        job = await accepting.submit("room", str(path), "a.webm", "video/webm", 16, "sha", cleanup=lambda: None)
+        queued = await polled.get(job["job_id"])
+        await accepting._queue.join()
+        finished = await polled.get(job["job_id"])
+        missing = await polled.get("missing")
+        await accepting.stop()
+        return job, queued, finished, missing
+
+    job, queued, finished, missing = asyncio.run(scenario())
+    assert queued["status"] == "queued"
+    assert finished["status"] == "completed"
+    assert finished["recording"] == {"id": job["recording_id"]}
+    assert missing is None
@@ -0,0 +1,50 @@
+import asyncio
+import os
+import time
+
+from services.recording_uploads import ChunkedUploadStore
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    for name in os.listdir(path) if os.path.isdir(path) else []:
+        os.utime(os.path.join(path, name), (then, then))
+    os.utime(path, (then, then))
+
+
+def test_sweep_removes_only_abandoned_uploads(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path), ttl_seconds=60)
+    abandoned = store.create("room", "a.webm", "video/webm", 2)["upload_id"]
+    active = store.create("room", "b.webm", "video/webm", 2)["upload_id"]
+    spool_file = tmp_path / "recording-old"
+    spool_file.write_bytes(b"data")
+
+    age(os.path.join(store.root, abandoned), 120)
+    age(os.path.join(store.root, active), 120)
+    age(str(spool_file), 120)
+    # A part arriving keeps an old upload alive.
+    (tmp_path / active / "part-000000").write_bytes(b"part")
+
+    assert store.sweep() == 2
+    assert sorted(os.listdir(store.root)) == [active]
+
+
+def test_concurrent_retries_of_one_part_never_mix(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path))
+    upload_id = store.create("room", "a.webm", "video/webm", 1)["upload_id"]
+
+    async def body(byte):
+        for _ in range(20):
+            yield bytes([byte]) * 1024
+            await asyncio.sleep(0)
+
+    async def scenario():
+        await asyncio.gather(store.write_part(upload_id, 0, body(1)), store.write_part(upload_id, 0, body(2)))
+        return store.status(upload_id)
+
+    status = asyncio.run(scenario())
+    with open(os.path.join(store.root, upload_id, "part-000000"), "rb") as f:
+        data = f.read()
+    assert data in (bytes([1]) * 20480, bytes([2]) * 20480)
+    assert status["missing"] == []
+    assert sorted(os.listdir(os.path.join(store.root, upload_id))) == ["manifest.json", "part-000000", "part-000000.json"]
@@ -0,0 +1,67 @@
+import asyncio
+
+import fakeredis.aioredis
+
+from services.response_cache import RedisResponseCache, ResponseCache, normalize_message
+
+COMPANION = {"id": "ava", "updated_at": "2026-01-01"}
+
+
+def cache(**kwargs):
+    return ResponseCache(**{"ttl_seconds": 60, "max_entries": 10, "max_words": 4, "variants": 1, **kwargs})
+
+
+def test_normalize_message():
+    assert normalize_message("  Hi!!  THERE ") == "hi there"
+
+
+def test_only_short_first_turns_are_cacheable():
+    responses = cache()
+    assert responses.key_for(COMPANION, "Hi!", []) == responses.key_for(COMPANION, "hi", [])
+    assert responses.key_for(COMPANION, "hi", None) is None
+    assert responses.key_for(COMPANION, "hi", [{"sender_type": "user", "content": "earlier"}]) is None
+    assert responses.key_for(COMPANION, "what should I cook tonight then", []) is None
+    # Editing the persona retires its replies.
+    assert responses.key_for({**COMPANION, "updated_at": "2026-02-01"}, "hi", []) != responses.key_for(COMPANION, "hi", [])
+
+
+def test_replies_are_served_once_every_variant_exists():
+    async def scenario():
+        responses = cache(variants=2)
+        key = responses.key_for(COMPANION, "hi", [])
+        first = await responses.get(key)
+        await responses.put(key, "Hello!")
+        second = await responses.get(key)
+        await responses.put(key, "Hey there!")
+        third = await responses.get(key)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first is None and second is None
+    assert third in ("Hello!", "Hey there!")
+
+
+def test_least_recently_used_entries_are_evicted():
+    async def scenario():
+        responses = cache(max_entries=1)
+        await responses.put("a", "reply a")
+        await responses.put("b", "reply b")
+        return await responses.get("a"), await responses.get("b")
+
+    assert asyncio.run(scenario()) == (None, "reply b")
+
+
+def test_redis_cache_is_shared():
+    async def scenario():
+        redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        writer = RedisResponseCache("redis://localhost:6379", ttl_seconds=60, max_words=4, variants=1)
+        reader = RedisResponseCache("redis://localhost:6379", ttl_seconds=60, max_words=4, variants=1)
+        writer.redis = reader.redis = redis
+        key = writer.key_for(COMPANION, "hi", [])
+        await writer.put(key, "Hello!")
+        await writer.put(key, "Ignored, the key is full")
+        return await reader.get(key), await redis.ttl(reader.prefix + key)
+
+    reply, ttl = asyncio.run(scenario())
+    assert reply == "Hello!"
+    assert 0 < ttl <= 60
@@ -0,0 +1,188 @@
+import asyncio
+import re
+import time
+
+from services.did_service import DIDService
+from services.room_presence import RoomPresence
+from services.room_sweeper import RoomSweeper
+
+LONG_AGO = "2000-01-01T00:00:00"
+FAR_AHEAD = "2999-01-01T00:00:00"
+KEYSET = re.compile(r'created_at\.gt\."(.+?)",and\(created_at\.eq\."(.+?)",room_id\.gt\."(.+?)"\)')
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeRoomsQuery:
+    def __init__(self, client, update=None):
+        self.client = client
+        self.update = update
+        self.filters = []
+        self.orders = []
+        self.max_rows = None
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row[column] in values)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row[column] < value)
+        return self
+
+    def or_(self, expression):
+        created_at, _, room_id = KEYSET.fullmatch(expression).groups()
+        self.filters.append(lambda row: (row["created_at"], row["room_id"]) > (created_at, room_id))
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append(column)
+        return self
+
+    def limit(self, count):
+        self.max_rows = count
+        return self
+
+    def _matches(self):
+        return [row for row in self.client.rooms if all(match(row) for match in self.filters)]
+
+    def execute(self):
+        if self.update is None:
+            self.client.selects += 1
+            rows = sorted(self._matches(), key=lambda row: tuple(row[column] for column in self.orders))
+            return FakeResponse([dict(row) for row in rows[:self.max_rows]])
+
+        self.client.before_update()
+        rows = self._matches()
+        for row in rows:
+            row.update(self.update)
+        return FakeResponse([dict(row) for row in rows])
+
+
+class FakeRoomsClient:
+    """``video_rooms`` in memory, supporting the filters the sweeper uses."""
+
+    def __init__(self, rooms):
+        self.rooms = rooms
+        self.selects = 0
+        self.before_update = lambda: None
+
+    def table(self, name):
+        return self
+
+    def select(self, columns="*"):
+        return FakeRoomsQuery(self)
+
+    def update(self, row):
+        return FakeRoomsQuery(self, update=row)
+
+
+class FakeDIDService(DIDService):
+    def __init__(self):
+        super().__init__(base_url="http://did.invalid")
+        self.deleted = []
+
+    async def delete_stream(self, stream_id: str) -> bool:
+        self.deleted.append(stream_id)
+        self.streams.pop(stream_id, None)
+        return True
+
+
+def room(room_id, status="active", created_at=LONG_AGO, expires_at=FAR_AHEAD):
+    return {"room_id": room_id, "status": status, "created_at": created_at, "expires_at": expires_at}
+
+
+def sweeper(client, did_service=None, presence=None, **kwargs):
+    options = {"interval": 60, "batch_size": 2, "max_batches": 10, "idle_seconds": 3600, **kwargs}
+    ended = []
+
+    async def on_room_ended(room_id, reason):
+        ended.append((room_id, reason))
+
+    return RoomSweeper(
+        on_room_ended=on_room_ended,
+        client_factory=lambda: client,
+        did_service=did_service or FakeDIDService(),
+        presence=presence or RoomPresence(),
+        **options
+    ), ended
+
+
+def test_expired_rooms_are_ended_in_batches_up_to_max_batches():
+    client = FakeRoomsClient([room(f"r{i}", expires_at=LONG_AGO) for i in range(5)] + [room("current")])
+    rooms, ended = sweeper(client, max_batches=2)
+
+    result = asyncio.run(rooms.sweep())
+
+    assert result["expired"] == 4
+    assert sorted(room_id for room_id, _ in ended) == ["r0", "r1", "r2", "r3"]
+    assert {row["room_id"]: row["status"] for row in client.rooms}["r4"] == "active"
+    assert {row["room_id"]: row["status"] for row in client.rooms}["current"] == "active"
+
+
+def test_idle_room_is_ended_only_after_idle_seconds_without_members():
+    presence = RoomPresence()
+    client = FakeRoomsClient([room("empty"), room("occupied")])
+    rooms, ended = sweeper(client, presence=presence, idle_seconds=0.05)
+
+    async def scenario():
+        await presence.join("occupied", "sid", {"user_id": "user"})
+        first = await rooms.sweep()
+        await asyncio.sleep(0.06)
+        second = await rooms.sweep()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["idle"] == 0
+    assert second["idle"] == 1
+    assert ended == [("empty", "idle")]
+
+
+def test_idle_paging_does_not_skip_rooms_sharing_created_at():
+    client = FakeRoomsClient([room(f"r{i}") for i in range(5)])
+    rooms, ended = sweeper(client, batch_size=2, idle_seconds=0)
+
+    result = asyncio.run(rooms.sweep())
+
+    assert result["idle"] == 5
+    assert sorted(room_id for room_id, _ in ended) == [f"r{i}" for i in range(5)]
+
+
+def test_only_rooms_this_update_changed_are_announced_once():
+    client = FakeRoomsClient([room(f"r{i}", expires_at=LONG_AGO) for i in range(3)])
+
+    def another_worker_ends_r1():
+        client.rooms[1]["status"] = "ended"
+
+    client.before_update = another_worker_ends_r1
+    rooms, ended = sweeper(client, batch_size=10)
+
+    async def scenario():
+        await rooms.sweep()
+        await rooms.sweep()
+
+    asyncio.run(scenario())
+    assert ended == [("r0", "expired"), ("r2", "expired")]
+    assert rooms.metrics()["rooms_ended"] == 2
+
+
+def test_streams_never_attached_here_are_forgotten_not_deleted():
+    did_service = FakeDIDService()
+    client = FakeRoomsClient([room("live"), room("gone", status="ended")])
+    did_service.track_stream("unattached")
+    did_service.streams["unattached"]["created_at"] = time.monotonic() - 24 * 60 * 60
+    did_service.track_stream("fresh-unattached")
+    did_service.track_stream("live-stream", "live")
+    did_service.track_stream("gone-stream", "gone")
+    rooms, _ = sweeper(client, did_service=did_service)
+
+    result = asyncio.run(rooms.sweep())
+
+    assert did_service.deleted == ["gone-stream"]
+    assert result["streams"] == 1
+    assert set(did_service.streams) == {"fresh-unattached", "live-stream"}
@@ -0,0 +1,25 @@
+from services.speech_pipeline import split_sentences
+
+
+def test_complete_sentences_are_split_off_and_the_rest_kept():
+    sentences, rest = split_sentences("Hello there, friend. How are you doing today? I was", min_chars=5, max_chars=200)
+    assert sentences == ["Hello there, friend.", "How are you doing today?"]
+    assert rest == "I was"
+
+
+def test_short_fragments_stay_with_the_next_sentence():
+    sentences, rest = split_sentences("Oh! That is wonderful news. ", min_chars=12, max_chars=200)
+    assert sentences == ["Oh! That is wonderful news."]
+    assert rest == ""
+
+
+def test_decimals_do_not_end_a_sentence():
+    sentences, rest = split_sentences("It costs 3.5 dollars", min_chars=5, max_chars=200)
+    assert sentences == []
+    assert rest == "It costs 3.5 dollars"
+
+
+def test_run_on_text_is_cut_at_a_comma_or_space():
+    sentences, rest = split_sentences("one two three, four five six seven", min_chars=5, max_chars=16)
+    assert sentences == ["one two three,", "four five six"]
+    assert rest == "seven"
@@ -0,0 +1,46 @@
+import os
+
+from services.tts_service import AudioCache
+
+
+def store(cache, key, data):
+    tmp_path, out = cache.open_writer(key)
+    with out:
+        out.write(data)
+    cache.commit(key, tmp_path, len(data))
+
+
+def test_lookup_finds_committed_audio(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    key = AudioCache.key("hello", "voice", "model", "mp3")
+    assert cache.lookup(key) is None
+
+    store(cache, key, b"audio")
+    path = cache.lookup(key)
+    with open(path, "rb") as f:
+        assert f.read() == b"audio"
+    assert cache.metrics()["hits"] == 1
+
+
+def test_least_recently_used_audio_is_evicted(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=10)
+    store(cache, "aa1", b"12345")
+    store(cache, "bb2", b"12345")
+    cache.lookup("aa1")
+    store(cache, "cc3", b"12345")
+
+    assert cache.lookup("bb2") is None
+    assert cache.lookup("aa1") and cache.lookup("cc3")
+    assert cache.total_bytes == 10
+
+
+def test_restart_keeps_files_and_drops_partial_writes(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    store(cache, "aa1", b"12345")
+    tmp_path_partial, out = cache.open_writer("bb2")
+    out.close()
+
+    restarted = AudioCache(str(tmp_path), max_bytes=100)
+    assert restarted.lookup("aa1")
+    assert restarted.total_bytes == 5
+    assert not os.path.exists(tmp_path_partial)
@@ -1,23 +1,162 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from fastapi import Header, HTTPException
 from jose import jwt, JWTError
 from config.settings import get_settings
 
 settings = get_settings()
 
-async def get_current_user(authorization: str = Header(None)) -> str:
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
+AUDIENCE = "authenticated"
+
+class TokenCache:
+    """Bounded LRU of verified token claims, keyed by the token's SHA-256.
+
+    Entries are dropped once the token's ``exp`` passes, so a cached token
+    is never accepted for longer than ``jwt.decode`` would accept it.
+    Tokens without ``exp`` are not cached.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self.key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: Dict):
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)) or self.max_size <= 0:
+            return
+
+        key = self.key(token)
+        self._entries[key] = (exp, claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def decode_hs256(token: str, secret: str, audience: str = AUDIENCE) -> Dict:
+    """Verify an HS256 JWT with ``hmac`` directly.
+
+    Checks the same things ``jwt.decode`` is asked to check here (signature,
+    ``exp``, ``nbf`` and ``aud``) without python-jose's generic JWS/JWK
+    machinery, with the same rules (a token without ``aud`` is accepted).
+    Raises ``JWTError`` on any failure, and for every token when ``secret``
+    is empty.
+    """
+    if not secret:
+        raise JWTError("JWT secret not configured")
 
     try:
-        token = authorization.replace("Bearer ", "")
+        header_segment, payload_segment, signature_segment = token.split(".")
+        header = json.loads(_b64decode(header_segment))
+        signature = _b64decode(signature_segment)
+        claims = json.loads(_b64decode(payload_segment))
+    except (ValueError, TypeError) as e:
+        raise JWTError(f"Malformed token: {e}")
+
+    # Valid JSON is not enough: ``[]`` or ``"x"`` as a segment must not reach ``.get``.
+    if not isinstance(header, dict):
+        raise JWTError("Invalid header")
+    if not isinstance(claims, dict):
+        raise JWTError("Invalid payload")
 
-        payload = jwt.decode(
+    if header.get("alg") != "HS256":
+        raise JWTError("The specified alg value is not allowed")
+
+    expected = hmac.new(secret.encode(), f"{header_segment}.{payload_segment}".encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        raise JWTError("Signature verification failed.")
+
+    now = time.time()
+    if "exp" in claims and (not isinstance(claims["exp"], (int, float)) or claims["exp"] <= now):
+        raise JWTError("Signature has expired.")
+    if "nbf" in claims and (not isinstance(claims["nbf"], (int, float)) or claims["nbf"] > now):
+        raise JWTError("The token is not yet valid (nbf)")
+
+    if "aud" in claims:
+        aud = claims["aud"]
+        if audience not in (aud if isinstance(aud, list) else [aud]):
+            raise JWTError("Invalid audience")
+
+    return claims
+
+def verify_token(token: str) -> Dict:
+    """Return the verified claims for ``token``, consulting the cache first."""
+    cache = get_token_cache()
+    claims = cache.get(token)
+    if claims is not None:
+        return claims
+
+    # An empty secret would verify tokens anyone can sign.
+    if not settings.supabase_jwt_secret:
+        raise JWTError("JWT secret not configured")
+
+    if settings.jwt_fast_hs256:
+        claims = decode_hs256(token, settings.supabase_jwt_secret)
+    else:
+        claims = jwt.decode(
             token,
             settings.supabase_jwt_secret,
             algorithms=["HS256"],
-            audience="authenticated"
+            audience=AUDIENCE
         )
 
+    cache.put(token, claims)
+    return claims
+
+async def get_current_user(authorization: str = Header(None)) -> str:
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header missing")
+
+    try:
+        token = authorization.replace("Bearer ", "")
+
+        payload = verify_token(token)
+
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
@@ -26,3 +165,11 @@ async def get_current_user(authorization: str = Header(None)) -> str:
     except JWTError as e:
         print(f"JWT verification failed: {e}")
         raise HTTPException(status_code=401, detail="Invalid token")
+
+_token_cache: Optional[TokenCache] = None
+
+def get_token_cache() -> TokenCache:
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(settings.jwt_cache_size)
+    return _token_cache
@@ -0,0 +1,100 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from typing import Optional, Tuple, Union
+from config.settings import get_settings
+
+settings = get_settings()
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SampledLogger(logging.Logger):
+    """Logger that keeps every WARNING and above and a ``rate`` fraction of the rest.
+
+    Sampling happens in ``isEnabledFor``, before a ``LogRecord`` is built,
+    so dropped debug/info calls cost little more than the level check.
+    """
+
+    def __init__(self, name: str, rate: float):
+        super().__init__(name, logging.INFO)
+        self.rate = rate
+
+    def isEnabledFor(self, level: int) -> bool:
+        if level >= logging.WARNING:
+            return super().isEnabledFor(level)
+        return random.random() < self.rate and super().isEnabledFor(level)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the writer falls behind."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+
+def _async_handler() -> DroppingQueueHandler:
+    global _listener, _handler
+    if _handler is None:
+        log_queue = queue.Queue(maxsize=settings.log_queue_size)
+        output = logging.StreamHandler()
+        output.setFormatter(JsonFormatter())
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+
+        _handler = DroppingQueueHandler(log_queue)
+    return _handler
+
+def socketio_loggers() -> Tuple[Union[bool, logging.Logger], Union[bool, logging.Logger]]:
+    """``(logger, engineio_logger)`` arguments for ``socketio.AsyncServer``.
+
+    ``SOCKETIO_LOG_MODE``:
+
+    * ``sync``: python-socketio's own loggers, every packet written inline
+    * ``async``: sampled JSON lines, formatted and written on a background
+      thread; the handler thread only samples and enqueues
+    * ``off``: no packet logging
+    """
+    mode = settings.socketio_log_mode
+    if mode == "sync":
+        return True, True
+    if mode != "async":
+        return False, False
+
+    loggers = []
+    for name in ("socketio.sampled", "engineio.sampled"):
+        logger = SampledLogger(name, settings.log_sample_rate)
+        logger.addHandler(_async_handler())
+        loggers.append(logger)
+    return loggers[0], loggers[1]
+
+def log_metrics() -> dict:
+    return {
+        "dropped": _handler.dropped if _handler else 0,
+        "queue_depth": _handler.queue.qsize() if _handler else 0,
+    }
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
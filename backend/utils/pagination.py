@@ -0,0 +1,37 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+def encode_cursor(row: Dict) -> str:
+    raw = json.dumps([row["created_at"], str(row["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """``(created_at, id)`` from a cursor; raises ``ValueError`` when it was not made by ``encode_cursor``."""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        datetime.fromisoformat(created_at)
+        return created_at, str(uuid.UUID(row_id))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def keyset_page(query, cursor: Optional[str], limit: int):
+    """Newest-first page of ``limit`` rows after ``cursor``, by ``(created_at, id)``.
+
+    Seeks past the cursor instead of offsetting, so with an index on
+    ``(room_id, created_at desc, id desc)`` every page costs the same however
+    deep it is. One extra row is fetched to tell whether there is a next
+    page; pass the result to ``page_response``.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})')
+    return query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+
+def page_response(rows: List[Dict], limit: int) -> Tuple[List[Dict], Optional[str]]:
+    """``(items, next_cursor)``; ``next_cursor`` is None on the last page."""
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+    return items, next_cursor
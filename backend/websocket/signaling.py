@@ -1,49 +1,151 @@
+import functools
 import socketio
-from services.ai_service import AIService
+from jose import JWTError
+from services.ai_service import get_ai_service, is_service_reply
 from services.supabase_client import get_supabase_client
+from services.executor import run_blocking
+from services.room_sessions import get_room_sessions
+from services.message_writer import get_message_writer
+from services.room_presence import get_room_presence
+from services.speech_pipeline import get_speech_pipelines
+from services.generation_scheduler import get_generation_scheduler, merge_messages
+from services.did_service import get_did_service
+from config.settings import get_settings
+from utils.auth import verify_token
+from utils.log import socketio_loggers
+from services.metrics import get_metrics
 from datetime import datetime
+import uuid
+
+settings = get_settings()
+
+def create_client_manager():
+    """Redis pub/sub manager so emits reach peers connected to other workers."""
+    if settings.socketio_manager == "redis":
+        return socketio.AsyncRedisManager(settings.redis_url, channel=settings.socketio_channel)
+    return None
+
+logger, engineio_logger = socketio_loggers()
 
 sio = socketio.AsyncServer(
     async_mode='asgi',
     cors_allowed_origins='*',
-    logger=True,
-    engineio_logger=True
+    client_manager=create_client_manager(),
+    logger=logger,
+    engineio_logger=engineio_logger
 )
 
-ai_service = AIService()
+EVENT_SECONDS = get_metrics().histogram("socketio_event_seconds", "Socket.IO event handler latency", labels=("event",))
+EVENT_ERRORS = get_metrics().counter("socketio_event_errors", "Socket.IO event handlers that raised", labels=("event",))
+
+def _local_rooms() -> dict:
+    return sio.manager.rooms.get("/", {})
+
+def _active_rooms() -> int:
+    rooms = _local_rooms()
+    connected = rooms.get(None, {})
+    # Every sid also sits in a room named after itself.
+    return sum(1 for room in rooms if room is not None and room not in connected)
+
+get_metrics().gauge("socketio_connected_sids", "Sockets connected to this worker").set_function(lambda: len(_local_rooms().get(None, {})))
+get_metrics().gauge("socketio_active_rooms", "Rooms with at least one socket on this worker").set_function(_active_rooms)
+
+def instrumented(handler):
+    event = handler.__name__
+
+    @functools.wraps(handler)
+    async def wrapper(*args):
+        with EVENT_SECONDS.time(event=event):
+            try:
+                return await handler(*args)
+            except socketio.exceptions.ConnectionRefusedError:
+                raise
+            except Exception:
+                EVENT_ERRORS.inc(event=event)
+                raise
+
+    return wrapper
 
 @sio.event
+@instrumented
 async def connect(sid, environ, auth):
-    print(f"Client connected: {sid}")
+    token = (auth or {}).get("token")
+    if not token:
+        raise socketio.exceptions.ConnectionRefusedError("Authentication required")
+
+    try:
+        claims = verify_token(token.replace("Bearer ", ""))
+    except JWTError as e:
+        print(f"Socket JWT verification failed: {e}")
+        raise socketio.exceptions.ConnectionRefusedError("Invalid token")
+
+    user_id = claims.get("sub")
+    if not user_id:
+        raise socketio.exceptions.ConnectionRefusedError("Invalid token")
+
+    # Identity and the rooms this connection may act on are resolved once
+    # here and in ``join``; every later event only reads the session.
+    await sio.save_session(sid, {"user_id": user_id, "rooms": set()})
+    print(f"Client connected: {sid} (user {user_id})")
     return True
 
+async def authorized_session(sid: str, room_id: str):
+    """The connection's session if it has joined ``room_id``, otherwise None."""
+    session = await sio.get_session(sid)
+    if room_id not in session.get("rooms", ()):
+        return None
+    return session
+
 @sio.event
+@instrumented
 async def disconnect(sid):
     print(f"Client disconnected: {sid}")
 
+    remaining = await get_room_presence().disconnect(sid)
+    for room_id, count in remaining.items():
+        if count == 0:
+            await stop_companion(room_id)
+            await get_room_sessions().close(room_id)
+
 @sio.event
+@instrumented
 async def join(sid, data):
     room_id = data.get("roomId")
-    user_id = data.get("userId")
     role = data.get("role")
 
     if not room_id:
         return {"error": "Room ID is required"}
 
-    sio.enter_room(sid, room_id)
+    connection = await sio.get_session(sid)
+    user_id = connection["user_id"]
+
+    room_session = await get_room_sessions().open(room_id)
+    if not room_session:
+        return {"error": "Room not found"}
+    if room_session.user_id != user_id:
+        return {"error": "Not authorized"}
+    if room_session.room.get("status") == "ended":
+        return {"error": "Room has ended"}
+
+    connection["rooms"].add(room_id)
+    await sio.save_session(sid, connection)
+
+    await sio.enter_room(sid, room_id)
+    await get_room_presence().join(room_id, sid, {"user_id": user_id, "role": role})
     print(f"User {user_id} joined room {room_id} as {role}")
 
     supabase = get_supabase_client()
-    supabase.table("video_rooms").update({
+    await run_blocking(supabase.table("video_rooms").update({
         "status": "active",
         "started_at": datetime.utcnow().isoformat()
-    }).eq("room_id", room_id).execute()
+    }).eq("room_id", room_id).execute)
 
     await sio.emit("user_joined", {"userId": user_id, "role": role}, room=room_id, skip_sid=sid)
 
     return {"success": True}
 
 @sio.event
+@instrumented
 async def offer(sid, data):
     room_id = data.get("roomId")
     sdp = data.get("sdp")
@@ -51,10 +153,14 @@ async def offer(sid, data):
     if not room_id or not sdp:
         return {"error": "Room ID and SDP are required"}
 
+    if not await authorized_session(sid, room_id):
+        return {"error": "Not authorized"}
+
     await sio.emit("offer", {"sdp": sdp}, room=room_id, skip_sid=sid)
     return {"success": True}
 
 @sio.event
+@instrumented
 async def answer(sid, data):
     room_id = data.get("roomId")
     sdp = data.get("sdp")
@@ -62,10 +168,14 @@ async def answer(sid, data):
     if not room_id or not sdp:
         return {"error": "Room ID and SDP are required"}
 
+    if not await authorized_session(sid, room_id):
+        return {"error": "Not authorized"}
+
     await sio.emit("answer", {"sdp": sdp}, room=room_id, skip_sid=sid)
     return {"success": True}
 
 @sio.event
+@instrumented
 async def candidate(sid, data):
     room_id = data.get("roomId")
     candidate = data.get("candidate")
@@ -73,18 +183,26 @@ async def candidate(sid, data):
     if not room_id or not candidate:
         return {"error": "Room ID and candidate are required"}
 
+    if not await authorized_session(sid, room_id):
+        return {"error": "Not authorized"}
+
     await sio.emit("candidate", {"candidate": candidate}, room=room_id, skip_sid=sid)
     return {"success": True}
 
 @sio.event
+@instrumented
 async def chat_message(sid, data):
     room_id = data.get("roomId")
     message = data.get("message")
-    user_id = data.get("userId")
 
     if not room_id or not message:
         return {"error": "Room ID and message are required"}
 
+    connection = await authorized_session(sid, room_id)
+    if not connection:
+        return {"error": "Not authorized"}
+    user_id = connection["user_id"]
+
     user_message = {
         "sender_type": "user",
         "content": message,
@@ -93,80 +211,244 @@ async def chat_message(sid, data):
 
     await sio.emit("chat_message", user_message, room=room_id)
 
-    supabase = get_supabase_client()
-    supabase.table("messages").insert({
+    await get_message_writer().enqueue({
         "room_id": room_id,
         "sender_type": "user",
         "content": message,
-        "timestamp": user_message["timestamp"]
-    }).execute()
+        "created_at": user_message["timestamp"]
+    })
 
     await sio.emit("companion_typing", {}, room=room_id)
 
-    try:
-        room_response = supabase.table("video_rooms").select("companion_id, user_id").eq("room_id", room_id).maybeSingle().execute()
-        if not room_response.data:
-            print(f"Room not found: {room_id}")
-            return {"success": False, "error": "Room not found"}
+    stream_id = connection.get("avatar_streams", {}).get(room_id)
 
-        companion_id = room_response.data.get("companion_id")
-        room_user_id = room_response.data.get("user_id") or user_id
+    async def generate(batch: list):
+        return await generate_companion_reply(room_id, user_id, batch, stream_id)
 
-        companion_response = supabase.table("companions").select("*").eq("id", companion_id).maybeSingle().execute()
-        if not companion_response.data:
-            print(f"Companion not found: {companion_id}")
-            return {"success": False, "error": "Companion not found"}
+    async def deliver(batch: list, reply):
+        await deliver_companion_reply(room_id, batch, reply)
 
-        companion = companion_response.data
+    # Replies are generated per room by the scheduler: a burst of messages
+    # is answered once, and a newer message cancels a reply in progress.
+    await get_generation_scheduler().submit(room_id, user_message, generate, deliver)
 
-        ai_response = await ai_service.generate_response(message, companion, room_id, room_user_id)
+    return {"success": True}
 
-        companion_message = {
-            "sender_type": "companion",
-            "content": ai_response,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+async def generate_companion_reply(room_id: str, user_id: str, batch: list, stream_id: str = None):
+    """Generate (and stream) the reply to ``batch``; returns ``(companion_message, speech)`` for delivery."""
+    room_sessions = get_room_sessions()
+    session = await room_sessions.get(room_id)
+    if not session:
+        raise LookupError(f"Room not found: {room_id}")
 
-        await sio.emit("chat_message", companion_message, room=room_id)
+    companion = session.companion
+    history = session.history()
+    message = merge_messages([msg["content"] for msg in batch])
 
-        supabase.table("messages").insert({
-            "room_id": room_id,
+    speech = None
+    if stream_id:
+        speech = await get_speech_pipelines().start(room_id, stream_id, companion.get("voice_id"))
+
+    # A room with an avatar attached is a live voice call; its replies are admitted first.
+    priority = "voice" if stream_id else "text"
+    message_id = str(uuid.uuid4())
+    try:
+        if settings.chat_streaming:
+            content = await stream_companion_reply(message_id, message, companion, room_id, user_id, history, speech, priority)
+        else:
+            content = await get_ai_service().generate_response(message, companion, room_id, user_id, history, priority)
+            if speech:
+                await speech.feed(content)
+    except BaseException:
+        # Also on cancellation: drop unsent speech and the partial bubble.
+        if speech:
+            await get_speech_pipelines().end(room_id, speech, cancel=True)
+        if settings.chat_streaming:
+            await sio.emit("chat_message_cancelled", {"id": message_id}, room=room_id)
+        raise
+
+    companion_message = {
+        "id": message_id,
+        "sender_type": "companion",
+        "content": content,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    if is_service_reply(content):
+        # "Busy" and "try again" notices are shown, but are not part of the conversation.
+        companion_message["service"] = True
+    return companion_message, speech
+
+async def deliver_companion_reply(room_id: str, batch: list, reply):
+    """Publish and store ``reply``; with no reply (generation failed) only the user messages are recorded."""
+    room_sessions = get_room_sessions()
+    for user_message in batch:
+        await room_sessions.append_message(room_id, user_message)
+    if reply is None:
+        return
+
+    companion_message, speech = reply
+
+    if settings.chat_streaming:
+        await sio.emit("chat_message_done", companion_message, room=room_id)
+    else:
+        await sio.emit("chat_message", {
+            key: companion_message[key] for key in ("sender_type", "content", "timestamp", "service") if key in companion_message
+        }, room=room_id)
+
+    if companion_message.get("service"):
+        if speech:
+            await get_speech_pipelines().end(room_id, speech)
+        return
+
+    await room_sessions.append_message(room_id, {
+        "sender_type": "companion",
+        "content": companion_message["content"],
+        "timestamp": companion_message["timestamp"]
+    })
+
+    await get_message_writer().enqueue({
+        "room_id": room_id,
+        "sender_type": "companion",
+        "content": companion_message["content"],
+        "created_at": companion_message["timestamp"]
+    })
+
+    if speech:
+        await get_speech_pipelines().end(room_id, speech)
+
+async def stream_companion_reply(
+    message_id: str,
+    message: str,
+    companion: dict,
+    room_id: str,
+    user_id: str,
+    history: list = None,
+    speech=None,
+    priority: str = "text"
+) -> str:
+    chunks = []
+
+    async for delta in get_ai_service().stream_response(message, companion, room_id, user_id, history, priority):
+        chunks.append(delta)
+        await sio.emit("chat_message_delta", {
+            "id": message_id,
             "sender_type": "companion",
-            "content": ai_response,
-            "timestamp": companion_message["timestamp"]
-        }).execute()
+            "delta": delta
+        }, room=room_id)
+        if speech:
+            await speech.feed(delta)
 
-    except Exception as e:
-        print(f"Error generating AI response: {e}")
+    return "".join(chunks).strip()
+
+async def stop_companion(room_id: str):
+    """Cancel the room's pending reply and silence its avatar."""
+    await get_generation_scheduler().cancel(room_id)
+    await get_speech_pipelines().interrupt(room_id)
+
+@sio.event
+@instrumented
+async def avatar_stream(sid, data):
+    """Attach (or, without ``streamId``, detach) the D-ID stream that speaks this room's replies."""
+    room_id = data.get("roomId")
+    stream_id = data.get("streamId")
+
+    if not room_id:
+        return {"error": "Room ID is required"}
+
+    connection = await authorized_session(sid, room_id)
+    if not connection:
+        return {"error": "Not authorized"}
+
+    streams = connection.setdefault("avatar_streams", {})
+    if stream_id:
+        streams[room_id] = stream_id
+        get_did_service().track_stream(stream_id, room_id)
+    else:
+        streams.pop(room_id, None)
+        await get_speech_pipelines().interrupt(room_id)
+    await sio.save_session(sid, connection)
 
     return {"success": True}
 
 @sio.event
+@instrumented
+async def interrupt(sid, data):
+    """Stop the avatar: sentences of the current reply not yet sent to D-ID are dropped."""
+    room_id = data.get("roomId")
+
+    if not room_id:
+        return {"error": "Room ID is required"}
+
+    if not await authorized_session(sid, room_id):
+        return {"error": "Not authorized"}
+
+    interrupted = await get_speech_pipelines().interrupt(room_id)
+    if interrupted:
+        await sio.emit("companion_interrupted", {}, room=room_id)
+
+    return {"success": True, "interrupted": interrupted}
+
+@sio.event
+@instrumented
 async def leave(sid, data):
     room_id = data.get("roomId")
 
     if not room_id:
         return {"error": "Room ID is required"}
 
-    sio.leave_room(sid, room_id)
+    connection = await authorized_session(sid, room_id)
+    if not connection:
+        return {"error": "Not authorized"}
+    connection["rooms"].discard(room_id)
+    await sio.save_session(sid, connection)
+
+    await sio.leave_room(sid, room_id)
     await sio.emit("user_left", {}, room=room_id, skip_sid=sid)
 
+    if await get_room_presence().leave(room_id, sid) == 0:
+        await stop_companion(room_id)
+        await get_room_sessions().close(room_id)
+
     return {"success": True}
 
 @sio.event
+@instrumented
 async def end_call(sid, data):
     room_id = data.get("roomId")
 
     if not room_id:
         return {"error": "Room ID is required"}
 
+    connection = await authorized_session(sid, room_id)
+    if not connection:
+        return {"error": "Not authorized"}
+    connection["rooms"].discard(room_id)
+    await sio.save_session(sid, connection)
+
     supabase = get_supabase_client()
-    supabase.table("video_rooms").update({
+    await run_blocking(supabase.table("video_rooms").update({
         "status": "ended",
         "ended_at": datetime.utcnow().isoformat()
-    }).eq("room_id", room_id).execute()
+    }).eq("room_id", room_id).execute)
 
     await sio.emit("call_ended", {}, room=room_id)
-    sio.leave_room(sid, room_id)
+    await sio.leave_room(sid, room_id)
+    await get_room_presence().leave(room_id, sid)
+    await stop_companion(room_id)
+    await get_room_sessions().close(room_id)
 
     return {"success": True}
+
+async def close_room(room_id: str, reason: str):
+    """End a room from outside a socket event (the room sweeper): tell whoever is still in it and drop its state."""
+    await stop_companion(room_id)
+    await sio.emit("call_ended", {"reason": reason}, room=room_id)
+
+    for sid in await get_room_presence().clear(room_id):
+        if sio.manager.is_connected(sid, "/"):
+            connection = await sio.get_session(sid)
+            connection["rooms"].discard(room_id)
+            await sio.save_session(sid, connection)
+
+    await sio.close_room(room_id)
+    await get_room_sessions().close(room_id)
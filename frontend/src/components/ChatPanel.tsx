@@ -12,7 +12,7 @@ interface ChatPanelProps {
 export function ChatPanel({ onClose, roomId }: ChatPanelProps) {
   const [message, setMessage] = useState('');
   const messagesEndRef = useRef<HTMLDivElement>(null);
-  const { messages, isTyping, addMessage, setTyping } = useChatStore();
+  const { messages, isTyping, addMessage, appendToMessage, upsertMessage, removeMessage, setTyping } = useChatStore();
 
   useEffect(() => {
     const handleMessage = (data: any) => {
@@ -25,19 +25,45 @@ export function ChatPanel({ onClose, roomId }: ChatPanelProps) {
       setTyping(false);
     };
 
+    const handleDelta = (data: any) => {
+      appendToMessage(data.id, data.delta);
+      setTyping(false);
+    };
+
+    const handleDone = (data: any) => {
+      upsertMessage({
+        id: data.id,
+        sender_type: data.sender_type,
+        content: data.content,
+        timestamp: data.timestamp
+      });
+      setTyping(false);
+    };
+
+    // A newer user message superseded this reply; its partial text is dropped.
+    const handleCancelled = (data: any) => {
+      removeMessage(data.id);
+    };
+
     const handleTyping = () => {
       setTyping(true);
       setTimeout(() => setTyping(false), 3000);
     };
 
     wsService.on('chat_message', handleMessage);
+    wsService.on('chat_message_delta', handleDelta);
+    wsService.on('chat_message_done', handleDone);
+    wsService.on('chat_message_cancelled', handleCancelled);
     wsService.on('companion_typing', handleTyping);
 
     return () => {
       wsService.off('chat_message', handleMessage);
+      wsService.off('chat_message_delta', handleDelta);
+      wsService.off('chat_message_done', handleDone);
+      wsService.off('chat_message_cancelled', handleCancelled);
       wsService.off('companion_typing', handleTyping);
     };
-  }, [addMessage, setTyping]);
+  }, [addMessage, appendToMessage, upsertMessage, removeMessage, setTyping]);
 
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
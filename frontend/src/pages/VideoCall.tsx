@@ -11,7 +11,7 @@ import { Loader as Loader2 } from 'lucide-react';
 export function VideoCall() {
   const { roomId } = useParams<{ roomId: string }>();
   const navigate = useNavigate();
-  const { user } = useAuth();
+  const { user, session } = useAuth();
   const [isChatOpen, setIsChatOpen] = useState(false);
   const [callDuration, setCallDuration] = useState(0);
   const localVideoRef = useRef<HTMLVideoElement>(null);
@@ -37,10 +37,10 @@ export function VideoCall() {
 
     const initCall = async () => {
       try {
-        const socket = wsService.connect(user.id);
-
-        socket.emit('join', {
+        wsService.connect(session?.access_token);
+        wsService.joinRoom({
           roomId,
+          companionId: companion?.id,
           userId: user.id,
           role: 'user'
         });
@@ -1,9 +1,20 @@
 import { io, Socket } from 'socket.io-client';
+import { supabase } from './supabase';
 
 const WS_URL = import.meta.env.VITE_BACKEND_URL || 'http://localhost:8000';
 
+interface JoinRequest {
+  roomId: string;
+  companionId?: string;
+  userId: string;
+  role: string;
+}
+
 class WebSocketService {
   private socket: Socket | null = null;
+  // The room this client is in; joined again on every reconnect, since a
+  // new connection (new sid) starts outside every room on the server.
+  private activeRoom: JoinRequest | null = null;
   private reconnectAttempts = 0;
   private maxReconnectAttempts = 5;
 
@@ -13,7 +24,12 @@ class WebSocketService {
     }
 
     this.socket = io(WS_URL, {
-      auth: { token },
+      // Resolved on every (re)connect so a refreshed access token is picked up.
+      auth: (cb) => {
+        supabase.auth.getSession().then(({ data: { session } }) => {
+          cb({ token: session?.access_token ?? token });
+        });
+      },
       reconnection: true,
       reconnectionDelay: 1000,
       reconnectionDelayMax: 5000,
@@ -23,6 +39,9 @@ class WebSocketService {
     this.socket.on('connect', () => {
       console.log('WebSocket connected');
       this.reconnectAttempts = 0;
+      if (this.activeRoom) {
+        this.socket?.emit('join', this.activeRoom);
+      }
     });
 
     this.socket.on('disconnect', (reason) => {
@@ -41,7 +60,16 @@ class WebSocketService {
     return this.socket;
   }
 
+  joinRoom(request: JoinRequest) {
+    this.activeRoom = request;
+    // Otherwise the 'connect' handler joins once the connection is up.
+    if (this.socket?.connected) {
+      this.socket.emit('join', request);
+    }
+  }
+
   disconnect() {
+    this.activeRoom = null;
     if (this.socket) {
       this.socket.disconnect();
       this.socket = null;
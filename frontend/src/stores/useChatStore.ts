@@ -11,6 +11,9 @@ interface ChatState {
   messages: ChatMessage[];
   isTyping: boolean;
   addMessage: (message: ChatMessage) => void;
+  appendToMessage: (id: string, delta: string) => void;
+  upsertMessage: (message: ChatMessage) => void;
+  removeMessage: (id: string) => void;
   setTyping: (typing: boolean) => void;
   clearMessages: () => void;
 }
@@ -21,6 +24,33 @@ export const useChatStore = create<ChatState>((set) => ({
   addMessage: (message) => set((state) => ({
     messages: [...state.messages, message]
   })),
+  appendToMessage: (id, delta) => set((state) => {
+    const exists = state.messages.some((m) => m.id === id);
+    if (!exists) {
+      return {
+        messages: [...state.messages, {
+          id,
+          sender_type: 'companion',
+          content: delta,
+          timestamp: new Date().toISOString()
+        }]
+      };
+    }
+    return {
+      messages: state.messages.map((m) => (m.id === id ? { ...m, content: m.content + delta } : m))
+    };
+  }),
+  upsertMessage: (message) => set((state) => {
+    const exists = state.messages.some((m) => m.id === message.id);
+    return {
+      messages: exists
+        ? state.messages.map((m) => (m.id === message.id ? message : m))
+        : [...state.messages, message]
+    };
+  }),
+  removeMessage: (id) => set((state) => ({
+    messages: state.messages.filter((m) => m.id !== id)
+  })),
   setTyping: (typing) => set({ isTyping: typing }),
   clearMessages: () => set({ messages: [] })
 }));
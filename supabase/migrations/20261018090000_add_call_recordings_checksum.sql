@@ -0,0 +1,19 @@
+/*
+  # Add checksum to call_recordings
+
+  1. Changes
+    - Add checksum_sha256 column, computed while the upload is streamed to disk
+
+  2. Notes
+    - Lets clients verify a resumable upload end to end
+*/
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'call_recordings' AND column_name = 'checksum_sha256'
+  ) THEN
+    ALTER TABLE call_recordings ADD COLUMN checksum_sha256 text;
+  END IF;
+END $$;
@@ -0,0 +1,28 @@
+/*
+  # Add processing metadata to call_recordings
+
+  1. Changes
+    - Add metadata jsonb column (codecs, dimensions, thumbnail timestamp)
+    - Add processing_status column
+
+  2. Notes
+    - Filled in by the background post-processing job once the container
+      headers have been parsed
+*/
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'call_recordings' AND column_name = 'metadata'
+  ) THEN
+    ALTER TABLE call_recordings ADD COLUMN metadata jsonb DEFAULT '{}'::jsonb;
+  END IF;
+
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'call_recordings' AND column_name = 'processing_status'
+  ) THEN
+    ALTER TABLE call_recordings ADD COLUMN processing_status text DEFAULT 'pending';
+  END IF;
+END $$;
@@ -0,0 +1,24 @@
+/*
+  # Keyset pagination indexes for chat and recording history
+
+  1. Changes
+    - Add composite index messages(room_id, created_at DESC, id DESC)
+    - Add composite index call_recordings(room_id, created_at DESC, id DESC)
+    - Drop the single-column room_id indexes they make redundant
+
+  2. Notes
+    - History endpoints page newest-first with
+      `created_at < cursor OR (created_at = cursor AND id < cursor_id)`,
+      and prompt context reads the newest messages of a room; both become
+      an index range scan whose cost does not depend on room size
+    - `id` breaks ties between rows created in the same instant
+*/
+
+CREATE INDEX IF NOT EXISTS idx_messages_room_created_at
+  ON messages (room_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_call_recordings_room_created_at
+  ON call_recordings (room_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_messages_room_id;
+DROP INDEX IF EXISTS idx_call_recordings_room_id;